@@ -45,18 +45,17 @@ import metamorphosed.amrdoc as amrdoc
 
 class AMR2UMR:
     def __init__(self, infile, outfile, first=0, last=0, filterid=None, gen=True):
-        adoc = amrdoc.AMRdoc(infile)
         if filterid:
             filterid = re.compile(filterid)
 
         ofp = open(outfile, "w")
         if gen:
             print("# generated by:", " ".join(sys.argv), file=ofp)
-        for ct, sent in enumerate(adoc.sentences, 1):
+        for ct, sent in enumerate(amrdoc.iter_sentences(infile), 1):
             if ct < first:
                 continue
             if last != 0 and ct > last:
-                continue
+                break
             if filterid:
                 if not filterid.match(sent.id):
                     continue
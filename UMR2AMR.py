@@ -48,8 +48,6 @@ import metamorphosed.umrdoc as umrdoc
 
 class UMR2AMR:
     def __init__(self, infile, outfile, first=0, last=0, filterid=None, doalignments=True, adddoclevel=None, prefix=None, gen=True):
-        udoc = umrdoc.UMRdoc(infile)
-
         if outfile:
             ofp = open(outfile, "w")
         else:
@@ -58,11 +56,11 @@ class UMR2AMR:
         self.varname = re.compile(r"s(\d+)[a-z]\d?")
         if gen:
             print("# generated by:", " ".join(sys.argv), file=ofp)
-        for ct, sent in enumerate(udoc.sentences, 1):
+        for ct, sent in enumerate(umrdoc.iter_sentences(infile), 1):
             if ct < first:
                 continue
             if last != 0 and ct > last:
-                continue
+                break
 
             if len(sent.amr.split("\n")) == 1 and "umr-empty" in sent.amr:
                 print("Ignore empty sentence", sent.id, file=sys.stderr)
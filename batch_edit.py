@@ -0,0 +1,5 @@
+#!/usr/bin/env python3
+
+from metamorphosed.batch_edit import main
+
+main()
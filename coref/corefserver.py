@@ -46,6 +46,7 @@ import corefeditor
 from flask import Flask, Response, jsonify, render_template, request
 
 import metamorphosed.gitinterface as gitinterface
+from metamorphosed.timings import Timings
 
 parent = pathlib.Path(os.path.abspath(__file__)).parent.parent
 sys.path.append(str(parent))
@@ -54,10 +55,12 @@ APIVERSION = 1.1
 
 
 class CorefServer:
-    def __init__(self, port, xmlfiles, amrfiles, author=None, do_git=True):
+    def __init__(self, port, xmlfiles, amrfiles, author=None, do_git=True, timings=None):
+        self.timings = Timings()
         self.port = port
         self.author = author
         self.editor = corefeditor.CorefEditor(xmlfiles, amrfiles)
+        self.timings.done("documents")
         self.modifiedfiles = set()
         self.do_git = do_git
 
@@ -73,6 +76,7 @@ class CorefServer:
         if ko:
             raise Exception("Edited file(s) <%s> not under git version control. Backup file(s) <%s> exists already."
                             "\nPlease rename Backup file first" % (", ".join(ko), ", ".join(ko2)))
+        self.timings.done("git check")
 
         mydir = os.path.abspath(os.path.dirname(__file__))
         #print("zzzz", "%s/../metamorphosed/gui" % mydir)
@@ -108,7 +112,8 @@ class CorefServer:
                     #"amr_relations": rels,
                     #"readonly": readonly,
                     "version": corefeditor.VERSION,
-                    "apiversion": APIVERSION
+                    "apiversion": APIVERSION,
+                    "timings": self.timings.report()
                     }
             return Response("%s\n" % json.dumps(dico), 200, mimetype="application/json")
 
@@ -205,6 +210,10 @@ class CorefServer:
             response.status_code = 400 #error.status_code
             return response
 
+        self.timings.done("flask")
+        if timings:
+            self.timings.write(timings, "coref")
+
     def prepare_newpage(self, num, showfrom, shownumber, scaling, warnings=None, messages=None):
         #print("eeee", showfrom, shownumber)
         #if showfrom.strip() != "":
@@ -335,6 +344,7 @@ if __name__ == "__main__":
                         "if absent current user+mail is used")
     parser.add_argument("--nogit", dest="git", default=True, action="store_false",
                         help='no git add/commit, even if file is git controlled')
+    parser.add_argument("--timings", default=None, help="file to which the time and memory used by the different initialisation phases is appended")
 
     #parser.add_argument("--pbframes", "-P", default=None, help="Propbank frameset documentation (directory with xml files)")
     #parser.add_argument("--constraints", "-C", default=None, help="constraints for subjects and predicates (yaml file)")
@@ -346,7 +356,7 @@ if __name__ == "__main__":
         args = parser.parse_args()
 
         try:
-            aes = CorefServer(args.port, args.xml, args.amrfiles, author=args.author, do_git=args.git)
+            aes = CorefServer(args.port, args.xml, args.amrfiles, author=args.author, do_git=args.git, timings=args.timings)
             aes.start()
         except Exception as e:
             print(e, file=sys.stderr)
@@ -125,7 +125,7 @@ def test_info(client):
 
     response = client.get("/info")
     res = json.loads(response.data)
-    assert sorted(res.keys()) == ['apiversion', 'cmdline', 'hostname', 'pwd', 'version']
+    assert sorted(res.keys()) == ['apiversion', 'cmdline', 'hostname', 'pwd', 'timings', 'version']
 
 
 def test_read(client):
@@ -40,6 +40,7 @@
 
 import random
 import metamorphosed.colorlist as colorlist
+import metamorphosed.validation as validation
 
 # predifined colors, the rest is taken randomly from a predefined lists of colors in colorlist.py
 orangecolors = {
@@ -82,6 +83,48 @@ orangecolors = {
     }
 
 
+def css(d3=False):
+    # CSS which defines colours of relations (same colors as amreditor.py uses to create graph)
+    lines = []
+    if not d3:
+        # editor
+        for typ, col in orangecolors.items():
+            typ = typ[1:] #.replace("-", "")
+            # edge style
+            lines.append(".%s { background-color: %s;" % (typ, col))
+
+            light = (int(col[1:3], 16) + int(col[3:5], 16) + int(col[5:], 16)) / 3
+            if light < 0x80:
+                lines.append("color: white;")
+            lines.append("}\n")
+
+            # edge label style
+            lines.append(".%stext { color: %s; " % (typ, col))
+
+            if light > 0xa0:
+                lines.append("background-color: #111111")
+            lines.append("}\n")
+
+            # edges in lean SVG graphs
+            lines.append("g.edge.%s path { stroke: %s; }\n" % (typ, col))
+            lines.append("g.edge.%s polygon { fill: %s; stroke: %s; }\n" % (typ, col, col))
+            lines.append("g.edge.%s text { fill: %s; }\n" % (typ, col))
+    else:
+        # D3 animation
+        for typ, col in orangecolors.items():
+            typ = typ[1:] #.replace("-", "")
+            # edge style
+            lines.append(".%sd3 { fill: %s; stroke: %s;" % (typ, col, col))
+
+            #light = (int(col[1:3], 16) + int(col[3:5], 16) + int(col[5:], 16)) / 3
+            lines.append("}\n")
+
+            # edge label style
+            lines.append(".%stextd3 { fill: %s;" % (typ, col))
+            lines.append("}\n")
+    return " ".join(lines)
+
+
 class Relations:
     def __init__(self, relfn, isconceptlist=False):
         random.seed(22) # need this to have stable colors (inf not, unittest will fail, since colors change every time ...)
@@ -105,15 +148,17 @@ class Relations:
 
     def validate(self, triples):
         # return ARG relations which ar note defined for the given concept
+        return validation.validatetriples(self, triples)
+
+    def validatetriple(self, s, p, o, concepts):
         errors = []
         if self.relations:
-            for s, p, o in triples:
-                if not self.isconceptlist:
-                    if p not in self.relations:
-                        errors.append("invalid relation '%s'" % (p))
-                else:
-                    if p == ":instance" and o not in self.relations:
-                        errors.append("invalid concept '%s'" % (o))
+            if not self.isconceptlist:
+                if p not in self.relations:
+                    errors.append("invalid relation '%s'" % (p))
+            else:
+                if p == ":instance" and o not in self.relations:
+                    errors.append("invalid concept '%s'" % (o))
         else:
             # no messages because no data to validate on
             pass
@@ -35,14 +35,16 @@
 
 
 import collections
+import concurrent.futures
 import copy
 import importlib
-import io
 import json
 import os
+import queue
 import re
 import socket
 import sys
+import threading
 import time
 import zipfile
 
@@ -65,6 +67,13 @@ from metamorphosed.exception import ServerException
 from metamorphosed.findsubgraph import SubGraphRDF
 import metamorphosed.joingraphs as joingraphs
 from metamorphosed.preferred_graph import PreferredGraphs
+from metamorphosed.processor_pool import ProcessorPool
+from metamorphosed.amrindex import IndexedAMRdoc
+from metamorphosed.timings import Timings
+from metamorphosed.render_cache import RenderCache, DiskRenderCache
+from metamorphosed.graphexport import ZipStream, ordered_map
+from metamorphosed.history import History
+from metamorphosed.static_export import fingerprint
 import metamorphosed.version
 
 import metamorphosed.installJQ as iJQ
@@ -77,6 +86,29 @@ import metamorphosed.installJQ as iJQ
 # find an example in AMR data
 # call an AMRserver for an (empty) sentence ? rather not
 
+# parameters of an edit command, for /edit and every command of /batchedit (all are strings, except dgpos)
+EDITPARAMS = ["cmd",
+              "addconcept",
+              "addname", "nameof",
+              "start", "label", "end",
+              "modconcept", "newconcept",
+              "modedge_start", "modedge_end", "newedge", "modedge_newstart",
+              "delinstance",
+              "deledge_start", "deledge_end", "deledge",
+              "literalid", "literaledge", "newliteral", "delliteral", #"isattribute",
+              "literalof", "relationforliteral",
+              "modpenman",
+              "modcomment",
+              "reify", "dereify",
+              "newtop",
+              "addgraph", "mappings",
+              "newvarname", "oldvarname",
+              "umrvar", "indexes", #"alignmentstart", "alignmentend"
+              "newalignment",
+              "adddocgraph", "dg_subj", "dg_obj", "dg_pred", "moddocgraph", "dgpos",
+              "modindexes"
+              ]
+
 
 class AMR_Edit_Server:
     def __init__(self, port, filename, pbframes, rels, concepts, constraints,
@@ -85,16 +117,48 @@ class AMR_Edit_Server:
                  do_git=True, compare=None, smatchpp=False,
                  preferred=None, # filename where to read/write the preferred graph in comparison mode
                  override=False, # if True override an existing backup (*.2) file
-                 umr=False
+                 umr=False,
+                 maxprocessors=0, # max number of AMRProcessors kept in memory (0: no limit)
+                 pbcache=None, # directory to cache parsed PropBank frames
+                 pbworkers=0, # number of processes to parse PropBank frames (0: no parallel parsing)
+                 timings=None, # file to append the time and memory used by the initialisation phases
+                 rendercache=1000, # max number of graphs rendered by graphviz kept in memory (0: no cache)
+                 rendercachemb=64, # max size (in MB) of all cached rendered graphs (0: no limit)
+                 diskcache=None, # directory to keep rendered graphs (only in readonly mode)
+                 prewarm=False, # if True, render all graphs in the background to fill diskcache
+                 exportbatch=50, # number of graphs rendered by a single dot process for /graphs (1: one process per graph)
+                 exportworkers=4, # number of threads rendering graphs for /graphs
+                 prefetch=0, # number of sentences before and after the displayed one to render in the background (0: none)
+                 leansvg=False, # if True, the editor gets smaller SVG graphs (tooltips are loaded with /conceptdoc)
+                 rendertimeout=0, # max seconds to render a graph, a simplified graph is rendered if it takes longer (0: no limit)
+                 collapse=0, # graphs with more instances are displayed partially (0: always completely)
+                 historydepth=100, # max number of undo steps per sentence (0: no limit)
+                 historymb=64 # max size (in MB) of the undo/redo history of all sentences (0: no limit)
                  ):
+        self.timings = Timings()
         self.umr = umr
         self.port = port
+        self.exportbatch = exportbatch
+        self.exportworkers = exportworkers
+        self.leansvg = leansvg
+        self.collapse = collapse
         self.filename = filename
+
+        if compare is not None:
+            # files to compare are read in worker processes while we read the main file
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers=max(1, min(len(compare), os.cpu_count() or 1)))
+            comparedocs = [executor.submit(amrdoc.AMRdoc, fn) for fn in compare]
+
         if self.umr:
             self.amrdoc = umrdoc.UMRdoc(filename)
+        elif readonly and compare is None:
+            # sentences are read from the file only when needed
+            self.amrdoc = IndexedAMRdoc(filename)
         else:
             self.amrdoc = amrdoc.AMRdoc(filename)
-        self.aps = {} # parsed and possibly modified PENMAN AMRs
+        # parsed and possibly modified PENMAN AMRs, created when a sentence is accessed
+        self.aps = ProcessorPool(self.amrdoc.sentences, umr=self.umr, maxsize=maxprocessors)
+        self.timings.done("document")
         self.author = author
         self.reificator = None
         self.do_git = do_git
@@ -103,6 +167,7 @@ class AMR_Edit_Server:
 
         self.readonly = readonly
         self.otheramrdocs = [] # (doc,aps)
+        self.renderexecutor = None # renders the graphs of all annotators at the same time
 
         if compare is not None:
             self.readonly = True
@@ -110,26 +175,25 @@ class AMR_Edit_Server:
 
             filedict = collections.OrderedDict({filename: self.amrdoc})
             # inter-annotator mode
-            for fn in compare:
-                doc = amrdoc.AMRdoc(fn)
+            for fn, future in zip(compare, comparedocs):
+                doc = future.result()
                 filedict[fn] = doc # filename: amrdoc object
-                aps = {}
-                for sentnum, cursentence in enumerate(doc.sentences, start=1):
-                    if sentnum % 10 == 0:
-                        print("%d initialized" % sentnum, end="\r")
-                        ap = amreditor.AMRProcessor()
-                        aps[sentnum] = ap
-                        ap.lastpm = cursentence.amr
-                        #ap.comments = cursentence.comments[:]
+                # AMRProcessors are created when a sentence is displayed
+                aps = ProcessorPool(doc.sentences, maxsize=maxprocessors)
                 self.otheramrdocs.append((doc, aps))
-            print("all compare sentences initialized")
+            executor.shutdown()
+            print("all compare files read")
+            # every graph is rendered by its own dot process
+            self.renderexecutor = concurrent.futures.ThreadPoolExecutor(max_workers=len(compare) + 1)
 
             if preferred is not None:
                 self.preferred = PreferredGraphs(filedict, preferred)
 
+            self.timings.done("compare documents")
         else:
             if reifications:
                 self.reificator = reification.getInstance(reifications)
+            self.timings.done("reifications")
 
         self.fileversion = "2"
         bak_filename = filename + "." + self.fileversion
@@ -140,36 +204,15 @@ class AMR_Edit_Server:
         else:
             if os.path.exists(bak_filename):
                 print("ATTENTION! backup file %s will be overwritten !" % bak_filename)
+        self.timings.done("git check")
 
         self.relationsdoc = None
         if relationsdoc and relationsdoc != "-":
             self.relationsdoc = RelDoc(relationsdoc)
+        self.timings.done("relations documentation")
 
-        # initial version of Penman graph
-        self.initstates = []
-        print("initializing...")
-        for sentnum, cursentence in enumerate(self.amrdoc.sentences, start=1):
-            if sentnum % 10 == 0:
-                print("%d initialized" % sentnum, end="\r")
-            ap = amreditor.AMRProcessor()
-            if self.umr:
-                ap.umr_varprefix = cursentence.varprefix
-            self.aps[sentnum] = ap
-            ap.lastpm = cursentence.amr
-            #ap.comments = cursentence.comments[:]
-            if self.umr:
-                ap.alignments = cursentence.getcopy()
-                ap.docgraph = cursentence.docgraph.getcopy()
-
-            self.initstates.append(ap.lastpm)
-
-        print("all sentences initialized")
-
-        # stack of last actions, used by undo/redo
-        # save current ap **after** modifiying it
-        # it is initalialized with a copy of all sentences
-        self.undos = [] # (self.apps:sentnum, [lastpm])
-        self.redos = []
+        # undo/redo stacks of every sentence
+        self.history = History(maxdepth=historydepth, maxbytes=historymb * 1024 * 1024)
 
         mydir = os.path.abspath(os.path.dirname(__file__))
 
@@ -177,6 +220,7 @@ class AMR_Edit_Server:
         if not installOK:
             print("*** Javascript libraries missing. Run %s/installJQ.py or install manually as described in README.ld" % mydir, file=sys.stderr)
             sys.exit(1)
+        self.timings.done("javascript libraries")
 
         self.isInt = re.compile(r"^\d+$")
         self.isFloat = re.compile(r"^\d*\.?\d+$")
@@ -185,9 +229,38 @@ class AMR_Edit_Server:
         # these classes must implement a validate(triples) method which return a list of error messages
         self.amr_rels = AMR_relations.Relations(rels)
         self.amr_concepts = AMR_relations.Relations(concepts, isconceptlist=True)
-        self.pbframes = propbank_frames.PropBankFrames(pbframes)
+        self.timings.done("relations and concepts")
+        self.pbframes = propbank_frames.PropBankFrames(pbframes, cachedir=pbcache, workers=pbworkers)
         amreditor.AMRProcessor.pbframes = self.pbframes # to add some documentation from propbank to SVG
+        amreditor.AMRProcessor.rendercache = None
+        if rendercache > 0:
+            amreditor.AMRProcessor.rendercache = RenderCache(maxsize=rendercache, maxbytes=rendercachemb * 1024 * 1024)
+        amreditor.AMRProcessor.rendertimeout = rendertimeout if rendertimeout > 0 else None
+        amreditor.AMRProcessor.diskcache = None
+        self.prewarmed = None
+        if diskcache:
+            if not self.readonly:
+                print("*** render cache directory %s ignored, only used with --readonly" % diskcache, file=sys.stderr)
+            else:
+                # rendered graphs depend on the version, on the documentation of PropBank frames (tooltips)
+                # and on the relations file (colours of the edges)
+                salt = "%s %s %d %s" % (metamorphosed.version.VERSION, pbframes, len(self.pbframes.rolesets), fingerprint(rels))
+                amreditor.AMRProcessor.diskcache = DiskRenderCache(diskcache, salt)
+                if prewarm:
+                    self.prewarmed = 0
+                    threading.Thread(target=self.prewarm, daemon=True).start()
+        self.prefetch = prefetch
+        self.prefetched = 0
+        self.prefetchqueue = queue.Queue()
+        if prefetch > 0:
+            if amreditor.AMRProcessor.rendercache is None and amreditor.AMRProcessor.diskcache is None:
+                print("*** prefetching ignored, needs a render cache", file=sys.stderr)
+                self.prefetch = 0
+            else:
+                threading.Thread(target=self.prefetcher, daemon=True).start()
+        self.timings.done("propbank")
         self.constraints = relations_constraints.Constraints(constraints)
+        self.timings.done("constraints")
 
         self.edge_predictor = None
         if predictor:
@@ -195,6 +268,7 @@ class AMR_Edit_Server:
 
         if not self.edge_predictor:
             self.edge_predictor = EdgePredictor()
+        self.timings.done("edge predictor")
 
         app = Flask(__name__,
                     static_url_path='',
@@ -238,8 +312,21 @@ class AMR_Edit_Server:
                     "readonly": self.readonly,
                     "version": metamorphosed.version.VERSION,
                     "apiversion": metamorphosed.version.APIVERSION,
-                    "umr": self.umr
+                    "umr": self.umr,
+                    "processors": self.aps.stats(),
+                    "timings": self.timings.report(),
+                    "rendercache": amreditor.AMRProcessor.rendercache.stats() if amreditor.AMRProcessor.rendercache is not None else None
                     }
+            if amreditor.AMRProcessor.diskcache is not None:
+                dico["diskcache"] = amreditor.AMRProcessor.diskcache.stats()
+                if self.prewarmed is not None:
+                    dico["diskcache"]["prewarmed"] = self.prewarmed
+            if self.prefetch:
+                dico["prefetch"] = {"distance": self.prefetch, "prefetched": self.prefetched}
+            if amreditor.AMRProcessor.rendertimeout:
+                dico["rendertimeout"] = {"seconds": amreditor.AMRProcessor.rendertimeout,
+                                         "timeouts": amreditor.AMRProcessor.timeouts,
+                                         "degraded": amreditor.AMRProcessor.degradedgraphs}
 
             if self.otheramrdocs:
                 dico["otherfilenames"] = [doc.fn for doc, aps in self.otheramrdocs]
@@ -268,374 +355,95 @@ class AMR_Edit_Server:
             sentnum = self.checkParameter(request, 'num', 'integer', isOptional=False)
             reverse_of = self.checkParameter(request, 'reverse_of', 'boolean', isOptional=True, defaultValue=False)
             withalignments = self.checkParameter(request, 'withalignments', 'boolean', isOptional=True, defaultValue=False)
+            expand = self.checkParameter(request, 'expand', 'string', isOptional=True, defaultValue=None)
             prevmod = self.checkParameter(request, 'prevmod', 'integer', isOptional=True, defaultValue=0)
-            cmd = self.checkParameter(request, 'cmd', 'string', isOptional=True, defaultValue=None)
-            addconcept = self.checkParameter(request, 'addconcept', 'string', isOptional=True, defaultValue=None)
-            addname = self.checkParameter(request, 'addname', 'string', isOptional=True, defaultValue=None)
-            nameof = self.checkParameter(request, 'nameof', 'string', isOptional=True, defaultValue=None)
-
-            start = self.checkParameter(request, 'start', 'string', isOptional=True, defaultValue=None)
-            end = self.checkParameter(request, 'end', 'string', isOptional=True, defaultValue=None)
-            label = self.checkParameter(request, 'label', 'string', isOptional=True, defaultValue=None)
-
-            modconcept = self.checkParameter(request, 'modconcept', 'string', isOptional=True, defaultValue=None)
-            newconcept = self.checkParameter(request, 'newconcept', 'string', isOptional=True, defaultValue=None)
-
-            newtop = self.checkParameter(request, 'newtop', 'string', isOptional=True, defaultValue=None)
-
-            delinstance = self.checkParameter(request, 'delinstance', 'string', isOptional=True, defaultValue=None)
-
-            modedge_start = self.checkParameter(request, 'modedge_start', 'string', isOptional=True, defaultValue=None)
-            modedge_end = self.checkParameter(request, 'modedge_end', 'string', isOptional=True, defaultValue=None)
-            newedge = self.checkParameter(request, 'newedge', 'string', isOptional=True, defaultValue=None)
-            modedge_newstart = self.checkParameter(request, 'modedge_newstart', 'string', isOptional=True, defaultValue=None)
-
-            deledge_start = self.checkParameter(request, 'deledge_start', 'string', isOptional=True, defaultValue=None)
-            deledge_end = self.checkParameter(request, 'deledge_end', 'string', isOptional=True, defaultValue=None)
-            deledge = self.checkParameter(request, 'deledge', 'string', isOptional=True, defaultValue=None)
-
-            literalid = self.checkParameter(request, 'literalid', 'string', isOptional=True, defaultValue=None)
-            literaledge = self.checkParameter(request, 'literaledge', 'string', isOptional=True, defaultValue=None)
-            newliteral = self.checkParameter(request, 'newliteral', 'string', isOptional=True, defaultValue=None)
-            #isattribute = self.checkParameter(request, 'isattribute', 'boolean', isOptional=True, defaultValue=False)
-            delliteral = self.checkParameter(request, 'delliteral', 'string', isOptional=True, defaultValue=None)
-
-            literalof = self.checkParameter(request, 'literalof', 'string', isOptional=True, defaultValue=None)
-            relationforliteral = self.checkParameter(request, 'relationforliteral', 'string', isOptional=True, defaultValue=None)
-            newliteral = self.checkParameter(request, 'newliteral', 'string', isOptional=True, defaultValue=None)
-
-            modpenman = self.checkParameter(request, 'modpenman', 'string', isOptional=True, defaultValue=None)
-            modcomment = self.checkParameter(request, 'modcomment', 'string', isOptional=True, defaultValue=None)
-            reify = self.checkParameter(request, 'reify', 'string', isOptional=True, defaultValue=None)
-            dereify = self.checkParameter(request, 'dereify', 'string', isOptional=True, defaultValue=None)
-            addgraph = self.checkParameter(request, 'addgraph', 'string', isOptional=True, defaultValue=None)
-            mappings = self.checkParameter(request, 'mappings', 'string', isOptional=True, defaultValue=None)
-
-            oldvarname = self.checkParameter(request, 'oldvarname', 'string', isOptional=True, defaultValue=None)
-            newvarname = self.checkParameter(request, 'newvarname', 'string', isOptional=True, defaultValue=None)
-
-            umrvar = self.checkParameter(request, 'umrvar', 'string', isOptional=True, defaultValue=None)
-            indexes = self.checkParameter(request, 'indexes', 'string', isOptional=True, defaultValue=None)
-            newalignment = self.checkParameter(request, 'newalignment', 'string', isOptional=True, defaultValue=None)
-            adddocgraph = self.checkParameter(request, 'adddocgraph', 'string', isOptional=True, defaultValue=None)
-            moddocgraph = self.checkParameter(request, 'moddocgraph', 'string', isOptional=True, defaultValue=None)
-            dgpos = self.checkParameter(request, 'dgpos', 'integer', isOptional=True, defaultValue=None)
-            dg_subj = self.checkParameter(request, 'dg_subj', 'string', isOptional=True, defaultValue=None)
-            dg_pred = self.checkParameter(request, 'dg_pred', 'string', isOptional=True, defaultValue=None)
-            dg_obj = self.checkParameter(request, 'dg_obj', 'string', isOptional=True, defaultValue=None)
-            modindexes = self.checkParameter(request, 'modindexes', 'string', isOptional=True, defaultValue=None)
+            edit = {}
+            for param in EDITPARAMS:
+                edit[param] = self.checkParameter(request, param, 'integer' if param == "dgpos" else 'string', isOptional=True, defaultValue=None)
 
-            if sentnum < 1 or sentnum > len(self.amrdoc.sentences):
-                # creates an http status code 400
-                raise ServerException("invalid sentence number: must be between 1 and %d" % len(self.amrdoc.sentences))
-                #dico = {"error": "invalid sentence number: must be between 1 and %d\n" % len(self.amrdoc.sentences)}
-                #return Response("%s\n" % json.dumps(dico),
-                #                400, mimetype="application/json")
-
-            validparams = ["num", "reverse_of", "withalignments",
-                           "cmd",
-                           "addconcept",
-                           "addname", "nameof",
-                           "start", "label", "end",
-                           "modconcept", "newconcept",
-                           "modedge_start", "modedge_end", "newedge", "modedge_newstart",
-                           "delinstance",
-                           "deledge_start", "deledge_end", "deledge",
-                           "literalid", "literaledge", "newliteral", "delliteral", #"isattribute",
-                           "literalof", "relationforliteral", "newliteral",
-                           "modpenman",
-                           "modcomment",
-                           "reify", "dereify",
-                           "newtop",
-                           "prevmod",
-                           "addgraph", "mappings",
-                           "newvarname", "oldvarname",
-                           "umrvar", "indexes", #"alignmentstart", "alignmentend"
-                           "newalignment",
-                           "adddocgraph", "dg_subj", "dg_obj", "dg_pred", "moddocgraph", "dgpos",
-                           "modindexes"
-                           ]
-
-            #self.findinvalidparameters(request, validparams)
+            validparams = ["num", "reverse_of", "withalignments", "expand", "prevmod"] + EDITPARAMS
             self.validParameters(request, set(validparams))
-            print("COMMAND:", end=" ")
-            for v in validparams:
-                if v != "num" and eval(v) is not None:
-                    print(', "%s": "%s"' % (v, eval(v)), end=" ")
-            print()
-            ap = self.aps.get(int(sentnum))
-
-            if not ap.isparsed:
-                ap.readpenman(ap.lastpm)
-                ap.show()
-
-            cursentence = self.amrdoc.sentences[sentnum - 1]
-            if not ap.valid and modpenman is None:
-                # an invalid PENMAN can only be corrected using modpenman
-                return invalidamr(ap, ap.lastpm, cursentence, sentnum)
 
-            rtc = None
-            print("AP PREVMOD:", ap.previous_modification, "CLIENT:", prevmod, "TOO LATE", ap.previous_modification > prevmod)
-            if ap.previous_modification > prevmod:
-                raise ServerException("The sentence has been edit by another user. Please reload sentence")
+            ap, cursentence = prepare_edit(sentnum, prevmod, edit.get("modpenman") is not None)
+            if isinstance(ap, Response):
+                return ap
+            setmodified(ap, cursentence)
 
-            copied = {"num": sentnum,
-                      "amr": ap.lastpm,
-                      "comments": cursentence.comments[:]
-                      }
-            if self.umr:
-                copied["alignments"] = cursentence.getcopy()
-                copied["docgraph"] = cursentence.docgraph.getcopy()
-
-            #self.undos.append((sentnum, ap.lastpm))
-            self.undos.append(copied)
-            #print("AP: %s" % ap.lastpm, copied)
-            #print("UNDOS: %d" % (len(self.undos)))
-            self.redos = []
-            #print("REDOS: %d" % (len(self.redos)))
+            self.history.push(sentnum, self.sentencestate(sentnum))
             #for n,pm in self.states:
             #    print("hhh   %s %s" % (n, " ## ".join(pm).replace("\n", "")))
             #    #print("hhh   %s %s" % (n, pm))
 
-            ap.modified = True # TODO: set rather by ap.-functions ??
-            cursentence.date = time.strftime("%a %b %d, %Y %H:%M", time.localtime(time.time()))
-
-            if cmd:
-                ap.process(cmd)
-            elif addconcept:
-                ap.process(addconcept)
-            elif addname and nameof:
-                var = ap.addconcept("name")
-                words = addname.split()
-                for i, w in enumerate(words):
-                    ap.addedge(var, '"%s"' % w, ":op%d" % (i + 1))
-                ap.addedge(nameof, var, "name")
-            elif start and end and label:
-                # add new edge between to nodes
-                if label == "todo":
-                    # "todo" is the default value given by index.js when clicking on to nodes
-                    # print("label", label, end=" ")
-                    label = self.edge_predictor.predict(ap.vars.get(start), ap.vars.get(end))
-                    # print("->", label)
-                rtc = ap.addedge(start, end, label)
-            elif modconcept and newconcept:
-                ap.modconcept(modconcept, newconcept)
-            elif modedge_start and modedge_end and newedge:
-                if modedge_newstart:
-                    rtc = ap.moveedge(modedge_start, modedge_end, newedge, modedge_newstart)
-                else:
-                    ap.modedge(modedge_start, modedge_end, newedge)
-            elif delinstance:
-                ap.delinstance(delinstance)
-            elif deledge_start and deledge_end and deledge:
-                ap.deledge(deledge_start, deledge_end, deledge)
-            elif literalid and literaledge and newliteral:
-                ap.modliteral(literalid, literaledge, newliteral)
-            elif literalid and literaledge and delliteral:
-                rtc = ap.delliteral(literalid, literaledge, delliteral)
-            elif literalof and relationforliteral and newliteral:
-                rtc = ap.addliteral(literalof, relationforliteral, newliteral) #, isattribute)
-            elif modpenman:
-                newap = amreditor.AMRProcessor()
-                newap.readpenman(modpenman)
-                newap.previous_modification = ap.previous_modification
-                if not newap.valid:
-                    return invalidamr(newap,
-                                      modpenman,
-                                      self.amrdoc.sentences[sentnum - 1],
-                                      sentnum)
-                else:
-                    newap.show() # to create penman
-                    self.aps[sentnum] = newap
-                    ap = newap
-                    ap.modified = True # set rather by ap.-functions ??
-            elif modcomment is not None:
-                cursentence.modcomment(modcomment)
-                #ap.comments = cursentence.comments[:]
-            elif newtop:
-                rtc = ap.settop(newtop)
-            elif reify:
-                #print(ap.lastpm)
-                ap.reify(reify)
-            elif dereify:
-                rtc = ap.dereify(dereify)
-            elif oldvarname and newvarname:
-                rtc = ap.renamevar(oldvarname, newvarname)
-            elif addgraph:
-                if not mappings or not mappings.strip():
-                    raise ServerException("Missing variable mappings. use 'v1/v2 ...'")
-                corefs = []
-                if mappings:
-                    for elems in mappings.split():
-                        mapping = elems.split("/")
-                        if len(mapping) != 2:
-                            raise ServerException("Bad format for mappings. use 'a/b ...': %s" % elems)
-                        corefs.append((mapping[0], mapping[1]))
-
-                newap = amreditor.AMRProcessor()
-                try:
-                    pm = joingraphs.joingraphs(ap.lastpm, addgraph, corefs, top=None)
-                    newap.readpenman(pm)
-                    newap.previous_modification = ap.previous_modification
-                except Exception as e:
-                    raise ServerException("Cannot join graphs: %s" % e)
-                if not newap.valid:
-                    return invalidamr(newap,
-                                      modpenman,
-                                      self.amrdoc.sentences[sentnum - 1],
-                                      sentnum)
-                else:
-                    newap.show() # to create penman
-                    self.aps[sentnum] = newap
-                    ap = newap
-                    ap.modified = True # set rather by ap.-functions ??
-            elif modindexes:
-                if self.umr:
-                    jobj = json.loads(modindexes)
-                    for key in jobj:
-                        #print("KKK", key, jobj[key])
-                        if key == "index":
-                            cursentence.index = [int(x) for x in jobj[key].split()]
-                        elif key == "words":
-                            cursentence.words = jobj[key].split()
-                        elif key.startswith("gloss_"):
-                            val = int(key[6:])
-                            cursentence.other[val] = (umrdoc.TOKLINESNUM[val], jobj[key].split())
-
-            elif adddocgraph:
-                # add a triple to UMR document level annotation
-                if dg_subj and dg_obj and dg_pred:
-                    msg = cursentence.docgraph.add(adddocgraph, dg_subj, dg_pred, dg_obj, ap.vars)
-                    ap.docgraph = cursentence.docgraph.getcopy()
-                    if msg is not None:
-                        return invalidumr(ap, msg, cursentence, sentnum)
-                else:
-                    return invalidumr(ap, ["invalid document graph triple for %s «%s, %s, %s»" % (adddocgraph, dg_subj, dg_pred, dg_obj)], cursentence, sentnum)
-            elif moddocgraph and dgpos is not None:
-                # modify/delete a triple to UMR document level annotation
-                if dg_subj and dg_obj and dg_pred:
-                    msg = cursentence.docgraph.modify(moddocgraph, dgpos, dg_subj, dg_pred, dg_obj, ap.vars)
-                    ap.docgraph = cursentence.docgraph.getcopy()
-
-                    if msg is not None:
-                        return invalidumr(ap, msg, cursentence, sentnum)
-                else:
-                    # delete a triple
-                    cursentence.docgraph.delete(moddocgraph, dgpos)
-                    ap.docgraph = cursentence.docgraph.getcopy()
-            elif umrvar is not None: # can be an empty string if no unaligned variable exists (H)
-                # modify a UMR alignment
-                if not self.umr:
-                    raise ServerException("Not in UMR mode")
-
-                def check_word_pos(line):
-                    newindexes = []
-                    for e in line.strip().split(","):
-                        mo = umrdoc.ALIGNMENT.match(e.strip())
-                        if not mo:
-                            return invalidumr(ap, ["alignments string invalid «%s»" % indexes], cursentence, sentnum)
-
-                        als = int(mo.group(1))
-                        ale = int(mo.group(2))
-
-                        if als > ale:
-                            return invalidumr(ap, ["alignment start %s must be <= alignment end %s" % (als, ale)], cursentence, sentnum)
-                        if (als <= 0 and ale > 0) \
-                           or (ale <= 0 and als > 0):
-                            return invalidumr(ap, ["alignment start %s and alignment end %s must be both 0 or -1 or both different" % (als, ale)], cursentence, sentnum)
-                        if cursentence.index and als > cursentence.index[-1]:
-                            return invalidumr(ap, ["alignment start %s is beyond last word" % (als)], cursentence, sentnum)
-                        if cursentence.index and ale > cursentence.index[-1]:
-                            return invalidumr(ap, ["alignment end %s is beyond last word" % (ale)], cursentence, sentnum)
-                        newindexes.append((als,ale))
-                    cursentence.alignments[umrvar] = newindexes
-                    ap.alignments = cursentence.getcopy()
-
-                if newalignment:
-                    if umrvar == "":
-                        return invalidumr(ap, "no unaligned variable available", cursentence, sentnum)
-                    rtc = check_word_pos(newalignment)
-                    if rtc:
-                        return rtc
-                elif indexes:
-                    rtc = check_word_pos(indexes)
-                    if rtc:
-                        return rtc
-                else:
-                    del cursentence.alignments[umrvar]
-                    ap.alignments = cursentence.getcopy()
-            else:
-                # creates an http status code 400
-                raise ServerException("No edit valid operation given")
-
-            tokenalignments = None
-            if self.umr and withalignments:
-                tokenalignments = (cursentence.words, cursentence.getAlignments(), len(cursentence.ralignments) > 0)
-            pm, svg = ap.show(tokenalignments=tokenalignments, reverse_of=reverse_of)
+            ap, warnings, errors = applyedit(ap, cursentence, sentnum, edit)
+            if errors:
+                if not ap.valid:
+                    return invalidamr(ap, edit["modpenman"], cursentence, sentnum)
+                return invalidumr(ap, errors, cursentence, sentnum)
+            return editresponse(ap, cursentence, sentnum, warnings, reverse_of, withalignments, expand)
+
+        @app.route('/batchedit', methods=["GET", "POST"])
+        def batchedit():
+            # apply a JSON list of edit commands (objects with the parameters of /edit) to a sentence
+            # either all commands are applied (with a single undo) or none. The graph is rendered and validated once at the end
+            sentnum = self.checkParameter(request, 'num', 'integer', isOptional=False)
+            reverse_of = self.checkParameter(request, 'reverse_of', 'boolean', isOptional=True, defaultValue=False)
+            withalignments = self.checkParameter(request, 'withalignments', 'boolean', isOptional=True, defaultValue=False)
+            expand = self.checkParameter(request, 'expand', 'string', isOptional=True, defaultValue=None)
+            prevmod = self.checkParameter(request, 'prevmod', 'integer', isOptional=True, defaultValue=0)
+            edits = self.checkParameter(request, 'edits', 'string', isOptional=False)
 
-            framedoc = None
-            framedocs = self.pbframes.getdoc(ap.triples)
-            if len(framedocs):
-                framedoc = "\n".join(framedocs)
+            validparams = ["num", "reverse_of", "withalignments", "expand", "prevmod", "edits"]
+            self.validParameters(request, set(validparams))
 
-            reldoc = None
-            if self.relationsdoc:
-                docs = self.relationsdoc.getdoc(ap.triples)
-                if len(docs):
-                    reldoc = docs
+            try:
+                edits = json.loads(edits)
+            except json.JSONDecodeError as e:
+                raise ServerException("invalid JSON in edits: %s" % e)
+            if not isinstance(edits, list) or not edits:
+                raise ServerException("edits must be a non empty list of edit commands")
+            for i, edit in enumerate(edits, start=1):
+                if not isinstance(edit, dict):
+                    raise ServerException("edit command %d is not an object" % i)
+                for param, value in edit.items():
+                    if param not in EDITPARAMS:
+                        raise ServerException("invalid parameter '%s' in edit command %d" % (param, i))
+                    if param == "dgpos":
+                        try:
+                            edit[param] = int(value)
+                        except (TypeError, ValueError):
+                            raise ServerException("dgpos must be an integer in edit command %d" % i)
+                    elif value is not None:
+                        edit[param] = str(value)
+
+            ap, cursentence = prepare_edit(sentnum, prevmod, edits[0].get("modpenman") is not None)
+            if isinstance(ap, Response):
+                return ap
+
+            state = self.sentencestate(sentnum)
+            origap = ap
+
+            def rollback():
+                # modpenman and addgraph replace the AMRProcessor of the sentence
+                self.aps[sentnum] = origap
+                self.restorestate(sentnum, state)
 
             warnings = []
-            if isinstance(rtc, list):
-                warnings.extend(rtc)
-            elif isinstance(rtc, str):
-                warnings.append(rtc)
-            warnings += ap.validate(valfuncs=[self.amr_rels.validate, self.amr_concepts.validate, self.pbframes.validate, self.constraints.validate])
-            if len(warnings) < 1:
-                warnings = None
-            cursentence = self.amrdoc.sentences[sentnum - 1]
-            lastchanged = cursentence.date
-            if not lastchanged:
-                lastchanged = cursentence.savedateorig
-            ap.previous_modification += 1
-            print("AUGMENT", cursentence.id, ap.previous_modification)
-            # TODO: we create this dico in 4 different places. Not optimal
-            dico = {"warning": warnings,
-                    "framedoc": framedoc,
-                    "reldoc": reldoc,
-                    "readonly": self.readonly,
-                    "penman": pm,
-                    #"svg": svg.decode("utf8") if svg else "",
-                    "svg": svg if svg else "",
-                    #"svg_canon": svg_canon.decode("utf8") if svg_canon else "",
-                    #"svg_canon": svg_canon if svg_canon else "",
-                    "filename": filename, "numsent": len(self.amrdoc.sentences),
-                    "num": sentnum,
-                    "text": cursentence.text,
-                    "comments": "\n".join(cursentence.comments), #"\n".join(ap.comments),
-                    "sentid": cursentence.id,
-                    "lastchanged": lastchanged,
-                    "variables": sorted(list(set(ap.vars.keys()))),
-                    "undos": len(self.undos),
-                    "redos": len(self.redos),
-                    "prevmod": ap.previous_modification,
-                    "umr": self.umr}
-            if self.umr:
-                dico["alignments"] = cursentence.alignments
-                dico["alignments2"] = cursentence.getAlignments(cursentence.alignments)
-                dico["docgraph"] = cursentence.docgraph.docgraph
-                #dico["alignments"] = ap.alignments #cursentence.alignments
-                #dico["alignments2"] = cursentence.getAlignments(ap.alignments)
-                #dico["docgraph"] = ap.docgraph # cursentence.docgraph.docgraph
-
-                if cursentence.index:
-                    dico["index"] = cursentence.index
-                if cursentence.words:
-                    dico["words"] = cursentence.words
-                if cursentence.other:
-                    dico["glosses"] = cursentence.other
-                dico["metainfo"] = cursentence.meta
-
-            return Response("%s\n" % json.dumps(dico), 200, mimetype="application/json")
+            for i, edit in enumerate(edits, start=1):
+                try:
+                    ap, rtc, errors = applyedit(ap, cursentence, sentnum, edit)
+                except Exception as e:
+                    rollback()
+                    if isinstance(e, ServerException):
+                        raise ServerException("edit command %d: %s, no command applied" % (i, e.value))
+                    raise
+                if errors:
+                    rollback()
+                    raise ServerException("edit command %d: %s, no command applied" % (i, "; ".join(errors)))
+                warnings += rtc
+            # only now, a rolled back batch leaves the sentence unmodified
+            setmodified(ap, cursentence)
+            self.history.push(sentnum, state)
+            return editresponse(ap, cursentence, sentnum, warnings, reverse_of, withalignments, expand)
 
         @app.route('/search', methods=["GET"])
         def search():
@@ -654,13 +462,13 @@ class AMR_Edit_Server:
 
             if what == "findtextnext":
                 for x in range(sentnum, len(self.amrdoc.sentences)):
-                    okt = list(self.amrdoc.sentences[x].findtext(regex))
+                    okt = list(self.amrdoc.findtext(x, regex))
                     if okt:
                         sentnum = x + 1
                         break
             elif what == "findidnext":
                 for x in range(sentnum, len(self.amrdoc.sentences)):
-                    ok = self.amrdoc.sentences[x].findid(regex)
+                    ok = self.amrdoc.findid(x, regex)
                     if ok:
                         sentnum = x + 1
                         break
@@ -691,13 +499,13 @@ class AMR_Edit_Server:
                         break
             elif what == "findtextprec":
                 for x in range(sentnum - 2, -1, -1):
-                    okt = list(self.amrdoc.sentences[x].findtext(regex))
+                    okt = list(self.amrdoc.findtext(x, regex))
                     if okt:
                         sentnum = x + 1
                         break
             elif what == "findidprec":
                 for x in range(sentnum - 2, -1, -1):
-                    ok = self.amrdoc.sentences[x].findid(regex)
+                    ok = self.amrdoc.findid(x, regex)
                     if ok:
                         sentnum = x + 1
                         break
@@ -755,75 +563,15 @@ class AMR_Edit_Server:
             if apcurrent.previous_modification > prevmod:
                 raise ServerException("The sentence has been edit by another user. Please reload sentence")
 
-            cursentence = self.amrdoc.sentences[sentnum - 1]
+            state = None
             if history == "undo":
-                if len(self.undos) > 0:
-                    # put current on redo
-                    ap = self.aps[sentnum]
-                    ap.show()
-                    #print("FOR REDO", sentnum, ap.lastpm)
-                    #self.redos.append((sentnum, ap.lastpm))
-                    copied = {"num": sentnum,
-                              "amr": ap.lastpm,
-                              "comments": cursentence.comments[:]
-                              }
-                    if self.umr:
-                        copied["alignments"] = cursentence.getcopy()
-                        copied["docgraph"] = cursentence.docgraph.getcopy()
-                    self.redos.append(copy.deepcopy(copied))
-
-                    # get latest undo
-                    #(sentnum, pm) = self.undos.pop()
-                    copied = self.undos.pop()
-                    #print("UNDO got", copied)
-
-                    # TODO in undos we do not stock all changes !!!! must stock here a COPY of all mods (AMR, alignments, docgraph, comments)
-                    ap = amreditor.AMRProcessor()
-                    #self.aps[sentnum] = ap
-                    #ap.readpenman(pm)
-                    self.aps[copied["num"]] = ap
-                    ap.readpenman(copied["amr"])
-                    ap.previous_modification = apcurrent.previous_modification
-                    ap.show()
-                    cursentence.comments = copied["comments"]
-                    if self.umr:
-                        cursentence.alignments = copied["alignments"]
-                        cursentence.docgraph.docgraph = copied["docgraph"]
-                    #print("AP", ap, cursentence.comments)
-
+                if self.history.undos(sentnum) > 0:
+                    state = self.history.undo(sentnum, self.sentencestate(sentnum))
             elif history == "redo":
-                if len(self.redos) > 0:
-                    # put current on undo
-                    ap = self.aps[sentnum]
-                    ap.show()
-                    #print("FOR UNDO", sentnum, ap.lastpm)
-                    copied = {"num": sentnum,
-                              "amr": ap.lastpm,
-                              "comments": cursentence.comments[:]
-                              }
-                    if self.umr:
-                        copied["alignments"] = cursentence.getcopy()
-                        copied["docgraph"] = cursentence.docgraph.getcopy()
-                    #print("FOR UNDO-2", copied)
-                    self.undos.append(copied)
-                    #self.undos.append((sentnum, ap.lastpm))
-
-                    # get latest undo
-                    #(sentnum, pm) = self.redos.pop()
-                    copied = self.redos.pop()
-                    #print("REDO-2", copied)
-                    ap = amreditor.AMRProcessor()
-                    #self.aps[sentnum] = ap
-                    #ap.readpenman(pm)
-                    self.aps[copied["num"]] = ap
-                    ap.readpenman(copied["amr"])
-                    ap.previous_modification = apcurrent.previous_modification
-                    ap.show()
-                    cursentence.comments = copied["comments"]
-                    if self.umr:
-                        cursentence.alignments = copied["alignments"]
-                        cursentence.docgraph.docgraph = copied["docgraph"]
-                    #print("AP", ap)
+                if self.history.redos(sentnum) > 0:
+                    state = self.history.redo(sentnum, self.sentencestate(sentnum))
+            if state is not None:
+                self.restorestate(sentnum, state)
 
             return prepare_newpage(sentnum, reverse_of=reverse_of, withalignments=withalignments)
 
@@ -864,45 +612,46 @@ class AMR_Edit_Server:
                 return Response("%s\n" % json.dumps(dico),
                                 400, mimetype="application/json")
             cursentence = self.amrdoc.sentences[sentnum - 1]
-            if sentnum not in self.aps:
-                ap = amreditor.AMRProcessor()
-                self.aps[sentnum] = ap
+            ap = self.aps[sentnum]
+            if not ap.isparsed:
                 ap.readpenman(cursentence.amr)
 
-            else:
-                ap = self.aps[sentnum]
-                if not ap.isparsed:
-                    ap.readpenman(cursentence.amr)
-
-            nodes = []
-            links = []
-            vars = set()
-            ct = 0
-            top = False
-            for s, p, o in ap.triples:
-                if p == ":instance":
-                    ct += 1
-                    vars.add(s)
-                    nodes.append({"id": s, "name": "%s / %s" % (s,o), "typ": "inst"})
-                    if not top:
-                        nodes.append({"id": "top", "name": "TOP", "typ": "topnode"})
-                        links.append({"source": "top", "target": s, "label": "top"})
-                        top = True
-            for s, p, o in ap.triples:
-                if p != ":instance":
-                    if p.endswith("-of") and not p.startswith(":consist"):
-                        tmp = o
-                        o = s
-                        s = tmp
-                        p = p[:-3]
-                    if o in vars:
-                        links.append({"source": s, "target": o, "label": p[1:]})
-                    else:
-                        nodes.append({"id": ct, "name": '%s' % o, "typ": "lit"})
-                        links.append({"source": s, "target": ct, "label": p[1:]})
+            # the D3 graph of a sentence is only built again if its triples have changed. It is kept
+            # in the processor, so that it is dropped with it
+            version, graph, pm = ap.d3graph or (None, None, None)
+            if version != ap.version:
+                # no need for graphviz here
+                pm = ap.penman()
+                nodes = []
+                links = []
+                vars = set()
+                ct = 0
+                top = False
+                for s, p, o in ap.triples:
+                    if p == ":instance":
                         ct += 1
-            pm, svg = ap.show() #tokenalignments=tokenalignments, reverse_of=reverse_of)
-            dico = {"graph": {"nodes": nodes, "links": links},
+                        vars.add(s)
+                        nodes.append({"id": s, "name": "%s / %s" % (s,o), "typ": "inst"})
+                        if not top:
+                            nodes.append({"id": "top", "name": "TOP", "typ": "topnode"})
+                            links.append({"source": "top", "target": s, "label": "top"})
+                            top = True
+                for s, p, o in ap.triples:
+                    if p != ":instance":
+                        if p.endswith("-of") and not p.startswith(":consist"):
+                            tmp = o
+                            o = s
+                            s = tmp
+                            p = p[:-3]
+                        if o in vars:
+                            links.append({"source": s, "target": o, "label": p[1:]})
+                        else:
+                            nodes.append({"id": ct, "name": '%s' % o, "typ": "lit"})
+                            links.append({"source": s, "target": ct, "label": p[1:]})
+                            ct += 1
+                graph = {"nodes": nodes, "links": links}
+                ap.d3graph = (ap.version, graph, pm)
+            dico = {"graph": graph,
                     "sentence": cursentence.text,
                     "penman": pm,
                     "num": sentnum
@@ -916,8 +665,9 @@ class AMR_Edit_Server:
             reverse_of = self.checkParameter(request, 'reverse_of', 'boolean', isOptional=True, defaultValue=False)
             withalignments = self.checkParameter(request, 'withalignments', 'boolean', isOptional=True, defaultValue=False)
             compare = self.checkParameter(request, 'compare', 'string', isOptional=True, defaultValue=None)
+            expand = self.checkParameter(request, 'expand', 'string', isOptional=True, defaultValue=None)
 
-            validparams = ["num", "compare", "reverse_of", "withalignments"]
+            validparams = ["num", "compare", "reverse_of", "withalignments", "expand"]
             self.validParameters(request, set(validparams))
 
             if sentnum < 1 or sentnum > len(self.amrdoc.sentences):
@@ -925,46 +675,24 @@ class AMR_Edit_Server:
                 return Response("%s\n" % json.dumps(dico),
                                 400, mimetype="application/json")
 
-            return prepare_newpage(sentnum, compare=compare, reverse_of=reverse_of, withalignments=withalignments)
+            return prepare_newpage(sentnum, compare=compare, reverse_of=reverse_of, withalignments=withalignments, expand=expand)
 
         @app.route('/css/<filename>', methods=["GET"])
         def getfile(filename):
             # get CSS file which defines colours of relations (same colors as amreditor.py uses to create graph)
             print("FF", filename)
-            lines = []
-            if filename == "relations.css":
-                # editor
-                for typ, col in amreditor.orangecolors.items():
-                    typ = typ[1:] #.replace("-", "")
-                    # edge style
-                    lines.append(".%s { background-color: %s;" % (typ, col))
-
-                    light = (int(col[1:3], 16) + int(col[3:5], 16) + int(col[5:], 16)) / 3
-                    if light < 0x80:
-                        lines.append("color: white;")
-                    lines.append("}\n")
-
-                    # edge label style
-                    lines.append(".%stext { color: %s; " % (typ, col))
-
-                    if light > 0xa0:
-                        lines.append("background-color: #111111")
-                    lines.append("}\n")
-            else:
-                # D3 animation
-                for typ, col in amreditor.orangecolors.items():
-                    typ = typ[1:] #.replace("-", "")
-                    # edge style
-                    lines.append(".%sd3 { fill: %s; stroke: %s;" % (typ, col, col))
-
-                    #light = (int(col[1:3], 16) + int(col[3:5], 16) + int(col[5:], 16)) / 3
-                    lines.append("}\n")
-
-                    # edge label style
-                    lines.append(".%stextd3 { fill: %s;" % (typ, col))
-                    lines.append("}\n")
-            #print("CSS"," ".join(lines))
-            return Response(" ".join(lines), 200, mimetype="text/css")
+            return Response(AMR_relations.css(d3=filename != "relations.css"), 200, mimetype="text/css")
+
+        @app.route('/conceptdoc', methods=["GET"])
+        def getconceptdoc():
+            # PropBank documentation of a concept, the tooltip which is not included in lean SVG graphs
+            concept = self.checkParameter(request, 'concept', 'string', isOptional=False, defaultValue=None)
+            self.validParameters(request, set(["concept"]))
+            dico = {"concept": concept,
+                    "doc": amreditor.conceptdoc(self.pbframes, concept)}
+            response = Response("%s\n" % json.dumps(dico), 200, mimetype="application/json")
+            response.headers["Cache-Control"] = "max-age=3600"
+            return response
 
         @app.route('/graphs/<filename>', methods=["GET"])
         def downloadgraphs(filename: str):
@@ -1015,28 +743,49 @@ class AMR_Edit_Server:
             if pages:
                 pages = parse_pages(pages)
 
-            zip_buffer = io.BytesIO()
-            with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED, False) as zip_file:
-                metadata = []
-                for ix, x in enumerate(self.aps, 1):
-                    if pages and ix not in pages:
-                        continue
-                    ap = self.aps[x]
-                    if not ap.isparsed:
-                        ap.readpenman(ap.lastpm)
+            selected = [ix for ix in self.aps if not pages or ix in pages]
+            batchsize = max(1, self.exportbatch)
+
+            def renderbatch(sentnums):
+                jobs = []
+                for ix in sentnums:
                     sent = self.amrdoc.sentences[ix - 1]
+                    # sentences which are not loaded get a processor which is dropped after rendering (as in prewarm()),
+                    # so that an export neither fills nor evicts the processor pool
+                    ap = self.aps.peek(ix)
+                    if ap is None:
+                        ap = amreditor.AMRProcessor()
+                        ap.userendercache = False
+                        if self.umr:
+                            ap.umr_varprefix = sent.varprefix
+                        ap.readpenman(sent.amr)
+                    elif not ap.isparsed:
+                        ap.readpenman(ap.lastpm)
                     tokenalignments = None
                     if self.umr and withalignments:
                         tokenalignments = (sent.words, sent.getAlignments(), len(sent.ralignments) > 0)
-                    pm, svg = ap.show(format=dataformat, highlightconcepts=highlight_concepts, tokenalignments=tokenalignments)
-                    if svg:
-                        zip_file.writestr("%d.%s" % (ix, dataformat), svg)
-
-                    metadata.append({"sentence": sent.text, "id": sent.id, "filename": "%d.%s" % (ix, dataformat), "sourcefilename": self.amrdoc.fn})
-                    #print("FILE", ix, svg[:100] if svg else svg)
-                zip_file.writestr("metadata.json", json.dumps(metadata, indent=2, ensure_ascii=False))
-
-            return Response(zip_buffer.getvalue(), 200, mimetype="application/zip")
+                    jobs.append((ap, {"format": dataformat, "highlightconcepts": highlight_concepts, "tokenalignments": tokenalignments}))
+                return sentnums, amreditor.showmany(jobs, batchsize=batchsize)
+
+            def generate():
+                # the zip file is sent while the graphs are rendered
+                stream = ZipStream()
+                with zipfile.ZipFile(stream, "w", zipfile.ZIP_DEFLATED, False) as zip_file:
+                    metadata = []
+                    batches = (selected[b:b + batchsize] for b in range(0, len(selected), batchsize))
+                    for sentnums, results in ordered_map(renderbatch, batches, workers=self.exportworkers):
+                        for ix, (pm, svg) in zip(sentnums, results):
+                            if svg:
+                                zip_file.writestr("%d.%s" % (ix, dataformat), svg)
+
+                            sent = self.amrdoc.sentences[ix - 1]
+                            metadata.append({"sentence": sent.text, "id": sent.id, "filename": "%d.%s" % (ix, dataformat), "sourcefilename": self.amrdoc.fn})
+                            #print("FILE", ix, svg[:100] if svg else svg)
+                        yield stream.pop()
+                    zip_file.writestr("metadata.json", json.dumps(metadata, indent=2, ensure_ascii=False))
+                yield stream.pop()
+
+            return Response(generate(), 200, mimetype="application/zip")
 
         @app.route('/setpreferred', methods=["GET"])
         def setpreferred():
@@ -1096,8 +845,8 @@ class AMR_Edit_Server:
                     "text": cursentence.text,
                     "comments": "\n".join(cursentence.comments), #"\n".join(ap.comments),
                     "sentid": cursentence.id,
-                    "undos": len(self.undos),
-                    "redos": len(self.redos),
+                    "undos": self.history.undos(sentnum),
+                    "redos": self.history.redos(sentnum),
                     "umr": self.umr}
             if self.umr:
                 dico["alignments"] = cursentence.alignments
@@ -1114,10 +863,10 @@ class AMR_Edit_Server:
 
             return Response("%s\n" % json.dumps(dico), 200, mimetype="application/json")
 
-        def invalidamr(ap, pm, cursentence, sentnum):
-            # format error in file
+        def formaterror(ap, html=False):
+            # message for a PENMAN which cannot be parsed, html: the erroneous part is marked (if the error is in the first line)
             text = ap.parsererror["text"]
-            if ap.parsererror["lineno"] == 1:
+            if html and ap.parsererror["lineno"] == 1:
                 pos = ap.parsererror["offset"]
                 endpos = text.find(" ", pos)
                 if endpos != -1:
@@ -1128,12 +877,14 @@ class AMR_Edit_Server:
                                                                     text[pos:pos + endpos],
                                                                     text[pos + endpos:]
                                                                     )
-            warnings = ["format error: %s in line %s:%s « %s », please correct file in a text editor first" %
-                        (ap.parsererror["message"],
-                         ap.parsererror["lineno"],
-                         ap.parsererror["offset"],
-                         text)
-                        ]
+            return "format error: %s in line %s:%s « %s », please correct file in a text editor first" % (ap.parsererror["message"],
+                                                                                                          ap.parsererror["lineno"],
+                                                                                                          ap.parsererror["offset"],
+                                                                                                          text)
+
+        def invalidamr(ap, pm, cursentence, sentnum):
+            # format error in file
+            warnings = [formaterror(ap, html=True)]
             dico = {"penman": pm,
                     "svg": "",
                     "svg_canon": "",
@@ -1146,13 +897,334 @@ class AMR_Edit_Server:
                     "text": cursentence.text,
                     "comments": "\n".join(cursentence.comments), #"\n".join(ap.comments),
                     "sentid": cursentence.id,
-                    "undos": len(self.undos),
-                    "redos": len(self.redos),
+                    "undos": self.history.undos(sentnum),
+                    "redos": self.history.redos(sentnum),
+                    "umr": self.umr}
+            if self.umr:
+                dico["alignments"] = cursentence.alignments
+                dico["alignments2"] = cursentence.getAlignments(cursentence.alignments)
+                dico["docgraph"] = cursentence.docgraph.docgraph
+
+                if cursentence.index:
+                    dico["index"] = cursentence.index
+                if cursentence.words:
+                    dico["words"] = cursentence.words
+                if cursentence.other:
+                    dico["glosses"] = cursentence.other
+                dico["metainfo"] = cursentence.meta
+
+            return Response("%s\n" % json.dumps(dico), 200, mimetype="application/json")
+
+        def parse_expand(expand):
+            # variables (comma separated) of collapsed instances which must be displayed with their neighbours
+            if not expand:
+                return None
+            return set(x.strip() for x in expand.split(",") if x.strip())
+
+        def prepare_edit(sentnum, prevmod, modpenman):
+            # checks common to /edit and /batchedit. Returns the AMRProcessor and the sentence to edit
+            # or a Response (and None) if the PENMAN of the sentence is invalid and the edit does not replace it
+            if sentnum < 1 or sentnum > len(self.amrdoc.sentences):
+                # creates an http status code 400
+                raise ServerException("invalid sentence number: must be between 1 and %d" % len(self.amrdoc.sentences))
+            ap = self.aps[sentnum]
+
+            if not ap.isparsed:
+                ap.readpenman(ap.lastpm)
+                ap.show()
+
+            cursentence = self.amrdoc.sentences[sentnum - 1]
+            if not ap.valid and not modpenman:
+                # an invalid PENMAN can only be corrected using modpenman
+                return invalidamr(ap, ap.lastpm, cursentence, sentnum), None
+
+            print("AP PREVMOD:", ap.previous_modification, "CLIENT:", prevmod, "TOO LATE", ap.previous_modification > prevmod)
+            if ap.previous_modification > prevmod:
+                raise ServerException("The sentence has been edit by another user. Please reload sentence")
+
+            return ap, cursentence
+
+        def setmodified(ap, cursentence):
+            ap.modified = True # TODO: set rather by ap.-functions ??
+            cursentence.date = time.strftime("%a %b %d, %Y %H:%M", time.localtime(time.time()))
+
+        def applyedit(ap, cursentence, sentnum, edit):
+            # apply an edit command (a dict with some of EDITPARAMS) to sentence sentnum
+            # returns the AMRProcessor of the sentence (modpenman and addgraph replace it), the list of warnings
+            # and the list of errors if the command is invalid (the AMRProcessor is then invalid if the new graph cannot be parsed)
+            print("COMMAND:", ", ".join('"%s": "%s"' % (k, v) for k, v in edit.items() if v is not None))
+            cmd = edit.get("cmd")
+            addconcept = edit.get("addconcept")
+            addname = edit.get("addname")
+            nameof = edit.get("nameof")
+            start = edit.get("start")
+            label = edit.get("label")
+            end = edit.get("end")
+            modconcept = edit.get("modconcept")
+            newconcept = edit.get("newconcept")
+            modedge_start = edit.get("modedge_start")
+            modedge_end = edit.get("modedge_end")
+            newedge = edit.get("newedge")
+            modedge_newstart = edit.get("modedge_newstart")
+            delinstance = edit.get("delinstance")
+            deledge_start = edit.get("deledge_start")
+            deledge_end = edit.get("deledge_end")
+            deledge = edit.get("deledge")
+            literalid = edit.get("literalid")
+            literaledge = edit.get("literaledge")
+            newliteral = edit.get("newliteral")
+            delliteral = edit.get("delliteral")
+            literalof = edit.get("literalof")
+            relationforliteral = edit.get("relationforliteral")
+            modpenman = edit.get("modpenman")
+            modcomment = edit.get("modcomment")
+            reify = edit.get("reify")
+            dereify = edit.get("dereify")
+            newtop = edit.get("newtop")
+            addgraph = edit.get("addgraph")
+            mappings = edit.get("mappings")
+            newvarname = edit.get("newvarname")
+            oldvarname = edit.get("oldvarname")
+            umrvar = edit.get("umrvar")
+            indexes = edit.get("indexes")
+            newalignment = edit.get("newalignment")
+            adddocgraph = edit.get("adddocgraph")
+            dg_subj = edit.get("dg_subj")
+            dg_obj = edit.get("dg_obj")
+            dg_pred = edit.get("dg_pred")
+            moddocgraph = edit.get("moddocgraph")
+            dgpos = edit.get("dgpos")
+            modindexes = edit.get("modindexes")
+
+            rtc = None
+            if cmd:
+                rtc = ap.process(cmd)
+            elif addconcept:
+                ap.process(addconcept)
+            elif addname and nameof:
+                var = ap.addconcept("name")
+                words = addname.split()
+                for i, w in enumerate(words):
+                    ap.addedge(var, '"%s"' % w, ":op%d" % (i + 1))
+                ap.addedge(nameof, var, "name")
+            elif start and end and label:
+                # add new edge between to nodes
+                if label == "todo":
+                    # "todo" is the default value given by index.js when clicking on to nodes
+                    # print("label", label, end=" ")
+                    label = self.edge_predictor.predict(ap.vars.get(start), ap.vars.get(end))
+                    # print("->", label)
+                rtc = ap.addedge(start, end, label)
+            elif modconcept and newconcept:
+                ap.modconcept(modconcept, newconcept)
+            elif modedge_start and modedge_end and newedge:
+                if modedge_newstart:
+                    rtc = ap.moveedge(modedge_start, modedge_end, newedge, modedge_newstart)
+                else:
+                    ap.modedge(modedge_start, modedge_end, newedge)
+            elif delinstance:
+                ap.delinstance(delinstance)
+            elif deledge_start and deledge_end and deledge:
+                ap.deledge(deledge_start, deledge_end, deledge)
+            elif literalid and literaledge and newliteral:
+                ap.modliteral(literalid, literaledge, newliteral)
+            elif literalid and literaledge and delliteral:
+                rtc = ap.delliteral(literalid, literaledge, delliteral)
+            elif literalof and relationforliteral and newliteral:
+                rtc = ap.addliteral(literalof, relationforliteral, newliteral) #, isattribute)
+            elif modpenman:
+                newap = amreditor.AMRProcessor()
+                newap.readpenman(modpenman)
+                newap.previous_modification = ap.previous_modification
+                if not newap.valid:
+                    return newap, [], [formaterror(newap)]
+                else:
+                    newap.canonicalize() # to create penman
+                    self.aps[sentnum] = newap
+                    ap = newap
+                    ap.modified = True # set rather by ap.-functions ??
+            elif modcomment is not None:
+                cursentence.modcomment(modcomment)
+                #ap.comments = cursentence.comments[:]
+            elif newtop:
+                rtc = ap.settop(newtop)
+            elif reify:
+                #print(ap.lastpm)
+                ap.canonicalize() # the reificator uses ap.lastpm, which /batchedit does not update between commands
+                ap.reify(reify)
+            elif dereify:
+                ap.canonicalize()
+                rtc = ap.dereify(dereify)
+            elif oldvarname and newvarname:
+                rtc = ap.renamevar(oldvarname, newvarname)
+            elif addgraph:
+                if not mappings or not mappings.strip():
+                    raise ServerException("Missing variable mappings. use 'v1/v2 ...'")
+                corefs = []
+                if mappings:
+                    for elems in mappings.split():
+                        mapping = elems.split("/")
+                        if len(mapping) != 2:
+                            raise ServerException("Bad format for mappings. use 'a/b ...': %s" % elems)
+                        corefs.append((mapping[0], mapping[1]))
+
+                newap = amreditor.AMRProcessor()
+                ap.canonicalize()
+                try:
+                    pm = joingraphs.joingraphs(ap.lastpm, addgraph, corefs, top=None)
+                    newap.readpenman(pm)
+                    newap.previous_modification = ap.previous_modification
+                except Exception as e:
+                    raise ServerException("Cannot join graphs: %s" % e)
+                if not newap.valid:
+                    return newap, [], [formaterror(newap)]
+                else:
+                    newap.canonicalize() # to create penman
+                    self.aps[sentnum] = newap
+                    ap = newap
+                    ap.modified = True # set rather by ap.-functions ??
+            elif modindexes:
+                if self.umr:
+                    jobj = json.loads(modindexes)
+                    for key in jobj:
+                        #print("KKK", key, jobj[key])
+                        if key == "index":
+                            cursentence.index = [int(x) for x in jobj[key].split()]
+                        elif key == "words":
+                            cursentence.words = jobj[key].split()
+                        elif key.startswith("gloss_"):
+                            val = int(key[6:])
+                            cursentence.other[val] = (umrdoc.TOKLINESNUM[val], jobj[key].split())
+
+            elif adddocgraph:
+                # add a triple to UMR document level annotation
+                if dg_subj and dg_obj and dg_pred:
+                    msg = cursentence.docgraph.add(adddocgraph, dg_subj, dg_pred, dg_obj, ap.vars)
+                    ap.docgraph = cursentence.docgraph.getcopy()
+                    if msg is not None:
+                        return ap, [], msg if isinstance(msg, list) else [msg]
+                else:
+                    return ap, [], ["invalid document graph triple for %s «%s, %s, %s»" % (adddocgraph, dg_subj, dg_pred, dg_obj)]
+            elif moddocgraph and dgpos is not None:
+                # modify/delete a triple to UMR document level annotation
+                if dg_subj and dg_obj and dg_pred:
+                    msg = cursentence.docgraph.modify(moddocgraph, dgpos, dg_subj, dg_pred, dg_obj, ap.vars)
+                    ap.docgraph = cursentence.docgraph.getcopy()
+
+                    if msg is not None:
+                        return ap, [], msg if isinstance(msg, list) else [msg]
+                else:
+                    # delete a triple
+                    cursentence.docgraph.delete(moddocgraph, dgpos)
+                    ap.docgraph = cursentence.docgraph.getcopy()
+            elif umrvar is not None: # can be an empty string if no unaligned variable exists (H)
+                # modify a UMR alignment
+                if not self.umr:
+                    raise ServerException("Not in UMR mode")
+
+                def check_word_pos(line):
+                    newindexes = []
+                    for e in line.strip().split(","):
+                        mo = umrdoc.ALIGNMENT.match(e.strip())
+                        if not mo:
+                            return ["alignments string invalid «%s»" % indexes]
+
+                        als = int(mo.group(1))
+                        ale = int(mo.group(2))
+
+                        if als > ale:
+                            return ["alignment start %s must be <= alignment end %s" % (als, ale)]
+                        if (als <= 0 and ale > 0) \
+                           or (ale <= 0 and als > 0):
+                            return ["alignment start %s and alignment end %s must be both 0 or -1 or both different" % (als, ale)]
+                        if cursentence.index and als > cursentence.index[-1]:
+                            return ["alignment start %s is beyond last word" % (als)]
+                        if cursentence.index and ale > cursentence.index[-1]:
+                            return ["alignment end %s is beyond last word" % (ale)]
+                        newindexes.append((als,ale))
+                    cursentence.alignments[umrvar] = newindexes
+                    ap.alignments = cursentence.getcopy()
+
+                if newalignment:
+                    if umrvar == "":
+                        return ap, [], ["no unaligned variable available"]
+                    errors = check_word_pos(newalignment)
+                    if errors:
+                        return ap, [], errors
+                elif indexes:
+                    errors = check_word_pos(indexes)
+                    if errors:
+                        return ap, [], errors
+                else:
+                    del cursentence.alignments[umrvar]
+                    ap.alignments = cursentence.getcopy()
+            else:
+                # creates an http status code 400
+                raise ServerException("No edit valid operation given")
+
+            if isinstance(rtc, list):
+                return ap, rtc, []
+            elif isinstance(rtc, str):
+                return ap, [rtc], []
+            return ap, [], []
+
+        def editresponse(ap, cursentence, sentnum, warnings, reverse_of=False, withalignments=False, expand=None):
+            # render and validate the sentence once all edit commands have been applied
+            tokenalignments = None
+            if self.umr and withalignments:
+                tokenalignments = (cursentence.words, cursentence.getAlignments(), len(cursentence.ralignments) > 0)
+            pm, svg = ap.show(tokenalignments=tokenalignments, reverse_of=reverse_of, lean=self.leansvg,
+                              maxnodes=self.collapse, expanded=parse_expand(expand))
+
+            framedoc = None
+            framedocs = self.pbframes.getdoc(ap.triples)
+            if len(framedocs):
+                framedoc = "\n".join(framedocs)
+
+            reldoc = None
+            if self.relationsdoc:
+                docs = self.relationsdoc.getdoc(ap.triples)
+                if len(docs):
+                    reldoc = docs
+
+            warnings = warnings + ap.validate(validators=[self.amr_rels, self.amr_concepts, self.pbframes, self.constraints])
+            if len(warnings) < 1:
+                warnings = None
+            lastchanged = cursentence.date
+            if not lastchanged:
+                lastchanged = cursentence.savedateorig
+            ap.previous_modification += 1
+            print("AUGMENT", cursentence.id, ap.previous_modification)
+            # TODO: we create this dico in 4 different places. Not optimal
+            dico = {"warning": warnings,
+                    "framedoc": framedoc,
+                    "reldoc": reldoc,
+                    "readonly": self.readonly,
+                    "penman": pm,
+                    #"svg": svg.decode("utf8") if svg else "",
+                    "svg": svg if svg else "",
+                    #"svg_canon": svg_canon.decode("utf8") if svg_canon else "",
+                    #"svg_canon": svg_canon if svg_canon else "",
+                    "filename": filename, "numsent": len(self.amrdoc.sentences),
+                    "num": sentnum,
+                    "text": cursentence.text,
+                    "comments": "\n".join(cursentence.comments), #"\n".join(ap.comments),
+                    "sentid": cursentence.id,
+                    "lastchanged": lastchanged,
+                    "variables": sorted(list(set(ap.vars.keys()))),
+                    "undos": self.history.undos(sentnum),
+                    "redos": self.history.redos(sentnum),
+                    "prevmod": ap.previous_modification,
+                    "leansvg": self.leansvg,
+                    "degraded": ap.degraded,
                     "umr": self.umr}
             if self.umr:
                 dico["alignments"] = cursentence.alignments
                 dico["alignments2"] = cursentence.getAlignments(cursentence.alignments)
                 dico["docgraph"] = cursentence.docgraph.docgraph
+                #dico["alignments"] = ap.alignments #cursentence.alignments
+                #dico["alignments2"] = cursentence.getAlignments(ap.alignments)
+                #dico["docgraph"] = ap.docgraph # cursentence.docgraph.docgraph
 
                 if cursentence.index:
                     dico["index"] = cursentence.index
@@ -1164,25 +1236,22 @@ class AMR_Edit_Server:
 
             return Response("%s\n" % json.dumps(dico), 200, mimetype="application/json")
 
-        def prepare_newpage(sentnum, oktext=None, okamr=None, compare=None, reverse_of=False, withalignments=False):
+        def prepare_newpage(sentnum, oktext=None, okamr=None, compare=None, reverse_of=False, withalignments=False, expand=None):
             # sentnum uses 1 ... length
             # self.amrdoc.sentences is a list: 0 length-1
             cursentence = self.amrdoc.sentences[sentnum - 1]
-            if sentnum not in self.aps:
-                ap = amreditor.AMRProcessor()
-                self.aps[sentnum] = ap
+            ap = self.aps[sentnum]
+            if not ap.isparsed:
                 ap.readpenman(cursentence.amr)
 
-            else:
-                ap = self.aps[sentnum]
-                if not ap.isparsed:
-                    ap.readpenman(cursentence.amr)
-
             tokenalignments = None
             if self.umr and withalignments:
                 tokenalignments = (cursentence.words, cursentence.getAlignments(), len(cursentence.ralignments) > 0)
             #pm, svg, svg_canon = ap.show(tokenalignments=tokenalignments, reverse_of=reverse_of)
-            pm, svg = ap.show(tokenalignments=tokenalignments, reverse_of=reverse_of)
+            # in compare mode the graphs are displayed by compare.js which does not use lean SVG
+            lean = self.leansvg and not self.otheramrdocs
+            pm, svg = ap.show(tokenalignments=tokenalignments, reverse_of=reverse_of, lean=lean,
+                              maxnodes=self.collapse, expanded=parse_expand(expand))
             if not ap.valid:
                 return invalidamr(ap, pm, cursentence, sentnum)
 
@@ -1203,10 +1272,10 @@ class AMR_Edit_Server:
                 for mo in reversed(list(oktext)):
                     sentencetext = sentencetext[:mo.start()] + '<span class="highlight">%s</span>' % sentencetext[mo.start():mo.end()] + sentencetext[mo.end():]
 
-            validationfunctions = [self.amr_rels.validate, self.pbframes.validate, self.constraints.validate]
+            validationfunctions = []
             if self.umr:
                 validationfunctions.append(cursentence.validate)
-            warnings = ap.validate(valfuncs=validationfunctions)
+            warnings = ap.validate(valfuncs=validationfunctions, validators=[self.amr_rels, self.pbframes, self.constraints])
 
             if len(warnings) < 1:
                 warnings = None
@@ -1241,9 +1310,11 @@ class AMR_Edit_Server:
                     "sentid": cursentence.id,
                     "lastchanged": lastchanged,
                     "variables": sorted(list(set(ap.vars.keys()))),
-                    "undos": len(self.undos),
-                    "redos": len(self.redos),
+                    "undos": self.history.undos(sentnum),
+                    "redos": self.history.redos(sentnum),
                     "prevmod": ap.previous_modification,
+                    "leansvg": lean,
+                    "degraded": ap.degraded,
                     "umr": self.umr}
             if self.umr:
                 dico["alignments"] = cursentence.alignments
@@ -1297,31 +1368,33 @@ class AMR_Edit_Server:
                                             "sys_triples": compres2.test_triple_num,
                                             "best_match_triples": compres2.best_match_num})
 
+                jobs = [] # (AMRProcessor, arguments for show())
                 if first_to_compare == -1:
                     # update display of first document
                     # highlight instances and relations NOT in highlightinstances and highlightrelations
-                    cpm, csvg = ap.show(highlightinstances=compres.instances1OK, highlightrelations=compres.rel1OK, reverse_of=reverse_of)
-                    dico["svg"] = csvg #.decode("utf8")
+                    jobs.append((ap, {"highlightinstances": compres.instances1OK, "highlightrelations": compres.rel1OK, "reverse_of": reverse_of}))
 
                 for ix, (doc, aps) in enumerate(self.otheramrdocs):
                     ccursentence = doc.sentences[sentnum - 1]
-                    if sentnum not in aps:
-                        cap = amreditor.AMRProcessor()
-                        aps[sentnum] = cap
+                    cap = aps[sentnum]
+                    if not cap.isparsed:
                         cap.readpenman(ccursentence.amr)
-                    else:
-                        cap = aps[sentnum]
-                        if not cap.isparsed:
-                            cap.readpenman(ccursentence.amr)
 
                     # show differences of chosen pair
                     if ix == first_to_compare:
-                        cpm, csvg = cap.show(highlightinstances=compres.instances1OK, highlightrelations=compres.rel1OK, reverse_of=reverse_of)
+                        jobs.append((cap, {"highlightinstances": compres.instances1OK, "highlightrelations": compres.rel1OK, "reverse_of": reverse_of}))
                     elif ix == second_to_compare:
-                        cpm, csvg = cap.show(highlightinstances=compres.instances2OK, highlightrelations=compres.rel2OK, reverse_of=reverse_of)
+                        jobs.append((cap, {"highlightinstances": compres.instances2OK, "highlightrelations": compres.rel2OK, "reverse_of": reverse_of}))
                     else:
-                        cpm, csvg = cap.show(reverse_of=reverse_of)
+                        jobs.append((cap, {"reverse_of": reverse_of}))
 
+                # all graphs are rendered at the same time
+                results = list(self.renderexecutor.map(lambda job: job[0].show(**job[1]), jobs))
+                if first_to_compare == -1:
+                    cpm, csvg = results.pop(0)
+                    dico["svg"] = csvg #.decode("utf8")
+
+                for (doc, aps), (cpm, csvg) in zip(self.otheramrdocs, results):
                     dico2 = {}
                     dico2["filename"] = doc.fn
                     dico2["svg"] = csvg #.decode("utf8")
@@ -1340,8 +1413,108 @@ class AMR_Edit_Server:
                 else:
                     dico["preferred"] = None
 
+            if self.prefetch:
+                # render the neighbouring sentences in the background
+                self.prefetchqueue.put((sentnum, reverse_of, withalignments))
             return Response("%s\n" % json.dumps(dico), 200, mimetype="application/json")
 
+        self.timings.done("flask")
+        if timings:
+            self.timings.write(timings, "metamorphosed")
+
+    def sentencestate(self, sentnum):
+        # all which can be modified in a sentence, for the undo/redo history
+        cursentence = self.amrdoc.sentences[sentnum - 1]
+        state = self.aps[sentnum].snapshot()
+        state["comments"] = tuple(cursentence.comments)
+        if self.umr:
+            # alignments and document graph rarely change, reuse those of the last state
+            # in the history if they are equal, instead of copying them at every edit
+            previous = self.history.top(self.history.undostacks, sentnum) or self.history.top(self.history.redostacks, sentnum) or {}
+            if "alignments" in previous and previous["alignments"] == cursentence.alignments:
+                state["alignments"] = previous["alignments"]
+            else:
+                state["alignments"] = cursentence.getcopy()
+            if "docgraph" in previous and previous["docgraph"] == cursentence.docgraph.docgraph:
+                state["docgraph"] = previous["docgraph"]
+            else:
+                state["docgraph"] = cursentence.docgraph.getcopy()
+        return state
+
+    def restorestate(self, sentnum, state):
+        # states may share parts with other states in the history, so we only restore copies
+        cursentence = self.amrdoc.sentences[sentnum - 1]
+        self.aps[sentnum].restore(state)
+        cursentence.comments = list(state["comments"])
+        if self.umr:
+            cursentence.alignments = copy.deepcopy(state["alignments"])
+            cursentence.docgraph.docgraph = copy.deepcopy(state["docgraph"])
+
+    def prewarm(self):
+        # render all graphs (as /read does by default) with a low priority to fill the disk cache
+        try:
+            # only this thread (and dot processes started by it) on Linux
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except Exception:
+            pass
+        if self.umr:
+            sentences = umrdoc.iter_sentences(self.filename, docgraphrel=None)
+        else:
+            sentences = amrdoc.iter_sentences(self.filename)
+        for cursentence in sentences:
+            ap = amreditor.AMRProcessor()
+            ap.userendercache = False # do not replace the graphs which have been displayed
+            if self.umr:
+                ap.umr_varprefix = cursentence.varprefix
+            try:
+                ap.readpenman(cursentence.amr)
+                if ap.valid:
+                    ap.show(lean=self.leansvg, maxnodes=self.collapse)
+            except Exception as e:
+                print("cannot prerender %s: %s" % (cursentence.id, e), file=sys.stderr)
+            self.prewarmed += 1
+            time.sleep(0.01)
+        print("%d graphs prerendered" % self.prewarmed, file=sys.stderr)
+
+    def prefetcher(self):
+        # render the sentences around the last displayed one, so that the render cache
+        # already contains them when the user clicks on next or preceding
+        while True:
+            sentnum, reverse_of, withalignments = self.prefetchqueue.get()
+            # only the last displayed sentence is interesting
+            while not self.prefetchqueue.empty():
+                sentnum, reverse_of, withalignments = self.prefetchqueue.get()
+            for dist in range(1, self.prefetch + 1):
+                for neighbour in sentnum + dist, sentnum - dist:
+                    if not self.prefetchqueue.empty():
+                        # another sentence has been displayed in the meantime
+                        break
+                    if neighbour in self.aps:
+                        self.prerender(neighbour, reverse_of, withalignments)
+
+    def prerender(self, sentnum, reverse_of=False, withalignments=False):
+        # render a sentence with a new AMRProcessor to fill the render cache
+        # (the processor used by the editor is not touched)
+        cursentence = self.amrdoc.sentences[sentnum - 1]
+        ap = self.aps.peek(sentnum)
+        if ap is not None:
+            pm = ap.lastpm
+        else:
+            pm = cursentence.amr
+        tokenalignments = None
+        if self.umr and withalignments:
+            tokenalignments = (cursentence.words, cursentence.getAlignments(), len(cursentence.ralignments) > 0)
+        pap = amreditor.AMRProcessor()
+        if self.umr:
+            pap.umr_varprefix = cursentence.varprefix
+        try:
+            pap.readpenman(pm)
+            if pap.valid:
+                pap.show(tokenalignments=tokenalignments, reverse_of=reverse_of, lean=self.leansvg and not self.otheramrdocs, maxnodes=self.collapse)
+                self.prefetched += 1
+        except Exception as e:
+            print("cannot prerender sentence %d: %s" % (sentnum, e), file=sys.stderr)
+
     def start(self):
         self.app.run(host="0.0.0.0", port=self.port) #, threaded=False, processes=4)
         self.save()
@@ -1429,7 +1602,7 @@ class AMR_Edit_Server:
 
     def writedoc(self, ofp):
         for i, sent in enumerate(self.amrdoc.sentences):
-            if i + 1 in self.aps:
+            if self.aps.isloaded(i + 1):
                 if self.aps[i + 1].modified:
                     self.modified.append(str(i + 1))
                     sent.date = time.strftime("%a %b %d, %Y %H:%M", time.localtime(time.time()))
@@ -49,6 +49,7 @@ from metamorphosed.exception import ServerException
 #from exception import ServerException
 
 ONESPACE = re.compile("[ \n\t]+")
+SAVEDATE = re.compile(r"# ::save-date (\w+) (\w+) (\d+), (\d+) (.*)")
 
 
 class AMRsentence:
@@ -196,104 +197,130 @@ class AMRsentence:
 #        return False
 
 
+def iter_sentences(fn):
+    # read an AMR file and yield one AMRsentence after the other
+    # fn is a filename or an opened file (or sys.stdin etc)
+    if isinstance(fn, str):
+        with open(fn) as ifp:
+            yield from iter_sentences(ifp)
+        return
+
+    amrblock = []
+    sentid = None
+    idrest = None # after the id in the ::id line
+    text = None
+    tokens = None
+    savedateorig = None
+    date = None
+    savedaterest = ""
+    comments = []
+
+    def makesentence():
+        asent = AMRsentence("\n".join(amrblock))
+        asent.id = sentid
+        asent.idrest = idrest
+        asent.text = text
+        asent.tokens = tokens
+        asent.savedateorig = savedateorig
+        asent.date = date
+        asent.savedaterest = savedaterest
+        asent.comments = comments
+        return asent
+
+    for line in fn:
+        line = line.rstrip()
+        #print("LL <%s>" % line)
+        if not line:
+            if amrblock:
+                yield makesentence()
+                sentid = None
+                idrest = None
+                text = None
+                tokens = None
+                savedateorig = None
+                date = None
+                savedaterest = ""
+
+                amrblock = []
+                comments = []
+        elif line.startswith("# ::id "):
+            elems = line[7:].split("::")
+            #sentid = line[7:]
+            sentid = elems[0].strip()
+            if len(elems) > 1:
+                idrest = elems[1:]
+            #print("AAAA", sentid, idrest)
+        elif line.startswith("# ::wikidata "):
+            if not sentid:
+                sentid = line[13:]
+        elif line.startswith("# ::snt "):
+            text = line[8:]
+        elif line.startswith("# ::tok "):
+            tokens = line[8:].split()
+        elif line.startswith("# ::save-date "):
+            # parse save-date line to avoid deleting other information
+            mo = SAVEDATE.match(line)
+            if mo:
+                date = "%s %s %s, %s" % (mo.group(1), mo.group(2), mo.group(3), mo.group(4))
+                savedaterest = mo.group(5)
+            savedateorig = line[14:]
+        elif line.startswith("#"):
+            comments.append(line[1:].strip())
+        else:
+            amrblock.append(line)
+
+    if amrblock:
+        # we pass here only if there is no final empty line in the amr file
+        yield makesentence()
+
+
+def validatesentence(sent, validators, addids=False):
+    msgs = []
+    for v in validators:
+        ee = v.validate(sent.tsv())
+        if ee:
+            if addids:
+                for m in ee:
+                    msgs.append((sent.id, m))
+            else:
+                msgs += ee
+        #for e in ee:
+        #    print("ZZZ", e)
+    try:
+        ddd = penman.parse(sent.amr.replace("\n", "")) # penman needs \n replaced to detect quote errors
+        #print("eee",ddd)
+    except Exception as e:
+        if addids:
+            msgs.append((sent.id, str(e)))
+        else:
+            msgs.append(str(e))
+    return msgs
+
+
 class AMRdoc:
     def __init__(self, fn, verbose=True, rename_duplicate_ids=False):
         self.sentences = []
         self.ids = {} # id: sentence
         self.fn = fn
 
-        if isinstance(fn, str):
-            ifp = open(fn)
-        else:
-            # here fn is a opened file or sys.stdin etc
-            ifp = fn
-
-        amrblock = []
-        sentid = None
-        idrest = None # after the id in the ::id line
-        text = None
-        tokens = None
-        savedateorig = None
-        date = None
-        savedaterest = ""
-        savedateRE = re.compile(r"# ::save-date (\w+) (\w+) (\d+), (\d+) (.*)")
-        comments = []
         duplicated = {} # id: number
-        for line in ifp:
-            line = line.rstrip()
-            #print("LL <%s>" % line)
-            if not line:
-                if amrblock:
-                    asent = AMRsentence("\n".join(amrblock))
-                    asent.id = sentid
-                    asent.idrest = idrest
-                    asent.text = text
-                    asent.tokens = tokens
-                    asent.savedateorig = savedateorig
-                    asent.date = date
-                    asent.savedaterest = savedaterest
-                    asent.comments = comments
-                    sentid = None
-                    idrest = None
-                    text = None
-                    tokens = None
-                    savedateorig = None
-                    date = None
-                    savedaterest = ""
-
-                    amrblock = []
-                    comments = []
-                    self.sentences.append(asent)
-                    newid = asent.id # we do not want to overwrite an ID, event if it's a duplicate
-                    if asent.id is not None and asent.id in self.ids:
-                        if asent.id not in duplicated:
-                            duplicated[asent.id] = 1
-                        else:
-                            duplicated[asent.id] += 1
-                        if verbose:
-                            print("*** duplicate sentence id <%s> renamed to <%s-%d>" % (asent.id, asent.id, duplicated[asent.id]), file=sys.stderr)
-                        #print("     ", asent.comments, file=sys.stderr)
-                        newid = "%s-%d" % (asent.id, duplicated[asent.id])
-
-                        if rename_duplicate_ids:
-                            asent.id = "%s-%d" % (asent.id, duplicated[asent.id])
-
-                    self.ids[newid] = asent
-            elif line.startswith("# ::id "):
-                elems = line[7:].split("::")
-                #sentid = line[7:]
-                sentid = elems[0].strip()
-                if len(elems) > 1:
-                    idrest = elems[1:]
-                #print("AAAA", sentid, idrest)
-            elif line.startswith("# ::wikidata "):
-                if not sentid:
-                    sentid = line[13:]
-            elif line.startswith("# ::snt "):
-                text = line[8:]
-            elif line.startswith("# ::tok "):
-                tokens = line[8:].split()
-            elif line.startswith("# ::save-date "):
-                # parse save-date line to avoid deleting other information
-                mo = savedateRE.match(line)
-                if mo:
-                    date = "%s %s %s, %s" % (mo.group(1), mo.group(2), mo.group(3), mo.group(4))
-                    savedaterest = mo.group(5)
-                savedateorig = line[14:]
-            elif line.startswith("#"):
-                comments.append(line[1:].strip())
-            else:
-                amrblock.append(line)
-
-        if amrblock:
-            # we pass here only if there is no final empty line in the amr file
-            asent = AMRsentence("\n".join(amrblock))
-            asent.id = sentid
-            asent.text = text
-            asent.tokens = tokens
-            asent.comments = comments
+        for asent in iter_sentences(fn):
             self.sentences.append(asent)
-            self.ids[sentid] = asent
+            newid = asent.id # we do not want to overwrite an ID, event if it's a duplicate
+            if asent.id is not None and asent.id in self.ids:
+                if asent.id not in duplicated:
+                    duplicated[asent.id] = 1
+                else:
+                    duplicated[asent.id] += 1
+                if verbose:
+                    print("*** duplicate sentence id <%s> renamed to <%s-%d>" % (asent.id, asent.id, duplicated[asent.id]), file=sys.stderr)
+                #print("     ", asent.comments, file=sys.stderr)
+                newid = "%s-%d" % (asent.id, duplicated[asent.id])
+
+                if rename_duplicate_ids:
+                    asent.id = "%s-%d" % (asent.id, duplicated[asent.id])
+
+            self.ids[newid] = asent
         if verbose:
             fnn = fn
             if not isinstance(fn, str):
@@ -317,24 +344,7 @@ class AMRdoc:
     def validate(self, validators, addids=False):
         msgs = []
         for sent in self.sentences:
-            for v in validators:
-                ee = v.validate(sent.tsv())
-                if ee:
-                    if addids:
-                        for m in ee:
-                            msgs.append((sent.id, m))
-                    else:
-                        msgs += ee
-                #for e in ee:
-                #    print("ZZZ", e)
-            try:
-                ddd = penman.parse(sent.amr.replace("\n", "")) # penman needs \n replaced to detect quote errors
-                #print("eee",ddd)
-            except Exception as e:
-                if addids:
-                    msgs.append(sent.id, str(e))
-                else:
-                    msgs.append(str(e))
+            msgs += validatesentence(sent, validators, addids)
         return msgs
 
     def getsentencelist(self):
@@ -343,6 +353,12 @@ class AMRdoc:
             sents.append((sent.id, sent.text))
         return sents
 
+    def findid(self, pos, regex):
+        return self.sentences[pos].findid(regex)
+
+    def findtext(self, pos, regex):
+        return self.sentences[pos].findtext(regex)
+
 
 #    def writedoc(self, ofp):
 #        for i, sent in enumerate(self.sentences):
@@ -574,6 +590,12 @@ def main():
         ads = []
 
         for fn in args.file:
+            if not args.stats and args.concepts == 0:
+                # validation only, no need to keep the whole file in memory
+                for sent in iter_sentences(fn):
+                    for m in validatesentence(sent, validators):
+                        print("Problem:", m)
+                continue
             ad = AMRdoc(fn)
             msg = ad.validate(validators)
             for m in msg:
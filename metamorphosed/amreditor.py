@@ -35,17 +35,23 @@
 
 # version 5.0.0rc11 as of 4th January 2026
 
+import collections
+import functools
 import io
 import re
 import readline
+import subprocess
 import sys
 
 import penman
+import graphviz
 from graphviz import Digraph
 
-import metamorphosed.graph as graph
+from metamorphosed.triplestore import TripleStore
+from metamorphosed.validation import TripleValidation
 from metamorphosed.reification import getInstance
 import metamorphosed.amr_comparison as amr_comparison
+from metamorphosed.render_cache import freeze
 
 from metamorphosed.AMR_relations import orangecolors as orangecolors
 
@@ -107,37 +113,184 @@ colorlist = [
     ]
 
 ONESPACE = re.compile("[ \n\t]+")
+SVGSTART = re.compile(rb"<\?xml ")
+SVGCOMMENTS = re.compile(r"<\?xml .*?\?>|<!DOCTYPE .*?>|<!--.*?-->", re.S)
+SVGSPACES = re.compile(r">\s+<")
 
 PENMAN_INDENT = 3 # default: -1
 
 
+def addtokenids(svg):
+    newlines = []
+    intokens = False
+    ct = 1
+    # graphviz does not allowto add ids to elements in a structure
+    # so we add them here to make clicks onto them exploitable in index.js:info(). Not perfect. But the alternative D3.js is too ugly
+    for line in svg:
+        line = line.strip()
+        if line == "<title>tokens</title>":
+            intokens = True
+        elif line == "</g>":
+            intokens = False
+        elif intokens:
+            if line.startswith("<polygon "):
+                line = line.replace('<polygon ', '<polygon id="tokenwordbox_%d" ' % ct)
+            elif line.startswith("<text "):
+                line = line.replace('<text ', '<text class="wordpos" id="tokenwordtext_%d" ' % ct)
+                ct += 1
+        newlines.append(line)
+    return "\n".join(newlines)
+
+
+def minifysvg(svg):
+    # remove XML declaration, comments and whitespace between elements
+    return SVGSPACES.sub("><", SVGCOMMENTS.sub("", svg)).strip()
+
+
+@functools.lru_cache(maxsize=10000)
+def conceptdoc(pbframes, concept):
+    # PropBank documentation of a concept (tooltip of the instance nodes)
+    argdoc = pbframes.getargdoc(concept)
+    lines = []
+    if argdoc:
+        lines.append("%s: %s" % (concept, argdoc["descr"]))
+        for r in sorted(argdoc["roles"], key=lambda x: x["n"]):
+            vn = ""
+            if r["vn"]:
+                vn = " (%s)" % ", ".join(r["vn"])
+            lines.append(" - %s %s%s" % (r["n"], r["descr"], vn))
+    return "\n".join(lines)
+
+
+def rundot(graph, timeout=None):
+    # same as graph.pipe(), but dot is killed if it runs longer than timeout seconds (raises subprocess.TimeoutExpired)
+    if not timeout:
+        return graph.pipe()
+    proc = subprocess.run([graph.engine, "-T%s" % graph.format], input=graph.source.encode("utf8"),
+                          capture_output=True, timeout=timeout, check=True)
+    return proc.stdout
+
+
+def notrendered(format, timeout):
+    # replaces a graph which could not be rendered within the time budget
+    if format != "svg":
+        return b""
+    return ('<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n'
+            '<svg width="400pt" height="30pt" viewBox="0 0 400 30" xmlns="http://www.w3.org/2000/svg">\n'
+            '<text x="5" y="20" font-family="Lato" font-size="14">graph not rendered within %s seconds</text>\n'
+            '</svg>\n' % timeout).encode("utf8")
+
+
+def pipemany(graphs, timeout=None):
+    # render several Digraphs in SVG with a single dot process
+    # returns None if dot fails or runs longer than timeout seconds per graph
+    try:
+        if len(graphs) == 1:
+            return [rundot(graphs[0], timeout)]
+        source = "".join(g.source for g in graphs)
+        if timeout:
+            output = rundot(graphviz.Source(source, format="svg"), timeout * len(graphs))
+        else:
+            output = graphviz.pipe("dot", "svg", source.encode("utf8"))
+        # every SVG starts with an XML declaration
+        starts = [mo.start() for mo in SVGSTART.finditer(output)]
+        if len(starts) == len(graphs):
+            return [output[b:e] for b, e in zip(starts, starts[1:] + [len(output)])]
+        print("dot returned %d instead of %d graphs" % (len(starts), len(graphs)), file=sys.stderr)
+    except subprocess.TimeoutExpired:
+        print("dot did not render %d graphs within %s seconds" % (len(graphs), timeout * len(graphs)), file=sys.stderr)
+    except Exception as e:
+        print("dot error: %s" % e, file=sys.stderr)
+    return None
+
+
+def showmany(jobs, batchsize=50):
+    # jobs: [(AMRProcessor, kwargs for show()), ...]
+    # returns the same as [ap.show(**kwargs) for ap, kwargs in jobs], but the SVG graphs which are not
+    # in a cache are rendered by a single dot process for up to batchsize graphs
+    results = [None] * len(jobs)
+    todo = [] # (position in jobs, ap, arguments for dot(), rendercache key, diskcache key)
+    for ix, (ap, kwargs) in enumerate(jobs):
+        if batchsize <= 1 or not ap.inserver or not ap.valid or kwargs.get("format", "svg") != "svg":
+            results[ix] = ap.show(**kwargs)
+            continue
+        diskkey = ap.diskcachekey(**kwargs)
+        cached = ap.fromdiskcache(diskkey)
+        if cached is not None:
+            results[ix] = cached
+            continue
+        dotargs = ap.layout(**kwargs)
+        ap.degraded = False
+        cachekey = ap.dotkey(**dotargs)
+        if cachekey is not None:
+            rendered = AMRProcessor.rendercache.get(cachekey)
+            if rendered is not None:
+                results[ix] = ap.finishshow(rendered, "svg", diskkey, dotargs.get("lean", False))
+                continue
+        todo.append((ix, ap, kwargs, dotargs, cachekey, diskkey))
+
+    for b in range(0, len(todo), batchsize):
+        batch = todo[b:b + batchsize]
+        renderedlist = pipemany([ap.digraph(**dotargs) for _, ap, _, dotargs, _, _ in batch], AMRProcessor.rendertimeout)
+        if renderedlist is None:
+            # render one graph after the other, show() uses a simplified graph for graphs which are too slow
+            for ix, ap, kwargs, _, _, _ in batch:
+                results[ix] = ap.show(**kwargs)
+            continue
+        for (ix, ap, _, dotargs, cachekey, diskkey), rendered in zip(batch, renderedlist):
+            if cachekey is not None:
+                AMRProcessor.rendercache.put(cachekey, rendered)
+            results[ix] = ap.finishshow(rendered, "svg", diskkey, dotargs.get("lean", False))
+    return results
+
+
 class AMRProcessor:
     pbframes = None
+    rendercache = None # RenderCache for graphs rendered by dot()
+    diskcache = None # DiskRenderCache for SVG graphs returned by show()
+    rendertimeout = None # max seconds for a dot process in dot(), a simplified graph is rendered if it takes longer
+    timeouts = 0 # number of dot processes killed because of rendertimeout
+    degradedgraphs = 0 # number of simplified graphs rendered because of rendertimeout
 
     def __init__(self, inserver=True):
-        self.triples = []
+        self.triples = TripleStore()
         self.umr_varprefix = None # if not None, we deal with UMR graphs which have the sentence number as variable prefix
         self.top = None
         self.vars = {} # var: concept
         self.varletters = {} # first letter (after umr-prefix): set()
         self.inserver = inserver # we are in an server instance
-        self.isDisconnected = False
         self.isNumber = re.compile(r"^[+-]?\d*\.?\d+$")
         self.isValidVar = re.compile(r"^[a-z][A-Za-z0-9_]*$")
         self.lastpm = None
         self.valid = True
         self.isparsed = False
         self.modified = False
+        self.version = 0 # incremented by every modification of self.triples or self.top
+        self.canonicalversion = None # self.version of the triples encoded as self.lastpm by canonicalize()
+        self.encodable = True # False: the triples could not be encoded as a single PENMAN graph by canonicalize()
+        self.triplevalidation = TripleValidation() # messages of validators for every triple
+        self.lastvalidation = None # (key, messages of validators, messages of checkstructure()) of the last validate()
+        self.d3graph = None # (self.version, D3 graph, PENMAN) of the last /js request
+        self.userendercache = True # False: do not put rendered graphs into the (memory) rendercache
+        self.degraded = False # True: the last graph rendered by dot() is a simplified one (rendertimeout)
         self.previous_modification = 0 # sent to client and must be still the same when client answers. If not another client was faster. In this cas we refuse the anwser of the first client who came to late
 
     def __str__(self):
         return self.lastpm
 
+    @property
+    def isDisconnected(self):
+        # the connected components are kept up to date by self.triples, no need to encode the graph
+        if not self.valid or not self.isparsed:
+            return False
+        return self.triples.components.count() > 1
+
     def write(self):
         ofp = io.StringIO()
         if not self.valid or not self.isparsed:
             print(self.lastpm, file=ofp)
         elif self.isDisconnected:
+            self.canonicalize()
             # print("# TODO\n", file=ofp)
             # print(self.lastpm.replace("\n\n", "\n"), file=ofp)
             # get tops of all partial penmans and create a pseudo head
@@ -232,7 +385,8 @@ class AMRProcessor:
 
     def readpenman(self, amr):
         # AMR is in PENMAN format
-        self.triples = []
+        self.triples = TripleStore()
+        self.version += 1
         self.valid = True
         self.isparsed = True
         amr = ONESPACE.sub(" ", amr)
@@ -267,16 +421,7 @@ class AMRProcessor:
 
                         if p == "/":
                             p = ":instance"
-                            self.vars[s] = o
-                            if self.umr_varprefix and s.startswith(self.umr_varprefix):
-                                letter = s[len(self.umr_varprefix)]
-                            else:
-                                letter = s[0]
-
-                            if letter not in self.varletters:
-                                self.varletters[letter] = set([s])
-                            else:
-                                self.varletters[letter].add(s)
+                            self.addvar(s, o)
                         if not isinstance(o, str):
                             o = o[0]
 
@@ -311,6 +456,50 @@ class AMRProcessor:
         # print(self.vars)
         # self.reinitvars()
 
+    def addvar(self, var, concept):
+        self.vars[var] = concept
+        if self.umr_varprefix and var.startswith(self.umr_varprefix):
+            letter = var[len(self.umr_varprefix)]
+        else:
+            letter = var[0]
+
+        if letter not in self.varletters:
+            self.varletters[letter] = set([var])
+        else:
+            self.varletters[letter].add(var)
+
+    def snapshot(self):
+        # the current graph as a dict which restore() uses to get back to this state without parsing PENMAN
+        # the PENMAN of a parsed graph is not kept, restore() encodes the triples (in the order of the PENMAN) again
+        if not self.valid or not self.isparsed:
+            return {"amr": self.lastpm}
+        self.canonicalize()
+        return {"triples": tuple(self.triples),
+                "top": self.top,
+                "encodable": self.encodable}
+
+    def restore(self, state):
+        if "triples" not in state:
+            self.readpenman(state["amr"])
+            return
+        self.triples = TripleStore(state["triples"])
+        self.top = state["top"]
+        self.vars = {}
+        self.varletters = {}
+        for s, p, o in self.triples:
+            if p == ":instance":
+                self.addvar(s, o)
+        self.valid = True
+        self.isparsed = True
+        self.version += 1
+        if state["encodable"]:
+            # the triples are in the order of the PENMAN of the state, which is found again without reading it
+            self.lastpm = penman.encode(penman.Graph(self.triples, top=self.top), indent=PENMAN_INDENT)
+            self.encodable = True
+            self.canonicalversion = self.version
+        else:
+            self.canonicalize()
+
     def newvar(self, concept):
         # return "v%d" % len(self.vars)
         letter = concept[0]
@@ -367,7 +556,7 @@ class AMRProcessor:
             s = oldnew.get(s, s)
             o = oldnew.get(o, o)
             newtriples.append((s, p, o))
-        self.triples = newtriples
+        self.triples = TripleStore(newtriples)
 
     def getvars(self, concept):
         # find all instances of a given concept
@@ -377,8 +566,59 @@ class AMRProcessor:
                 insts.append(k)
         return insts
 
-    def dot(self, highlightinstances=None, highlightrelations=None, highlightconcepts=None, format="svg", inverse_of=False, tokenalignments=None):
+    def dotkey(self, highlightinstances=None, highlightrelations=None, highlightconcepts=None, format="svg", inverse_of=False, tokenalignments=None, lean=False, visible=None):
+        # key for the rendercache (None if the cache is not used)
+        if AMRProcessor.rendercache is None or not self.userendercache:
+            return None
+        return (tuple(self.triples), self.top, freeze(self.vars),
+                freeze(highlightinstances), freeze(highlightrelations), freeze(highlightconcepts),
+                format, inverse_of, freeze(tokenalignments), id(AMRProcessor.pbframes), lean, freeze(visible))
+
+    def dot(self, highlightinstances=None, highlightrelations=None, highlightconcepts=None, format="svg", inverse_of=False, tokenalignments=None, lean=False, visible=None):
+        self.degraded = False
+        cachekey = self.dotkey(highlightinstances, highlightrelations, highlightconcepts, format, inverse_of, tokenalignments, lean, visible)
+        if cachekey is not None:
+            rendered = AMRProcessor.rendercache.get(cachekey)
+            if rendered is not None:
+                return rendered
+            if AMRProcessor.rendertimeout:
+                # do not wait again for a graph which has been too slow
+                rendered = AMRProcessor.rendercache.get(cachekey + ("degraded",))
+                if rendered is not None:
+                    self.degraded = True
+                    return rendered
+
+        try:
+            rendered = rundot(self.digraph(highlightinstances, highlightrelations, highlightconcepts, format, inverse_of, tokenalignments, lean, visible),
+                              AMRProcessor.rendertimeout)
+        except subprocess.TimeoutExpired:
+            AMRProcessor.timeouts += 1
+            rendered = self.degradeddot(highlightinstances, highlightrelations, highlightconcepts, format, inverse_of, visible)
+            if cachekey is not None:
+                AMRProcessor.rendercache.put(cachekey + ("degraded",), rendered)
+            return rendered
+
+        if cachekey is not None:
+            AMRProcessor.rendercache.put(cachekey, rendered)
+        return rendered
+
+    def degradeddot(self, highlightinstances=None, highlightrelations=None, highlightconcepts=None, format="svg", inverse_of=False, visible=None):
+        # simplified graph if dot takes too long: no token alignments, no tooltips (lean)
+        # and fewer iterations for the placement of the nodes
+        self.degraded = True
+        AMRProcessor.degradedgraphs += 1
+        graph = self.digraph(highlightinstances, highlightrelations, highlightconcepts, format, inverse_of, None, lean=True, visible=visible)
+        graph.graph_attr.update(nslimit="2", nslimit1="2", mclimit="0.1", searchsize="10")
+        try:
+            return rundot(graph, AMRProcessor.rendertimeout)
+        except subprocess.TimeoutExpired:
+            AMRProcessor.timeouts += 1
+            return notrendered(format, AMRProcessor.rendertimeout)
+
+    def digraph(self, highlightinstances=None, highlightrelations=None, highlightconcepts=None, format="svg", inverse_of=False, tokenalignments=None, lean=False, visible=None):
         # highlight instances and relations NOT in highlightinstances and highlightrelations
+        # lean: no tooltips (see conceptdoc()) and the colours of the relations are defined by CSS classes (/css/relations.css)
+        # visible: if not None, only these instances are shown (see visiblenodes())
         # global orangecolors
         if highlightconcepts:
             # orangecolors = {highlightconcepts: "#ff7900"}
@@ -408,6 +648,9 @@ class AMRProcessor:
                 s = tmp
                 p = p[:-3]
             kwargs = kwargsinit.copy()
+            if visible is not None and (s not in visible or (o in self.vars and p != ":instance" and o not in visible)):
+                # collapsed part of the graph
+                continue
 
             if p == ":instance":
                 ibg = "white"
@@ -425,19 +668,9 @@ class AMRProcessor:
                     kwargs["fontname"] = "Lato Black"
                     firstseen = True
 
-                if AMRProcessor.pbframes:
-                    argdoc = AMRProcessor.pbframes.getargdoc(o)
-                    lines = []
-                    if argdoc:
-                        lines.append("%s: %s" % (o, argdoc["descr"]))
-                        for r in sorted(argdoc["roles"], key=lambda x: x["n"]):
-                            vn = ""
-                            if r["vn"]:
-                                vn = " (%s)" % ", ".join(r["vn"])
-                            lines.append(" - %s %s%s" % (r["n"], r["descr"], vn))
-
+                if AMRProcessor.pbframes and not lean:
                     # this adds a tooltip, but changes the SVG drastically
-                    kwargs["tooltip"] = "\n".join(lines)
+                    kwargs["tooltip"] = conceptdoc(AMRProcessor.pbframes, o)
 
                 graph.node("%s" % s, label="%s/%s" % (s, o), shape="box",
                            id="node#%s#%s" % (s, o),
@@ -509,14 +742,30 @@ class AMRProcessor:
                 else:
                     # simple edge with a label between two nodes
                     # color of arrow head
-                    kwargs["fillcolor"] = localorangecolors.get(p.replace("-of", ""), "black")
-                    kwargs["fontcolor"] = localorangecolors.get(p.replace("-of", ""), "black")
-                    col = localorangecolors.get(p.replace("-of", ""), "black")
-                    graph.edge(s, onodeid, label=pp,
-                               id="edge#%s#%s#%s" % (s, o, p),
-                               color=col,
-                               # fontcolor=orangecolors.get(p.replace("-of", ""), "black"),
-                               **kwargs)
+                    if lean and localorangecolors is orangecolors and p.replace("-of", "") in orangecolors:
+                        # colour defined in relations.css
+                        kwargs["class"] = p[1:].replace("-of", "")
+                        graph.edge(s, onodeid, label=pp,
+                                   id="edge#%s#%s#%s" % (s, o, p),
+                                   **kwargs)
+                    else:
+                        kwargs["fillcolor"] = localorangecolors.get(p.replace("-of", ""), "black")
+                        kwargs["fontcolor"] = localorangecolors.get(p.replace("-of", ""), "black")
+                        col = localorangecolors.get(p.replace("-of", ""), "black")
+                        graph.edge(s, onodeid, label=pp,
+                                   id="edge#%s#%s#%s" % (s, o, p),
+                                   color=col,
+                                   # fontcolor=orangecolors.get(p.replace("-of", ""), "black"),
+                                   **kwargs)
+
+        if visible is not None:
+            # nodes which replace the hidden neighbours of an instance
+            for var, hidden in visible.items():
+                if hidden:
+                    graph.node("collapsed#%s" % var, label="+%d" % hidden,
+                               id="collapsed#%s" % var,
+                               shape="ellipse", style="dashed", fontname=deffont)
+                    graph.edge(var, "collapsed#%s" % var, style="dashed", dir="none")
 
         if tokenalignments and tokenalignments[0] and tokenalignments[1]:
             # add words of sentence and alignments
@@ -547,6 +796,8 @@ class AMRProcessor:
                     continue
                 tid = "tokens:tok%d" % token
                 for varname in alignments[token]:
+                    if visible is not None and any(v in self.vars and v not in visible for v in varname.split("#")):
+                        continue
                     kwargs["style"] = "dashed"
                     kwargs["fontcolor"] = "black"
 
@@ -575,70 +826,22 @@ class AMRProcessor:
                                #fontcolor=orangecolors.get(p.replace("-of", ""), "black"),
                                **kwargs)
         # print("DOT source",graph)
-        return graph.pipe()
+        return graph
 
-    def show(self, highlightinstances=None, highlightrelations=None, highlightconcepts=None, format="svg", tokenalignments=None, reverse_of=False):
+    def show(self, highlightinstances=None, highlightrelations=None, highlightconcepts=None, format="svg", tokenalignments=None, reverse_of=False, lean=False, maxnodes=0, expanded=None):
+        # lean: smaller SVG without tooltips, which needs /css/relations.css (see digraph())
+        # maxnodes, expanded: display only a part of big graphs (see visiblenodes())
         if self.inserver:
             if not self.valid:
                 return self.lastpm, None
 
-            try:
-                pm = penman.encode(penman.Graph(self.triples, top=self.top), indent=PENMAN_INDENT)
-                self.lastpm = pm
-                self.readpenman(pm)
-                self.lastsvg = self.dot(highlightinstances, highlightrelations, highlightconcepts=highlightconcepts, format=format, inverse_of=reverse_of, tokenalignments=tokenalignments)
-                self.isDisconnected = False
-            except penman.exceptions.LayoutError:
-                self.lastsvg = self.dot(format=format, inverse_of=reverse_of)
-                noninst = []
-                for tr in self.triples:
-                    noninst.append(tr)
-                sgs = graph.findsubgraphs(noninst)
-
-                pms = []
-                for sg in sgs:
-                    triples = []
-
-                    for tr in self.triples:
-                        if tr[0] in sg or (tr[2] in sg and tr[1] != ":instance"):
-                            triples.append(tr)
-                    pm = penman.encode(penman.Graph(triples), indent=PENMAN_INDENT)
-                    pms.append(pm)
-                    # print("DISCONNECTED", pm)
-
-                self.lastpm = "\n\n".join(pms)
-                if len(sgs) > 1:
-                    self.isDisconnected = True
-                else:
-                    self.isDisconnected = False
-
-            # print("AAA", self.lastsvg)
-
-            def addtokenids(svg):
-                newlines = []
-                intokens = False
-                ct = 1
-                # graphviz does not allowto add ids to elements in a structure
-                # so we add them here to make clicks onto them exploitable in index.js:info(). Not perfect. But the alternative D3.js is too ugly
-                for line in svg:
-                    line = line.strip()
-                    if line == "<title>tokens</title>":
-                        intokens = True
-                    elif line == "</g>":
-                        intokens = False
-                    elif intokens:
-                        if line.startswith("<polygon "):
-                            line = line.replace('<polygon ', '<polygon id="tokenwordbox_%d" ' % ct)
-                        elif line.startswith("<text "):
-                            line = line.replace('<text ', '<text class="wordpos" id="tokenwordtext_%d" ' % ct)
-                            ct += 1
-                    newlines.append(line)
-                return "\n".join(newlines)
-
-            if format == "svg":
-                self.lastsvg = addtokenids(self.lastsvg.decode("utf8").split("\n"))
-
-            return "%s" % self.lastpm, self.lastsvg #self.lastsvg_canonised
+            diskkey = self.diskcachekey(highlightinstances, highlightrelations, highlightconcepts, format, tokenalignments, reverse_of, lean, maxnodes, expanded)
+            cached = self.fromdiskcache(diskkey)
+            if cached is not None:
+                return cached
+
+            dotargs = self.layout(highlightinstances, highlightrelations, highlightconcepts, format, tokenalignments, reverse_of, lean, maxnodes, expanded)
+            return self.finishshow(self.dot(**dotargs), format, diskkey, lean)
         else:
             try:
                 pm = penman.encode(penman.Graph(self.triples, top=self.top), indent=PENMAN_INDENT)
@@ -649,10 +852,165 @@ class AMRProcessor:
                 print("not yet correct")
                 print(self.triples)
 
-    def validate(self, valfuncs=[]):
-        rtc = []
+    def penman(self):
+        # the PENMAN returned by show() without rendering the graph
+        if not self.valid:
+            return self.lastpm
+        self.layout()
+        return "%s" % self.lastpm
+
+    def diskcachekey(self, highlightinstances=None, highlightrelations=None, highlightconcepts=None, format="svg", tokenalignments=None, reverse_of=False, lean=False, maxnodes=0, expanded=None):
+        if AMRProcessor.diskcache is None or format != "svg":
+            return None
+        return AMRProcessor.diskcache.key(self.triples.list(), self.top,
+                                          highlightinstances, highlightrelations, highlightconcepts,
+                                          tokenalignments, reverse_of, lean, maxnodes, expanded)
+
+    def fromdiskcache(self, diskkey):
+        # returns the same as show() if the graph is in the diskcache, else None
+        if diskkey is None:
+            return None
+        cached = AMRProcessor.diskcache.get(diskkey)
+        if cached is None or "triples" not in cached:
+            return None
+        if self.canonicalversion != self.version:
+            # same triples as those of the key, but maybe not in the order of the PENMAN. As canonicalize()
+            # without parsing the PENMAN again and without changing self.version (and the caches which depend on it)
+            triples = [tuple(tr) for tr in cached["triples"]]
+            if triples != self.triples.list():
+                store = TripleStore(triples)
+                store.follow(self.triples)
+                self.triples = store
+            self.top = cached["top"]
+            self.lastpm = cached["penman"]
+            self.encodable = not cached["disconnected"]
+            self.canonicalversion = self.version
+        self.degraded = False
+        self.lastsvg = cached["svg"]
+        return "%s" % self.lastpm, self.lastsvg
+
+    def layout(self, highlightinstances=None, highlightrelations=None, highlightconcepts=None, format="svg", tokenalignments=None, reverse_of=False, lean=False, maxnodes=0, expanded=None):
+        # create the PENMAN (self.lastpm) of the current triples and return the arguments for dot()
+        if self.canonicalize():
+            return {"highlightinstances": highlightinstances,
+                    "highlightrelations": highlightrelations,
+                    "highlightconcepts": highlightconcepts,
+                    "format": format,
+                    "inverse_of": reverse_of,
+                    "tokenalignments": tokenalignments,
+                    "lean": lean,
+                    "visible": self.visiblenodes(maxnodes, expanded)}
+        else:
+            return {"format": format, "inverse_of": reverse_of, "lean": lean, "visible": self.visiblenodes(maxnodes, expanded)}
+
+    def canonicalize(self):
+        # encode the triples as PENMAN (self.lastpm) and read it again to get the triples in the order of the PENMAN.
+        # This is only done once for every modification of the triples (self.version)
+        # returns False if the triples can only be encoded as several PENMAN graphs
+        if self.canonicalversion == self.version:
+            return self.encodable
+        self.encodable = False
+        if self.triples.components.count() < 2:
+            try:
+                pm = penman.encode(penman.Graph(self.triples, top=self.top), indent=PENMAN_INDENT)
+                self.lastpm = pm
+                previous = self.triples
+                self.readpenman(pm)
+                self.triples.follow(previous)
+                self.encodable = True
+            except penman.exceptions.LayoutError:
+                pass
+        if not self.encodable:
+            # one PENMAN graph for every connected component
+            sgs = self.triples.components.components()
+            sgnum = {}
+            for i, sg in enumerate(sgs):
+                for node in sg:
+                    sgnum[node] = i
+            triples = [[] for sg in sgs]
+            for tr in self.triples:
+                triples[sgnum[tr[0]]].append(tr)
+            pms = []
+            for sgtriples in triples:
+                pm = penman.encode(penman.Graph(sgtriples), indent=PENMAN_INDENT)
+                pms.append(pm)
+                # print("DISCONNECTED", pm)
+
+            self.lastpm = "\n\n".join(pms)
+        self.canonicalversion = self.version
+        return self.encodable
+
+    def visiblenodes(self, maxnodes, expanded=None):
+        # collapse big graphs: the instances which are displayed when starting at the top, the graph is expanded
+        # breadth first as long as at most maxnodes instances are visible. The neighbours of the instances in expanded are always visible
+        # returns {variable: number of hidden neighbours} or None if the graph is displayed completely
+        if not maxnodes or len(self.vars) <= maxnodes:
+            return None
+        expanded = expanded or set()
+        neighbours = {var: [] for var in self.vars}
+        for s, p, o in self.triples:
+            if p != ":instance" and s in self.vars and o in self.vars:
+                neighbours[s].append(o)
+                neighbours[o].append(s)
+
+        roots = [s for s, p, o in self.triples if p == ":instance"]
+        if self.top in self.vars:
+            roots.insert(0, self.top)
+        visible = set()
+        seen = set() # instances of the subgraphs (if the graph is disconnected) already processed
+        for root in roots:
+            if root in seen:
+                continue
+            stack = [root]
+            seen.add(root)
+            while stack:
+                for var in neighbours[stack.pop()]:
+                    if var not in seen:
+                        seen.add(var)
+                        stack.append(var)
+
+            # the root of every subgraph is visible
+            visible.add(root)
+            queue = collections.deque([root])
+            while queue:
+                var = queue.popleft()
+                new = [n for n in dict.fromkeys(neighbours[var]) if n not in visible]
+                if var in expanded or len(visible) + len(new) <= maxnodes:
+                    visible.update(new)
+                    queue.extend(new)
+
+        return {var: len(set(n for n in neighbours[var] if n not in visible)) for var in visible}
+
+    def finishshow(self, rendered, format, diskkey=None, lean=False):
+        # print("AAA", rendered)
+        self.lastsvg = rendered
+        if format == "svg":
+            self.lastsvg = addtokenids(self.lastsvg.decode("utf8").split("\n"))
+            if lean:
+                self.lastsvg = minifysvg(self.lastsvg)
+            if diskkey is not None and not self.degraded:
+                # a simplified graph (rendertimeout) is not kept, the graph is rendered again after a restart
+                AMRProcessor.diskcache.put(diskkey, {"penman": self.lastpm,
+                                                     "triples": self.triples.list(),
+                                                     "top": self.top,
+                                                     "disconnected": self.isDisconnected,
+                                                     "svg": self.lastsvg})
+
+        return "%s" % self.lastpm, self.lastsvg #self.lastsvg_canonised
+
+    def validate(self, valfuncs=[], validators=[]):
+        # validators: objects with a validatetriple() method (see validation.py), their messages are kept
+        # and only triples which changed are validated again. valfuncs: functions which validate all triples
+        key = (self.version, tuple(validators), self.isDisconnected)
+        if self.lastvalidation is None or self.lastvalidation[0] != key:
+            self.lastvalidation = (key, self.triplevalidation.validate(self.triples, validators), self.checkstructure())
+        rtc = list(self.lastvalidation[1])
         for valfunc in valfuncs:
             rtc += valfunc(self.triples)
+        return rtc + self.lastvalidation[2]
+
+    def checkstructure(self):
+        rtc = []
         edges = set() # (s,o)
         outedges = set() # (s,p)
 
@@ -701,12 +1059,12 @@ class AMRProcessor:
     def settop(self, topvar):
         if topvar in self.vars:
             self.top = topvar
+            self.version += 1
 
-            for tr in self.triples:
-                if self.top == tr[2] and tr[1].endswith("-of"):
-                    self.triples.index(tr)
+            for tr in self.triples.withobject(self.top):
+                if tr[1].endswith("-of"):
                     self.triples.remove(tr)
-                    self.triples.insert(0, (tr[2], tr[1][:-3], tr[0]))
+                    self.triples.prepend((tr[2], tr[1][:-3], tr[0]))
         else:
             return "invalid instance variable %s" % topvar
         # self.show()
@@ -743,16 +1101,23 @@ class AMRProcessor:
                 k = newname
             newvars[k] = v
         self.vars = newvars
-
-        newtriples = []
-        for s, p, o in self.triples:
+        for var in self.varletters.values():
+            var.discard(oldname)
+        self.addvar(newname, self.vars[newname])
+        if self.top == oldname:
+            self.top = newname
+
+        torename = self.triples.withsubject(oldname)
+        torename += [tr for tr in self.triples.withobject(oldname) if tr[0] != oldname]
+        for tr in torename:
+            s, p, o = tr
             if s == oldname:
                 s = newname
             if p != ":instance":
                 if o == oldname:
                     o = newname
-            newtriples.append((s, p, o))
-        self.triples = newtriples
+            self.triples.replace(tr, (s, p, o))
+        self.version += 1
 
     def addconcept(self, concept):
         var = self.newvar(concept)
@@ -765,6 +1130,7 @@ class AMRProcessor:
         else:
             self.vars[var] = concept
             self.triples.append((var, ":instance", concept))
+            self.version += 1
         # self.show()
         return var
 
@@ -779,55 +1145,55 @@ class AMRProcessor:
 
     def modconcept(self, var, newconcept):
         if var in self.vars:
-            for tr in self.triples:
-                if tr[0] == var and tr[1] == ":instance":
-                    pos = self.triples.index(tr)
-                    self.triples.remove(tr)
-                    self.triples.insert(pos, (tr[0], ":instance", newconcept))
-                    break
+            for tr in self.triples.withsp(var, ":instance"):
+                self.triples.replace(tr, (tr[0], ":instance", newconcept))
+                break
             self.vars[var] = newconcept
+            self.version += 1
 
     def modedge(self, modedge_start, modedge_end, newedge):
         # change label of edge
-        for tr in self.triples:
+        for tr in self.triples.between(modedge_start, modedge_end):
             # print("MOD-EDGE", tr, modedge_start, modedge_end, newedge)
             if tr[0] == modedge_start and tr[2] == modedge_end:
-                pos = self.triples.index(tr)
-                self.triples.remove(tr)
-                self.triples.insert(pos, (tr[0], newedge, tr[2]))
+                self.triples.replace(tr, (tr[0], newedge, tr[2]))
+                self.version += 1
                 break
             elif tr[2] == modedge_start and tr[0] == modedge_end:
-                pos = self.triples.index(tr)
-                self.triples.remove(tr)
-                self.triples.insert(pos, (tr[2], newedge, tr[0]))
+                self.triples.replace(tr, (tr[2], newedge, tr[0]))
+                self.version += 1
                 break
+        else:
+            return "no edge between « %s » and « %s »" % (modedge_start, modedge_end)
+        return None
 
     def moveedge(self, modedge_start, modedge_end, newedge, newstart):
         # change start point of edge
         if newstart not in self.vars:
             return "new source instance « %s » does not exist" % newstart
 
-        for tr in self.triples:
+        for tr in self.triples.between(modedge_start, modedge_end):
             # print("MOVE-EDGE", tr, modedge_start, modedge_end, newedge, newstart)
             if tr[0] == modedge_start and tr[2] == modedge_end:
-                pos = self.triples.index(tr)
-                self.triples.remove(tr)
-                self.triples.insert(pos, (newstart, newedge, tr[2]))
+                self.triples.replace(tr, (newstart, newedge, tr[2]))
+                self.version += 1
                 break
             if tr[2] == modedge_start and tr[0] == modedge_end:
                 # can create confusion.
                 # if tr[1].endswith("-of"):
                 #    return 'deactivate  « reverse "-of" » to modify the head this relation'
-                pos = self.triples.index(tr)
-                self.triples.remove(tr)
-                self.triples.insert(pos, (newstart, tr[1], tr[0]))
+                self.triples.replace(tr, (newstart, tr[1], tr[0]))
+                self.version += 1
                 break
+        else:
+            return "no edge between « %s » and « %s »" % (modedge_start, modedge_end)
         return None
 
     def delliteral(self, litid, litedge, dellit):
-        for tr in self.triples:
-            if tr[0] == litid and tr[1] == litedge and (tr[2] == '"%s"' % dellit or tr[2] == dellit):
+        for tr in self.triples.withsp(litid, litedge):
+            if tr[2] == '"%s"' % dellit or tr[2] == dellit:
                 self.triples.remove(tr)
+                self.version += 1
                 return None
         return "literal and relation <%s %s %s> do not exist" % (litid, litedge, dellit)
 
@@ -863,15 +1229,16 @@ class AMRProcessor:
     )
 
     def modliteral(self, litid, litedge, newlit):
-        for tr in self.triples:
+        for tr in self.triples.withsp(litid, litedge):
             # print("llll", tr, litid, litedge)
-            if tr[0] == litid and tr[1] == litedge:
-                pos = self.triples.index(tr)
-                self.triples.remove(tr)
-                if not self.isNumber.match(newlit) and newlit not in AMRProcessor.attributevalues:
-                    newlit = '"%s"' % newlit.replace('"', '')
-                self.triples.insert(pos, (tr[0], tr[1], newlit))
-                break
+            if not self.isNumber.match(newlit) and newlit not in AMRProcessor.attributevalues:
+                newlit = '"%s"' % newlit.replace('"', '')
+            self.triples.replace(tr, (tr[0], tr[1], newlit))
+            self.version += 1
+            break
+        else:
+            return "no literal « %s » of « %s »" % (litedge, litid)
+        return None
 
     def addliteral(self, literalof, relationforliteral, newlit, isattribute=False):
         if literalof not in self.vars:
@@ -880,6 +1247,7 @@ class AMRProcessor:
             if not self.isNumber.match(newlit) and newlit not in AMRProcessor.attributevalues:
                 newlit = '"%s"' % newlit.replace('"', '')
             self.triples.append((literalof, relationforliteral, newlit))
+            self.version += 1
 
     def addedge(self, start, end, label):
         # TODO check no second edge with same label from given node
@@ -921,13 +1289,18 @@ class AMRProcessor:
                 label = ":" + label
 
             self.triples.append((start, label, end))
+            self.version += 1
         # self.show()
         return None
 
     def deledge(self, start, end, label):
         todelete = []
-        for ix, tr in enumerate(self.triples):
-            # print("tttt", ix,tr, start, label, end)
+        if end.startswith("stringnode"):
+            candidates = self.triples.list()
+        else:
+            candidates = [tr for tr in self.triples.withsubject(start) if tr[2] == end]
+        for tr in candidates:
+            # print("tttt", tr, start, label, end)
             if tr[0] == start and tr[2] == end or end.startswith("stringnode"):
                 if tr[1] == label:
                     todelete.append(tr)
@@ -935,38 +1308,87 @@ class AMRProcessor:
                     todelete.append(tr)
         for tr in todelete:
             self.triples.remove(tr)
+        if not todelete:
+            return "no edge « %s » between « %s » and « %s »" % (label, start, end)
+        self.version += 1
 
         # self.show()
+        return None
 
     def delinstance(self, var):
         if var in self.vars:
-            todelete = []
-            for tr in self.triples:
-                if tr[0] == var or tr[2] == var:
-                    todelete.append(tr)
+            todelete = self.triples.withsubject(var)
+            todelete += [tr for tr in self.triples.withobject(var) if tr[0] != var]
             del self.vars[var]
             for tr in todelete:
                 self.triples.remove(tr)
             if self.top == var:
                 self.top = None
+            self.version += 1
         # self.show()
 
     def process(self, line):
-        # concept
-        # top var
-        # var1 edge var2
-        # - start edge
+        # concept                            add an instance of concept
+        # top var                            make var the top of the graph
+        # var1 edge var2|literal             add an edge (see addedge())
+        # - var1 edge var2|literal           delete an edge
+        # concept var newconcept             change the concept of an instance
+        # edge var1 var2 newedge             change the label of the edge between var1 and var2
+        # move var1 var2 newedge newstart    change the label and the start of the edge between var1 and var2
+        # literal var edge newliteral        change a literal
+        # delete var                         delete an instance and all its edges
+        # rename var newvar                  rename a variable
+        # reify edge, dereify concept        (needs a reification table, see reification.getInstance())
+        # returns None or an error message (or a list of messages)
         elems = line.split()
-        if len(elems) == 2:
-            if elems[0] == "top":
-                self.settop(elems[1])
+        if not elems:
+            return None
+        cmd = elems[0]
+        if cmd == "top" and len(elems) == 2:
+            return self.settop(elems[1])
+        elif cmd == "concept" and len(elems) == 3:
+            if elems[1] not in self.vars:
+                return "invalid instance variable %s" % elems[1]
+            self.modconcept(elems[1], elems[2])
+        elif cmd == "edge" and len(elems) == 4:
+            return self.modedge(elems[1], elems[2], relation(elems[3]))
+        elif cmd == "move" and len(elems) == 5:
+            return self.moveedge(elems[1], elems[2], relation(elems[3]), elems[4])
+        elif cmd == "literal" and len(elems) >= 4:
+            elems = line.split(None, 3)
+            return self.modliteral(elems[1], relation(elems[2]), elems[3])
+        elif cmd == "delete" and len(elems) == 2:
+            if elems[1] not in self.vars:
+                return "invalid instance variable %s" % elems[1]
+            self.delinstance(elems[1])
+        elif cmd == "rename" and len(elems) == 3:
+            return self.renamevar(elems[1], elems[2])
+        elif cmd in ["reify", "dereify"] and len(elems) == 2:
+            if not getInstance():
+                return "no reification table available"
+            self.canonicalize() # reificator uses self.lastpm
+            if cmd == "reify":
+                self.reify(relation(elems[1]))
+            else:
+                return self.dereify(elems[1])
         elif len(elems) == 1:
             self.addconcept(elems[0])
+        elif cmd == "-" and len(elems) >= 4:
+            elems = line.split(None, 3)
+            return self.deledge(elems[1], elems[3], relation(elems[2]))
+        elif len(elems) >= 3:
+            elems = line.split(None, 2)
+            return self.addedge(elems[0], elems[2], elems[1])
         else:
-            if elems[0] == "-":
-                self.deledge(elems[1], elems[2])
-            else:
-                self.addedge(elems[0], elems[2], elems[1])
+            return "invalid command « %s »" % line
+        return None
+
+
+def relation(label):
+    # relation as used in triples
+    if label[0] != ":":
+        return ":" + label
+    return label
 
 
 if __name__ == "__main__":
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+
+# This library is under the 3-Clause BSD License
+#
+# Copyright (c) 2026,  Orange
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Orange nor the
+#      names of its contributors may be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL ORANGE BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+# Software Name: MetAMoRphosED AMR-Editor
+# Author: Johannes Heinecke
+
+# read-only access to (very large) AMR files: a sidecar index (<file>.idx) contains the
+# byte offset, length, id, text and hash of each sentence block. Sentences are only parsed
+# (from a mmap of the AMR file) when they are accessed. The index is rebuilt if the
+# size or the modification time of the AMR file change
+
+import collections
+import hashlib
+import io
+import json
+import mmap
+import os
+import re
+import sys
+import threading
+
+import metamorphosed.amrdoc as amrdoc
+from metamorphosed.exception import ServerException
+
+# to be incremented if the format of the index file changes
+INDEXVERSION = 1
+
+OFFSET = 0
+LENGTH = 1
+ID = 2
+TEXT = 3
+HASH = 4
+
+
+def indexfile(fn):
+    # find the sentence blocks as amrdoc.iter_sentences() does: a block ends with
+    # an empty line after at least one line of PENMAN, comments before are part of the block
+    entries = [] # [offset, length, id, text, hash]
+    start = 0
+    pos = 0
+    sentid = None
+    text = None
+    hasamr = False
+    h = hashlib.sha1()
+    with open(fn, "rb") as ifp:
+        for line in ifp:
+            sline = line.rstrip()
+            if not sline:
+                if hasamr:
+                    entries.append([start, pos - start, sentid, text, h.hexdigest()])
+                    start = pos + len(line)
+                    sentid = None
+                    text = None
+                    hasamr = False
+                    h = hashlib.sha1()
+                    pos += len(line)
+                    continue
+            elif sline.startswith(b"# ::id "):
+                sentid = sline[7:].decode("utf8").split("::")[0].strip()
+            elif sline.startswith(b"# ::wikidata "):
+                if not sentid:
+                    sentid = sline[13:].decode("utf8")
+            elif sline.startswith(b"# ::snt "):
+                text = sline[8:].decode("utf8")
+            elif not sline.startswith(b"#"):
+                hasamr = True
+            h.update(line)
+            pos += len(line)
+    if hasamr:
+        entries.append([start, pos - start, sentid, text, h.hexdigest()])
+    return entries
+
+
+class IndexedSentences:
+    # sequence of AMRsentences which are parsed from the mmap'ed file when accessed
+    def __init__(self, doc, cachesize=1000):
+        self.doc = doc
+        self.cachesize = cachesize
+        self.cache = collections.OrderedDict() # position: AMRsentence, least recently used first
+
+    def __len__(self):
+        return len(self.doc.entries)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, pos):
+        if pos < 0:
+            pos += len(self)
+        if pos < 0 or pos >= len(self):
+            raise IndexError("sentence index out of range")
+        with self.doc.lock:
+            if pos in self.cache:
+                self.cache.move_to_end(pos)
+                return self.cache[pos]
+            sent = self.doc.readsentence(pos)
+            self.cache[pos] = sent
+            if len(self.cache) > self.cachesize:
+                self.cache.popitem(last=False)
+            return sent
+
+
+class IndexedAMRdoc(amrdoc.AMRdoc):
+    def __init__(self, fn, verbose=True, cachesize=1000):
+        self.fn = fn
+        self.verbose = verbose
+        self.idxfn = fn + ".idx"
+        self.lock = threading.RLock()
+        self.ifp = None
+        self.mm = None
+        self.entries = []
+        self.sentences = IndexedSentences(self, cachesize=cachesize)
+        self.load()
+
+    def load(self):
+        st = os.stat(self.fn)
+        entries = self.readindex(st)
+        if entries is None:
+            entries = indexfile(self.fn)
+            self.writeindex(st, entries)
+            if self.verbose:
+                print("%d sentences indexed in %s" % (len(entries), self.fn), file=sys.stderr)
+        elif self.verbose:
+            print("%d sentences read from index %s" % (len(entries), self.idxfn), file=sys.stderr)
+        self.entries = entries
+        self.sentences.cache.clear()
+
+        self.close()
+        self.ifp = open(self.fn, "rb")
+        if st.st_size > 0:
+            # an empty file cannot be mapped
+            self.mm = mmap.mmap(self.ifp.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+        if self.ifp is not None:
+            self.ifp.close()
+            self.ifp = None
+
+    def readindex(self, st):
+        if not os.path.isfile(self.idxfn):
+            return None
+        try:
+            with open(self.idxfn) as ifp:
+                data = json.load(ifp)
+            if data.get("version") == INDEXVERSION \
+               and data.get("size") == st.st_size \
+               and data.get("mtime_ns") == st.st_mtime_ns:
+                return data["sentences"]
+        except Exception as e:
+            print("cannot read index %s: %s" % (self.idxfn, e), file=sys.stderr)
+        return None
+
+    def writeindex(self, st, entries):
+        try:
+            tmpfile = "%s.%d" % (self.idxfn, os.getpid())
+            with open(tmpfile, "w") as ofp:
+                json.dump({"version": INDEXVERSION, "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                           "sentences": entries}, ofp)
+            os.replace(tmpfile, self.idxfn)
+        except Exception as e:
+            # no write access, we keep the index in memory
+            print("cannot write index %s: %s" % (self.idxfn, e), file=sys.stderr)
+
+    def readsentence(self, pos):
+        with self.lock:
+            offset, length, sentid, text, blockhash = self.entries[pos]
+            block = self.mm[offset:offset + length]
+            if hashlib.sha1(block).hexdigest() != blockhash:
+                raise ServerException("file %s has been modified, please restart" % self.fn)
+        sents = list(amrdoc.iter_sentences(io.StringIO(block.decode("utf8"))))
+        return sents[0]
+
+    def getsentencelist(self):
+        return [(e[ID], e[TEXT]) for e in self.entries]
+
+    def findid(self, pos, regex):
+        # search in the index, the sentence is not read
+        sentid = self.entries[pos][ID]
+        if sentid:
+            try:
+                if re.search(regex, sentid, re.IGNORECASE):
+                    return True
+            except Exception as e:
+                raise ServerException('bad regular expression "%s": %s' % (regex, e))
+        return False
+
+    def findtext(self, pos, regex):
+        text = self.entries[pos][TEXT]
+        if text:
+            try:
+                return re.finditer(regex, text, re.IGNORECASE)
+            except Exception as e:
+                raise ServerException('bad regular expression "%s": %s' % (regex, e))
+        return []
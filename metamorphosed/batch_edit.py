@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+
+# This library is under the 3-Clause BSD License
+#
+# Copyright (c) 2026,  Orange
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Orange nor the
+#      names of its contributors may be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL ORANGE BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+# Software Name: MetAMoRphosED AMR-Editor
+# Author: Johannes Heinecke
+
+# apply edit scripts to the sentences of an AMR file without a metamorphosed server.
+# A script has one command per line in the command language of AMRProcessor.process(). Commands before the first
+# "# ::id <sentence id>" line are applied to all sentences, the following ones only to the sentence with this id.
+# Sentences are edited in parallel by several processes and written with the same PENMAN format as the server
+
+import concurrent.futures
+import os
+import sys
+import time
+
+import metamorphosed.amrdoc as amrdoc
+import metamorphosed.amreditor as amreditor
+import metamorphosed.reification as reification
+
+
+mydir = os.path.abspath(os.path.dirname(__file__))
+
+
+def readscript(fn):
+    # returns ([commands for all sentences], {sentence id: [commands]})
+    allsentences = []
+    scripts = {}
+    commands = allsentences
+    with open(fn) as ifp:
+        for line in ifp:
+            line = line.strip()
+            if line.startswith("# ::id "):
+                sentid = line[7:].split(" ::")[0].strip()
+                commands = scripts.setdefault(sentid, [])
+            elif line and line[0] != "#":
+                commands.append(line)
+    return allsentences, scripts
+
+
+def initworker(reifications):
+    if reifications:
+        reification.getInstance(reifications)
+
+
+def editsentence(amr, commands):
+    # returns the edited PENMAN (None if the graph has not been modified or a command failed) and error messages
+    ap = amreditor.AMRProcessor(inserver=False)
+    ap.readpenman(amr)
+    if not ap.valid:
+        return None, ["format error: %s" % ap.parsererror["message"]]
+    version = ap.version
+    messages = []
+    for cmd in commands:
+        rtc = ap.process(cmd)
+        if isinstance(rtc, list):
+            messages += ["%s: %s" % (cmd, msg) for msg in rtc]
+        elif rtc:
+            messages.append("%s: %s" % (cmd, rtc))
+    if messages or ap.version == version:
+        # all commands or none, as /batchedit does
+        return None, messages
+    ap.canonicalize()
+    return ap.write(), messages
+
+
+def editsentences(jobs):
+    # jobs: [(num, amr, commands), ...], returns [(num, edited PENMAN or None, messages), ...]
+    results = []
+    for num, amr, commands in jobs:
+        try:
+            pm, messages = editsentence(amr, commands)
+        except Exception as e:
+            pm, messages = None, ["%s" % e]
+        results.append((num, pm, messages))
+    return results
+
+
+class BatchEdit:
+    def __init__(self, fn, scriptfn, reifications=None, workers=0, chunksize=200):
+        self.fn = fn
+        self.allsentences, self.scripts = readscript(scriptfn)
+        self.reifications = reifications
+        self.workers = workers if workers > 0 else os.cpu_count()
+        self.chunksize = chunksize
+
+    def edit(self, outfile):
+        # returns (number of modified sentences, number of sentences with errors)
+        sentences = list(amrdoc.iter_sentences(self.fn))
+        ids = set()
+        jobs = []
+        for num, sent in enumerate(sentences):
+            ids.add(sent.id)
+            commands = self.allsentences + self.scripts.get(sent.id, [])
+            if commands:
+                jobs.append((num, sent.amr, commands))
+        for sentid in self.scripts:
+            if sentid not in ids:
+                print("*** no sentence with id %s" % sentid, file=sys.stderr)
+
+        modified = 0
+        errors = 0
+        if jobs:
+            chunks = [jobs[i:i + self.chunksize] for i in range(0, len(jobs), self.chunksize)]
+            with concurrent.futures.ProcessPoolExecutor(max_workers=min(self.workers, len(chunks)),
+                                                        initializer=initworker,
+                                                        initargs=(self.reifications,)) as executor:
+                done = 0
+                for results in executor.map(editsentences, chunks):
+                    for num, pm, messages in results:
+                        for msg in messages:
+                            print("sentence %d (%s): %s" % (num + 1, sentences[num].id, msg), file=sys.stderr)
+                        if messages:
+                            errors += 1
+                        elif pm is not None:
+                            sentences[num].amr = pm
+                            sentences[num].date = time.strftime("%a %b %d, %Y %H:%M", time.localtime(time.time()))
+                            modified += 1
+                    done += len(results)
+                    print("%d/%d edited" % (done, len(jobs)), end="\r", file=sys.stderr)
+            print(file=sys.stderr)
+
+        # the output file may be the input file
+        with open(outfile + ".tmp", "w") as ofp:
+            for sent in sentences:
+                sent.write(ofp)
+        os.replace(outfile + ".tmp", outfile)
+        return modified, errors
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="apply edit scripts to the sentences of an AMR file")
+    parser.add_argument("--file", "-f", required=True, help='AMR file to edit')
+    parser.add_argument("--script", "-s", required=True, help='edit script (commands of AMRProcessor.process(), "# ::id <id>" starts the commands for a sentence)')
+    parser.add_argument("--outfile", "-o", required=True, help='edited AMR file (may be the same as --file)')
+    parser.add_argument("--reifications", "-X", default=None, help='table for (de)reification (default: the table of the server)')
+    parser.add_argument("--workers", "-w", default=0, type=int, help='number of processes editing sentences (default: number of CPUs)')
+    parser.add_argument("--chunksize", default=200, type=int, help='number of sentences sent to a process at once')
+
+    if len(sys.argv) < 2:
+        parser.print_help()
+    else:
+        args = parser.parse_args()
+        if args.reifications is None:
+            args.reifications = mydir + "/data/reification-table.txt"
+        be = BatchEdit(args.file, args.script, reifications=args.reifications,
+                       workers=args.workers, chunksize=args.chunksize)
+        modified, errors = be.edit(args.outfile)
+        print("%d sentences modified, %d not modified because of errors, written to %s" % (modified, errors, args.outfile), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -82,68 +82,113 @@
 #                        print(sorted(x))
 
 
-def findsubgraphs(triples):
-    subgraphs = []
-    # if an triple-o is not a variable,
-    # it is an literal, which needs to have a distinctive suffix to
-    # avoid to pretend that graphs are "linked" by a literal (which is not the case)
-    variable = set()
-    for s, p, o in sorted(triples):
+class Components:
+    # connected components of the instances of a (potentially disconnected) graph, kept up to date
+    # while triples are added or removed (union-find). A literal (or an undefined variable) as object does
+    # not link the subject to anything else. Adding a triple is (nearly) constant time. Removing a relation may split
+    # a component: in this case the union-find is rebuilt (in linear time) when the components are needed again
+    def __init__(self, triples=None):
+        self.parent = {}
+        self.size = {}
+        self.ncomponents = 0
+        self.subjects = {} # node: number of triples with node as subject
+        self.instances = {} # variable: number of :instance triples of the variable
+        self.relations = {} # object: {subject: number of relations from subject to object}
+        self.stale = False # True: a removed triple may have split a component, parent must be rebuilt
+        if triples:
+            for tr in triples:
+                self.add(tr)
+
+    def find(self, node):
+        while self.parent[node] != node:
+            self.parent[node] = self.parent[self.parent[node]]
+            node = self.parent[node]
+        return node
+
+    def union(self, a, b):
+        a = self.find(a)
+        b = self.find(b)
+        if a == b:
+            return
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        self.ncomponents -= 1
+
+    def addnode(self, node):
+        self.parent[node] = node
+        self.size[node] = 1
+        self.ncomponents += 1
+
+    def add(self, tr):
+        s, p, o = tr
+        self.subjects[s] = self.subjects.get(s, 0) + 1
+        if self.subjects[s] == 1 and not self.stale:
+            self.addnode(s)
         if p == ":instance":
-            variable.add(s)
+            self.instances[s] = self.instances.get(s, 0) + 1
+            if self.instances[s] == 1 and not self.stale:
+                # relations which pointed to an undefined variable link s now
+                for subj in self.relations.get(s, ()):
+                    self.union(subj, s)
+        else:
+            subjs = self.relations.setdefault(o, {})
+            subjs[s] = subjs.get(s, 0) + 1
+            if o in self.instances and not self.stale:
+                self.union(s, o)
 
-    #print("variables", sorted(variable))
-    for i, (s, p, o) in enumerate(sorted(triples)):
-        #if p == ":instance":
-        #    continue
-        if o not in variable or p == ":instance":
-            o += "##%d" % i
+    def remove(self, tr):
+        s, p, o = tr
+        self.subjects[s] -= 1
+        if not self.subjects[s]:
+            del self.subjects[s]
+            self.stale = True
+        if p == ":instance":
+            self.instances[s] -= 1
+            if not self.instances[s]:
+                del self.instances[s]
+                if s in self.relations:
+                    self.stale = True
+        else:
+            subjs = self.relations[o]
+            subjs[s] -= 1
+            if not subjs[s]:
+                del subjs[s]
+                if not subjs:
+                    del self.relations[o]
+                if o in self.instances and s != o:
+                    self.stale = True
 
-        #print("SSSS triple", s, p, o)
-        subgraphs.append(set([s, o]))
+    def rebuild(self):
+        self.parent = {}
+        self.size = {}
+        self.ncomponents = 0
+        for s in self.subjects:
+            self.addnode(s)
+        for o, subjs in self.relations.items():
+            if o in self.instances:
+                for s in subjs:
+                    self.union(s, o)
+        self.stale = False
 
-    ignore_sgs = set()
-    join = 0
-    if len(subgraphs) > 1:
-        while True:
-            modified = False
-            i = 0
-            while i < len(subgraphs) - 1:
-                #print("i", i)
-                if i in ignore_sgs:
-                    i += 1
-                    continue
-                j = i + 1
-                while j < len(subgraphs):
-                    #print("j", j)
-                    #print("iii", len(subgraphs), ignore_sgs)
-                    if j in ignore_sgs:
-                        j += 1
-                        continue
+    def count(self):
+        if self.stale:
+            self.rebuild()
+        return self.ncomponents
 
-                    join += 1
-                    #print("join??", join, subgraphs[i], subgraphs[j])
-                    if subgraphs[i].intersection(subgraphs[j]):
-                        #print("yes")
-                        subgraphs[i].update(subgraphs[j])
-                        ignore_sgs.add(j)
-                        modified = True
-                        j += 1
-                    j += 1
-                i += 1
-            #print("EEEE", modified, ignore_sgs)
+    def components(self):
+        # list of sets of nodes, ordered by their smallest node
+        if self.stale:
+            self.rebuild()
+        sgs = {}
+        for node in self.parent:
+            sgs.setdefault(self.find(node), set()).add(node)
+        return sorted(sgs.values(), key=min)
 
-            if not modified:
-                #print("ende")
-                break
-            #sglen = len(ignore_sgs)
 
-    finalsgs = []
-    for i, sg in enumerate(subgraphs):
-        if i not in ignore_sgs:
-            #print("TTTT", sg)
-            finalsgs.append(sg)
-    return finalsgs
+def findsubgraphs(triples):
+    return Components(triples).components()
 
 
 if __name__ == "__main__":
@@ -317,6 +317,12 @@ function info(event) {
 	console.log("INFO()", node, node.id, lastclickededge);
 	unhighlight();
 
+	if (node.id.startsWith("collapsed#")) {
+		// show the hidden neighbours of an instance
+		expandnode(node.id.split("#")[1]);
+		return;
+	}
+
 	if (readonly) {
 		return;
 	}
@@ -574,11 +580,46 @@ function click_docgraph(event, key, i, j) {
 	});
 }
 
+var expandednodes = []; // variables of collapsed instances the user has expanded in sentence expandedsentnum
+var expandedsentnum = null;
+
+function expandnode(variable) {
+	if (expandedsentnum != currentsentnum) {
+		expandednodes = [];
+		expandedsentnum = currentsentnum;
+	}
+	expandednodes.push(variable);
+	$("#resultat").empty(); // vider le div
+	$.ajax({
+		url: 'read',
+		type: 'GET',
+		data: { "num": currentsentnum,
+			"reverse_of": reverseof,
+			"withalignments": graphwithaligns,
+			"expand": expandednodes.join(",")
+		},
+		success: function (data) {
+			formatAMR(data);
+		},
+		error: function (data) {
+			$("#resultat").append('<div class="error" id="error">');
+			if (data.responseJSON == undefined) {
+				$('#error').append("serveur not responding");
+			} else {
+				$('#error').append(data.responseJSON.error);
+			}
+		}
+	});
+}
+
 function runcommand(params) {
 	params["num"] = currentsentnum;
 	params["prevmod"] = prevmod;
 	params["reverse_of"] = reverseof;
 	params["withalignments"] = graphwithaligns;
+	if (expandedsentnum == currentsentnum && expandednodes.length > 0) {
+		params["expand"] = expandednodes.join(",");
+	}
 	//URL_BASE = 'http://' + window.location.host + '/edit';
 	URL_BASE = 'edit';
 	$("#resultat").empty(); // vider le div
@@ -909,7 +950,16 @@ function formatAMR(data) {
 	//if (reverseof) {
 	//	$('#innersvggraph_' + currentsentnum).append(data.svg_canon.replace(/<svg /, '<svg onmousedown="info(event);" '));
 	//} else {
-		$('#innersvggraph_' + currentsentnum).append(data.svg.replace(/<svg /, '<svg onmousedown="info(event);" '));
+		if (data.leansvg || data.degraded) {
+			// tooltips are loaded when needed
+			$('#innersvggraph_' + currentsentnum).append(data.svg.replace(/<svg /, '<svg onmousedown="info(event);" onmouseover="conceptdoc(event);" '));
+		} else {
+			$('#innersvggraph_' + currentsentnum).append(data.svg.replace(/<svg /, '<svg onmousedown="info(event);" '));
+		}
+		if (data.degraded) {
+			// graphviz took too long, the server rendered a simplified graph
+			$('#innersvggraph_' + currentsentnum).append('<span class="info">simplified graph (rendering took too long)</span>');
+		}
 	//}
 
 	if ('#innersvggraph_' + currentsentnum in visible_divselectors && visible_divselectors['#innersvggraph_' + currentsentnum] == false) {
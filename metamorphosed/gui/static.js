@@ -0,0 +1,143 @@
+/*
+ This library is under the 3-Clause BSD License
+
+ Copyright (c) 2022-2025,  Orange
+ All rights reserved.
+
+ Redistribution and use in source and binary forms, with or without
+ modification, are permitted provided that the following conditions are met:
+	* Redistributions of source code must retain the above copyright
+	  notice, this list of conditions and the following disclaimer.
+
+	* Redistributions in binary form must reproduce the above copyright
+	  notice, this list of conditions and the following disclaimer in the
+	  documentation and/or other materials provided with the distribution.
+
+	* Neither the name of Orange nor the
+	  names of its contributors may be used to endorse or promote products
+	  derived from this software without specific prior written permission.
+
+ THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+ WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+ DISCLAIMED. IN NO EVENT SHALL ORANGE BE LIABLE FOR ANY
+ DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+ (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+ LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+ ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+ (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+ SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+ SPDX-License-Identifier: BSD-3-Clause
+ Software Name: MetAMoRphosED AMR-Editor
+ Author: Johannes Heinecke
+
+// viewer for sentences exported by static_export.py (no metamorphosed server needed)
+// index.json: filename, numsent, shardsize, shards (list of files with id and text of shardsize sentences)
+// sentences/<num>.json: penman, svg, warnings etc. of a sentence
+
+var index = null;
+var shards = {}; // shard number: [{num, id, text, hash}, ...]
+var currentsentnum = 1;
+
+function highlight_pm(amr) {
+	// same as in animation.js
+	var output = amr.replace(/("[^\"]+")/g, '<span class="literal">$1</span> '); // " // hightlight strings
+	output = output.replace(/(:quant|:value|:op[0-9]) ([a-z0-9\.]+)/g, '$1 <span class="literal">$2</span> '); // highlight non-string literals
+	output = output.replace(/([a-z]+[a-z0-9]*) \//g, ' <span class="conceptslash">$1</span> <b>/</b>'); // highlight variables
+	output = output.replace(/:([ARGa-z0-9-]+[0-9]?)/g, function (match, p1) { return ' <span class="' + p1.replace("-of", "") + 'text">:' + p1 + '</span>' }); //  highlight relations
+	return output;
+}
+
+function escapehtml(text) {
+	if (!text) {
+		return "";
+	}
+	return text.replaceAll("&", "&amp;").replaceAll("<", "&lt;").replaceAll(">", "&gt;");
+}
+
+function getshard(sentnum) {
+	// load (only once) the part of the index which contains sentnum
+	var shardnum = Math.floor((sentnum - 1) / index.shardsize);
+	if (shardnum in shards) {
+		return Promise.resolve(shards[shardnum]);
+	}
+	return fetch(index.shards[shardnum])
+		.then(response => response.json())
+		.then(data => { shards[shardnum] = data; return data; });
+}
+
+function showsentencelist(sentnum) {
+	// sentences of the current shard in the select list
+	getshard(sentnum).then(shard => {
+		var select = document.getElementById("sentencelist");
+		select.innerHTML = "";
+		for (const entry of shard) {
+			var option = document.createElement("option");
+			option.value = entry.num;
+			option.text = entry.num + ": " + (entry.id || "") + " " + (entry.text || "");
+			option.selected = entry.num == sentnum;
+			select.appendChild(option);
+		}
+	});
+}
+
+function showsentence(sentnum) {
+	if (sentnum < 1 || sentnum > index.numsent) {
+		return;
+	}
+	currentsentnum = sentnum;
+	document.getElementById("currentnum").innerHTML = sentnum;
+	document.getElementById("sentnum").value = sentnum;
+	window.location.hash = sentnum;
+	showsentencelist(sentnum);
+
+	fetch("sentences/" + sentnum + ".json")
+		.then(response => response.json())
+		.then(data => {
+			if (data.num != currentsentnum) {
+				// user clicked on another sentence in the meantime
+				return;
+			}
+			var html = "<h4>" + escapehtml(data.id) + "</h4>";
+			html += '<div><span class="sentencetext">' + escapehtml(data.text) + "</span></div>";
+			if (data.comments) {
+				html += '<pre class="comments">' + escapehtml(data.comments) + "</pre>";
+			}
+			document.getElementById("currentsentenceinfo").innerHTML = html;
+
+			html = "";
+			if (data.warning) {
+				html += '<div class="error"><ul id="error">';
+				for (const w of data.warning) {
+					html += "<li>" + w;
+				}
+				html += "</ul></div>";
+			}
+			html += '<div id="gresultat"><div id="g1resultat"><div class="penman"><pre>' + highlight_pm(data.penman) + "</pre></div></div>";
+			html += '<div id="g2resultat"><div class="svggraph">' + data.svg + "</div></div></div>";
+			if (data.framedoc) {
+				html += '<div class="documentation"><div class="doctext">' + data.framedoc + "</div></div>";
+			}
+			document.getElementById("resultat").innerHTML = html;
+		});
+}
+
+window.onload = function () {
+	fetch("index.json")
+		.then(response => response.json())
+		.then(data => {
+			index = data;
+			document.getElementById("filename").innerHTML = escapehtml(index.filename);
+			document.getElementById("numsent").innerHTML = index.numsent;
+			var sentnum = parseInt(window.location.hash.substring(1));
+			showsentence(isNaN(sentnum) ? 1 : sentnum);
+		});
+
+	document.getElementById("first").onclick = function () { showsentence(1); };
+	document.getElementById("preceding").onclick = function () { showsentence(currentsentnum - 1); };
+	document.getElementById("next").onclick = function () { showsentence(currentsentnum + 1); };
+	document.getElementById("last").onclick = function () { showsentence(index.numsent); };
+	document.getElementById("lire").onclick = function () { showsentence(parseInt(document.getElementById("sentnum").value)); };
+	document.getElementById("sentencelist").onchange = function () { showsentence(parseInt(this.value)); };
+};
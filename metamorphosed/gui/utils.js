@@ -143,9 +143,37 @@ function getAncestor(element) {
 	//console.log("element id:", element.id, "class:", element.getAttribute("class"));
 	if (element.nodeName == "svg"
 		|| element.getAttribute("class") === "node"
-		|| element.getAttribute("class") === "edge") {
+		|| element.getAttribute("class") === "edge"
+		|| (element.getAttribute("class") || "").startsWith("edge ")) {
+		// edges of lean SVG graphs have the relation as second class
 		return element;
 	} else {
 		return getAncestor(element.parentNode);
 	}
 }
+
+var conceptdocs = {};
+
+function conceptdoc(event) {
+	// lean SVG graphs do not contain the PropBank documentation of the concepts,
+	// we get it from the server when the mouse is over a node and put it into the title (tooltip) of the node
+	var node = event.target.closest("g.node");
+	if (node == null || !node.id.startsWith("node#")) {
+		return;
+	}
+	var concept = node.id.split("#")[2];
+	var title = node.querySelector("title");
+	if (concept in conceptdocs) {
+		title.textContent = conceptdocs[concept];
+		return;
+	}
+	$.ajax({
+		url: "conceptdoc",
+		type: "GET",
+		data: { "concept": concept },
+		success: function (data) {
+			conceptdocs[concept] = data.doc;
+			title.textContent = data.doc;
+		}
+	});
+}
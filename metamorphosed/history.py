@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+
+# This library is under the 3-Clause BSD License
+#
+# Copyright (c) 2026,  Orange
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Orange nor the
+#      names of its contributors may be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL ORANGE BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+# Software Name: MetAMoRphosED AMR-Editor
+# Author: Johannes Heinecke
+
+# undo/redo history of every sentence.
+# A state is a dict of the parts of a sentence which can be modified (graph, comments, alignments, ...).
+# Parts which did not change since the preceding state of the same sentence are shared with it (and not copied).
+# Only the state on top of a stack is complete, the tuples (triples, comments) of the other states are kept as
+# the differences (Delta) to those of the state above them.
+# The number of undo states of a sentence and the (estimated) memory used by all (undo and redo) states are limited,
+# the oldest states are dropped first
+
+import collections
+import difflib
+import json
+
+
+class Delta:
+    # a tuple kept as the differences to another tuple (base)
+    def __init__(self, base, value):
+        self.changes = [] # (start, end, elements of value which replace base[start:end])
+        for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, base, value).get_opcodes():
+            if tag != "equal":
+                self.changes.append((i1, i2, value[j1:j2]))
+        self.size = sum(24 + 8 * len(elems) for _, _, elems in self.changes)
+
+    def apply(self, base):
+        value = []
+        pos = 0
+        for start, end, elems in self.changes:
+            value.extend(base[pos:start])
+            value.extend(elems)
+            pos = end
+        value.extend(base[pos:])
+        return tuple(value)
+
+
+class History:
+    def __init__(self, maxdepth=100, maxbytes=64 * 1024 * 1024):
+        self.maxdepth = maxdepth # max number of undo states per sentence (0: no limit)
+        self.maxbytes = maxbytes # max estimated size of all states (0: no limit)
+        self.undostacks = {} # sentnum: deque of states
+        self.redostacks = {} # sentnum: [states]
+        self.size = 0
+        self.seq = 0
+        self.order = collections.deque() # (seq, sentnum, redo) of undo and redo states, oldest first
+        self.count = 0 # number of undo and redo states
+        self.dropped = 0 # number of states dropped because of maxdepth or maxbytes
+
+    def undos(self, sentnum):
+        return len(self.undostacks.get(sentnum, ()))
+
+    def redos(self, sentnum):
+        return len(self.redostacks.get(sentnum, ()))
+
+    def share(self, state, previous):
+        # use the parts of previous which are equal to those of state
+        # and estimate the memory needed by the parts which are not shared
+        sizes = {}
+        for k, v in state.items():
+            if previous is not None and k in previous and (previous[k] is v or previous[k] == v):
+                state[k] = previous[k]
+                sizes[k] = 0
+            elif isinstance(v, str):
+                sizes[k] = len(v)
+            elif isinstance(v, tuple):
+                # tuples of triples or comments, their elements are shared with the sentence
+                sizes[k] = 8 * len(v)
+            else:
+                sizes[k] = len(json.dumps(v))
+        state["sizes"] = sizes
+        state["size"] = sum(sizes.values())
+
+    def resize(self, state, k, size):
+        self.size += size - state["sizes"][k]
+        state["size"] += size - state["sizes"][k]
+        state["sizes"][k] = size
+
+    def encode(self, state, above):
+        # keep the tuples of state as differences to those of the state above.
+        # Tuples shared with the state below (size 0) are kept there anyway
+        for k, size in state["sizes"].items():
+            v = state[k]
+            if size and isinstance(v, tuple) and isinstance(above.get(k), tuple) and v is not above[k]:
+                state[k] = Delta(above[k], v)
+                self.resize(state, k, state[k].size)
+
+    def decode(self, state, above):
+        # state is again on top of its stack
+        for k in state["sizes"]:
+            if isinstance(state[k], Delta):
+                state[k] = state[k].apply(above[k])
+                self.resize(state, k, 8 * len(state[k]))
+
+    def top(self, stacks, sentnum):
+        stack = stacks.get(sentnum)
+        if stack:
+            return stack[-1]
+        return None
+
+    def add(self, stacks, sentnum, state):
+        self.seq += 1
+        state["seq"] = self.seq
+        stack = stacks.setdefault(sentnum, collections.deque())
+        if stack:
+            self.encode(stack[-1], state)
+        stack.append(state)
+        self.size += state["size"]
+        self.order.append((state["seq"], sentnum, stacks is self.redostacks))
+        self.count += 1
+
+    def pop(self, stacks, sentnum):
+        state = stacks[sentnum].pop()
+        if stacks[sentnum]:
+            self.decode(stacks[sentnum][-1], state)
+        else:
+            del stacks[sentnum]
+        self.size -= state["size"]
+        self.count -= 1
+        return state
+
+    def push(self, sentnum, state):
+        # state of the sentence before a modification
+        self.share(state, self.top(self.undostacks, sentnum))
+        self.add(self.undostacks, sentnum, state)
+        for redo in self.redostacks.pop(sentnum, []):
+            self.size -= redo["size"]
+            self.count -= 1
+        self.trim(sentnum)
+
+    def undo(self, sentnum, current):
+        # returns the state to restore (None if there is none). current goes onto the redo stack
+        if not self.undos(sentnum):
+            return None
+        state = self.pop(self.undostacks, sentnum)
+        self.share(current, state)
+        self.add(self.redostacks, sentnum, current)
+        self.trim(sentnum)
+        return state
+
+    def redo(self, sentnum, current):
+        # returns the state to restore (None if there is none). current goes onto the undo stack
+        if not self.redos(sentnum):
+            return None
+        state = self.pop(self.redostacks, sentnum)
+        self.share(current, state)
+        self.add(self.undostacks, sentnum, current)
+        self.trim(sentnum)
+        return state
+
+    def trim(self, sentnum):
+        if self.maxdepth:
+            while len(self.undostacks.get(sentnum, ())) > self.maxdepth:
+                self.dropoldest(sentnum)
+
+        if self.maxbytes:
+            while self.size > self.maxbytes and self.order:
+                seq, num, redo = self.order.popleft()
+                stacks = self.redostacks if redo else self.undostacks
+                if num in stacks and stacks[num][0]["seq"] == seq:
+                    # the oldest undo state or the redo state which is the farthest away
+                    self.dropoldest(num, stacks)
+
+        if len(self.order) > 2 * self.count + 100:
+            # forget states which are no longer on a stack
+            self.order = collections.deque(sorted((state["seq"], num, stacks is self.redostacks)
+                                                  for stacks in (self.undostacks, self.redostacks)
+                                                  for num, stack in stacks.items() for state in stack))
+
+    def dropoldest(self, sentnum, stacks=None):
+        if stacks is None:
+            stacks = self.undostacks
+        state = stacks[sentnum].popleft()
+        if not stacks[sentnum]:
+            del stacks[sentnum]
+        self.size -= state["size"]
+        self.count -= 1
+        self.dropped += 1
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+# This library is under the 3-Clause BSD License
+#
+# Copyright (c) 2026,  Orange
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Orange nor the
+#      names of its contributors may be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL ORANGE BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+# Software Name: MetAMoRphosED AMR-Editor
+# Author: Johannes Heinecke
+
+# AMRProcessors for the sentences of a document. Processors are created when a sentence is
+# accessed for the first time. If maxsize > 0 the least recently used processors are dropped
+# as soon as there are more than maxsize of them. Modified processors are never dropped
+# until they are written (ap.write() resets ap.modified)
+
+import collections
+import threading
+
+import metamorphosed.amreditor as amreditor
+
+
+class ProcessorPool:
+    def __init__(self, sentences, umr=False, maxsize=0):
+        self.sentences = sentences # list of AMRsentence/UMRsentence
+        self.umr = umr
+        self.maxsize = maxsize # 0: no limit
+        self.aps = collections.OrderedDict() # sentnum: AMRProcessor, least recently used first
+        self.prevmods = {} # sentnum: previous_modification of evicted processors
+        self.lock = threading.RLock()
+        self.created = 0
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self.sentences)
+
+    def __iter__(self):
+        # sentence numbers start at 1
+        return iter(range(1, len(self.sentences) + 1))
+
+    def __contains__(self, sentnum):
+        return isinstance(sentnum, int) and 0 < sentnum <= len(self.sentences)
+
+    def __getitem__(self, sentnum):
+        if sentnum not in self:
+            raise KeyError(sentnum)
+        with self.lock:
+            ap = self.aps.get(sentnum)
+            if ap is None:
+                ap = self.create(sentnum)
+                self.aps[sentnum] = ap
+                self.evict()
+            else:
+                self.aps.move_to_end(sentnum)
+            return ap
+
+    def __setitem__(self, sentnum, ap):
+        # replace the processor of a sentence (e.g. after modpenman or undo)
+        if sentnum not in self:
+            raise KeyError(sentnum)
+        with self.lock:
+            self.aps[sentnum] = ap
+            self.aps.move_to_end(sentnum)
+            self.evict()
+
+    def get(self, sentnum, default=None):
+        if sentnum not in self:
+            return default
+        return self[sentnum]
+
+    def peek(self, sentnum):
+        # the processor of sentnum if it exists (neither created nor marked as used)
+        return self.aps.get(sentnum)
+
+    def isloaded(self, sentnum):
+        # True if a processor exists for sentnum (without creating it)
+        return sentnum in self.aps
+
+    def loaded(self):
+        return list(self.aps.keys())
+
+    def create(self, sentnum):
+        cursentence = self.sentences[sentnum - 1]
+        ap = amreditor.AMRProcessor()
+        if self.umr:
+            ap.umr_varprefix = cursentence.varprefix
+            ap.alignments = cursentence.getcopy()
+            ap.docgraph = cursentence.docgraph.getcopy()
+        ap.lastpm = cursentence.amr
+        ap.previous_modification = self.prevmods.get(sentnum, 0)
+        self.created += 1
+        return ap
+
+    def evict(self):
+        if self.maxsize <= 0 or len(self.aps) <= self.maxsize:
+            return
+        # the most recently used processor (the current one) is never dropped
+        for sentnum in list(self.aps.keys())[:-1]:
+            if len(self.aps) <= self.maxsize:
+                break
+            ap = self.aps[sentnum]
+            if ap.modified:
+                continue
+            if ap.isparsed and ap.valid:
+                # keep the last (reformatted) PENMAN for the file
+                self.sentences[sentnum - 1].amr = ap.write()
+            if ap.previous_modification:
+                self.prevmods[sentnum] = ap.previous_modification
+            del self.aps[sentnum]
+            self.evicted += 1
+
+    def stats(self):
+        return {"sentences": len(self.sentences),
+                "loaded": len(self.aps),
+                "maxsize": self.maxsize,
+                "created": self.created,
+                "evicted": self.evicted}
@@ -36,12 +36,20 @@
 
 # loads propbank frames in XML format
 # https://github.com/propbank/propbank-frames/ or AMR3 data
+import concurrent.futures
 import glob
+import hashlib
 import os
+import pickle
 import re
 import xml.etree.ElementTree as ET
 import sys
 
+import metamorphosed.validation as validation
+
+# to be incremented if the format of the data in the cache file changes
+CACHEVERSION = 1
+
 
 class Lemma:
     def __init__(self, lemma):
@@ -103,116 +111,105 @@ class Example:
 
 
 class PropBankFrames:
-    def __init__(self, dirname, onlyinuse=True):
+    def __init__(self, dirname, onlyinuse=True, cachedir=None, workers=0):
         self.lemmas = {}
         #self.rolesets = set() # all valid rolesets like take-01 etc
         self.rolesets = {} # take-01: RoleSet
         self.roleset_args = {} # take-01: { ARG0: "taker" .... }
         self.rolesets_lemma = {} # take-01: take
+        self.parsedfiles = 0 # number of xml files parsed (i.e. not found in cache)
 
         #self.parsefile("%s/finance.xml" % dirname)
         #return
 
-        i = 0
-        for i, fn in enumerate(sorted(glob.glob("%s/*.xml" % dirname))):
-            #print(fn)
-            self.parsefile(fn, onlyinuse)
-            #break
-        print("%d framesets loaded" % (i + 1), file=sys.stderr)
+        files = sorted(glob.glob("%s/*.xml" % dirname))
+        cachefile = None
+        cached = {} # fn: ((mtime, size), entries)
+        if cachedir and files:
+            cachefile = self.cachefilename(cachedir, dirname, onlyinuse)
+            cached = self.readcache(cachefile, onlyinuse)
+
+        keys = {} # fn: (mtime, size)
+        todo = [] # new or modified files
+        for fn in files:
+            st = os.stat(fn)
+            keys[fn] = (st.st_mtime_ns, st.st_size)
+            if fn not in cached or cached[fn][0] != keys[fn]:
+                todo.append(fn)
+        parsed = self.parsefiles(todo, onlyinuse, workers)
+        self.parsedfiles = len(parsed)
+
+        # add in the order of the sorted file names, to get the same result as a serial loading
+        newcache = {}
+        for fn in files:
+            if fn in parsed:
+                entries = parsed[fn]
+            else:
+                entries = cached[fn][1]
+            newcache[fn] = (keys[fn], entries)
+            self.add(entries)
+
+        if cachefile and (self.parsedfiles or len(newcache) != len(cached)):
+            self.writecache(cachefile, onlyinuse, newcache)
+        print("%d framesets loaded (%d parsed)" % (len(files), self.parsedfiles), file=sys.stderr)
 
         #for rs in self.roleset_args:
         #    print(rs)
         #    for a in self.roleset_args[rs]:
         #        print("   ", a, self.roleset_args[rs][a])
 
+    def parsefiles(self, files, onlyinuse, workers=0):
+        # parse files, using a pool of workers processes if workers > 1
+        if workers <= 1 or len(files) < 2:
+            return {fn: parseframefile(fn, onlyinuse) for fn in files}
+
+        chunksize = max(1, len(files) // (workers * 4))
+        chunks = [files[i:i + chunksize] for i in range(0, len(files), chunksize)]
+        parsed = {}
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            for chunk, results in zip(chunks, executor.map(parseframefiles, chunks, [onlyinuse] * len(chunks))):
+                for fn, entries in zip(chunk, results):
+                    parsed[fn] = entries
+        return parsed
+
+    def cachefilename(self, cachedir, dirname, onlyinuse):
+        # one cache file per frames directory and value of onlyinuse
+        h = hashlib.sha1(("%s %s" % (os.path.abspath(dirname), onlyinuse)).encode("utf8")).hexdigest()
+        return os.path.join(cachedir, "propbank-frames-%s.pickle" % h[:16])
+
+    def readcache(self, cachefile, onlyinuse):
+        if not os.path.isfile(cachefile):
+            return {}
+        try:
+            with open(cachefile, "rb") as ifp:
+                data = pickle.load(ifp)
+            if data.get("version") == CACHEVERSION and data.get("onlyinuse") == onlyinuse:
+                return data["files"]
+        except Exception as e:
+            print("cannot read PropBank cache %s: %s" % (cachefile, e), file=sys.stderr)
+        return {}
+
+    def writecache(self, cachefile, onlyinuse, files):
+        try:
+            os.makedirs(os.path.dirname(cachefile), exist_ok=True)
+            tmpfile = "%s.%d" % (cachefile, os.getpid())
+            with open(tmpfile, "wb") as ofp:
+                pickle.dump({"version": CACHEVERSION, "onlyinuse": onlyinuse, "files": files}, ofp, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmpfile, cachefile)
+        except Exception as e:
+            print("cannot write PropBank cache %s: %s" % (cachefile, e), file=sys.stderr)
+
+    def add(self, entries):
+        # add the lemmas and rolesets of a file parsed by parseframefile()
+        for lemma, rolesets in entries:
+            self.lemmas[lemma.lemma] = lemma
+            for rs, roleset, roleset_args in rolesets:
+                self.rolesets_lemma[rs] = lemma.lemma
+                self.rolesets[rs] = roleset
+                self.roleset_args[rs] = roleset_args
+
     def parsefile(self, fn, onlyinuse=False):
-        tree = ET.parse(fn)
-        #print("FN", fn)
-        for predicate in tree.getroot():
-            if predicate.tag == "predicate":
-                #print("PRED", predicate.attrib)
-                lemma = Lemma(predicate.attrib["lemma"].replace("_", "-"))
-                self.lemmas[lemma.lemma] = lemma
-                #print("LLLL", lemma)
-                for predicateChild in predicate:
-                    if predicateChild.tag == "roleset":
-                        #print("   ",predicateChild.attrib)
-                        roleset = Roleset(predicateChild.attrib["id"], predicateChild.attrib["name"])
-                        roleset_args = {} # ARG0: Taker, ...
-                        inuse = True
-                        for rolesetChild in predicateChild:
-                            #print("     ",rolesetChild)
-                            if rolesetChild.tag == "roles":
-                                for rolesChild in rolesetChild:
-                                    if rolesChild.tag == "role":
-                                        #print("         ", rolesChild.tag, rolesChild.attrib)
-                                        argno = rolesChild.attrib["n"]
-                                        roleset.roles[argno] = (rolesChild.attrib["descr"], rolesChild.attrib["f"])
-                                        roleset_args[":ARG" + argno] = rolesChild.attrib["descr"]
-
-                                        roleset.rolelinks[argno] = set()
-                                        for rolelinksChild in rolesChild:
-                                            if rolelinksChild.tag == "rolelinks":
-                                                for rolelinkChild in rolelinksChild:
-                                                    if rolelinkChild.tag == "rolelink" and rolelinkChild.attrib["resource"] == "VerbNet":
-                                                        roleset.rolelinks[argno].add(rolelinkChild.text)
-                                                        #print("AAA", rolelinkChild.text)
-                            elif rolesetChild.tag == "usagenotes":
-                                for usage in rolesetChild:
-                                    if usage.tag == "usage":
-                                        if usage.attrib.get("resource") == "AMR" \
-                                           and usage.attrib.get("version") == "2019" \
-                                           and usage.attrib.get("inuse") == "-":
-                                            inuse = False
-                                            #print("Unused: Lemma <%s>, Roleset: <%s>" % (lemma.lemma, roleset.name))
-                            elif rolesetChild.tag == "example":
-                                #print("         ", rolesetChild.attrib)
-                                ex = Example()
-                                for exampleChild in rolesetChild:
-                                    if exampleChild.tag == "text":
-                                        #print("           ", exampleChild, exampleChild.text)
-                                        #roleset.examples.append(exampleChild.text)
-                                        roleset.examples.append(ex)
-                                        ex.text = exampleChild.text
-                                    elif exampleChild.tag == "arg":
-                                        # old format
-                                        if "n" in exampleChild.attrib:
-                                            nn = exampleChild.attrib["n"]
-                                            if nn in "0123456789":
-                                                if exampleChild.text:
-                                                    ex.args["ARG" + nn] = exampleChild.text.replace('[', ' ').replace(']', ' ')
-                                                else:
-                                                    ex.args["ARG" + nn] = ""
-
-                                    elif exampleChild.tag == "rel":
-                                        # oldformat
-                                        ex.rel = exampleChild.text
-                                    elif exampleChild.tag == "propbank":
-                                        # newer format
-                                        for pb in exampleChild:
-                                            if pb.tag == "arg":
-                                                if "type" in pb.attrib:
-                                                    nn = pb.attrib["type"]
-                                                    #print("NNNN", pb.text)
-                                                    if pb.text:
-                                                        if nn.startswith("ARG"):
-                                                            ex.args[nn] = pb.text.replace('[', ' ').replace(']', ' ')
-                                                        else:
-                                                            ex.args[nn] = ""
-                                            elif pb.tag == "rel":
-                                                ex.rel = pb.text
-                        rs = predicateChild.attrib["id"].replace(".", "-").replace("_", "-")
-                        if inuse or onlyinuse is False:
-                            rs = predicateChild.attrib["id"].replace(".", "-").replace("_", "-")
-                            #self.rolesets.add(rs)
-                            self.rolesets_lemma[rs] = lemma.lemma
-                            self.rolesets[rs] = roleset
-                            lemma.rolesets.append(roleset)
-                            self.roleset_args[rs] = roleset_args
-                        #else:
-                        #    print("NOT IN USE", rs, inuse, onlyinuse)
-
-                #print("%s" % lemma)
+        self.add(parseframefile(fn, onlyinuse))
 
     def getdoc(self, triples):
         doclist = []
@@ -252,51 +249,41 @@ class PropBankFrames:
         return None
 
     def validate(self, triples):
-        # check whether the AMR concept is a valid roleset in propbank  frames
+        return validation.validatetriples(self, triples)
+
+    def validatetriple(self, s, p, o, instances):
+        # instances: {var: concept} (at least for s and o)
         errors = []
         if not self.rolesets:
             # no data to check has been loaded
             return []
 
-        for s, p, o in triples:
-
-            if p == ":instance":
-                if o is None:
-                    errors.append("«%s» is an instance of None" % s)
-                else:
-                    elems = o.rsplit("-", 1)
-                    if len(elems) > 1 and (len(elems[1]) <= 3 and elems[1].isnumeric()):
-                        if o not in self.rolesets:
-                            errors.append("«%s» is not a defined propbank roleset" % o)
-                            #for o in sorted(self.rolesets):
-                            #    print("RRR", o)
-                            #assert 1 == 0
-
-        # check whether ARG-relations uses are defined for the roleset
-        # return ARG relations which ar note defined for the given concept
-        instances = {} # var: concept
-
-        for s, p, o in triples:
-            if p == ":instance":
-                instances[s] = o
-            #if p not in self.relations:
-            #    errors.append("invalid relation '%s'" % (p))
-
-        for s, p, o in triples:
-            if p != ":instance" and instances[s] in self.roleset_args:
-                if p.startswith(":ARG"):
-                    if p.endswith("-of"):
-                        if o not in instances:
-                            errors.append("invalid argument «%s» for relation «%s»" % (o, p))
-                            continue
-                        else:
-                            concept = instances[o]
-                            p = p[:-3]
+        if p == ":instance":
+            # check whether the AMR concept is a valid roleset in propbank  frames
+            if o is None:
+                errors.append("«%s» is an instance of None" % s)
+            else:
+                elems = o.rsplit("-", 1)
+                if len(elems) > 1 and (len(elems[1]) <= 3 and elems[1].isnumeric()):
+                    if o not in self.rolesets:
+                        errors.append("«%s» is not a defined propbank roleset" % o)
+
+        elif instances.get(s) in self.roleset_args:
+            # check whether ARG-relations uses are defined for the roleset
+            # return ARG relations which ar note defined for the given concept
+            if p.startswith(":ARG"):
+                if p.endswith("-of"):
+                    if o not in instances:
+                        errors.append("invalid argument «%s» for relation «%s»" % (o, p))
+                        return errors
                     else:
-                        concept = instances[s]
+                        concept = instances[o]
+                        p = p[:-3]
+                else:
+                    concept = instances[s]
 
-                    if concept not in self.roleset_args or p not in self.roleset_args[concept]:
-                        errors.append("invalid argument «%s» for concept «%s»" % (p, concept))
+                if concept not in self.roleset_args or p not in self.roleset_args[concept]:
+                    errors.append("invalid argument «%s» for concept «%s»" % (p, concept))
         return errors
 
     def getRole(self, roleset):
@@ -305,6 +292,103 @@ class PropBankFrames:
         return None
 
 
+def parseframefile(fn, onlyinuse=False):
+    # returns [(Lemma, [(roleset-id, Roleset, roleset_args), ...]), ...]
+    entries = []
+    tree = ET.parse(fn)
+    #print("FN", fn)
+    for predicate in tree.getroot():
+        if predicate.tag == "predicate":
+            #print("PRED", predicate.attrib)
+            lemma = Lemma(predicate.attrib["lemma"].replace("_", "-"))
+            rolesets = []
+            entries.append((lemma, rolesets))
+            #print("LLLL", lemma)
+            for predicateChild in predicate:
+                if predicateChild.tag == "roleset":
+                    #print("   ",predicateChild.attrib)
+                    roleset = Roleset(predicateChild.attrib["id"], predicateChild.attrib["name"])
+                    roleset_args = {} # ARG0: Taker, ...
+                    inuse = True
+                    for rolesetChild in predicateChild:
+                        #print("     ",rolesetChild)
+                        if rolesetChild.tag == "roles":
+                            for rolesChild in rolesetChild:
+                                if rolesChild.tag == "role":
+                                    #print("         ", rolesChild.tag, rolesChild.attrib)
+                                    argno = rolesChild.attrib["n"]
+                                    roleset.roles[argno] = (rolesChild.attrib["descr"], rolesChild.attrib["f"])
+                                    roleset_args[":ARG" + argno] = rolesChild.attrib["descr"]
+
+                                    roleset.rolelinks[argno] = set()
+                                    for rolelinksChild in rolesChild:
+                                        if rolelinksChild.tag == "rolelinks":
+                                            for rolelinkChild in rolelinksChild:
+                                                if rolelinkChild.tag == "rolelink" and rolelinkChild.attrib["resource"] == "VerbNet":
+                                                    roleset.rolelinks[argno].add(rolelinkChild.text)
+                                                    #print("AAA", rolelinkChild.text)
+                        elif rolesetChild.tag == "usagenotes":
+                            for usage in rolesetChild:
+                                if usage.tag == "usage":
+                                    if usage.attrib.get("resource") == "AMR" \
+                                       and usage.attrib.get("version") == "2019" \
+                                       and usage.attrib.get("inuse") == "-":
+                                        inuse = False
+                                        #print("Unused: Lemma <%s>, Roleset: <%s>" % (lemma.lemma, roleset.name))
+                        elif rolesetChild.tag == "example":
+                            #print("         ", rolesetChild.attrib)
+                            ex = Example()
+                            for exampleChild in rolesetChild:
+                                if exampleChild.tag == "text":
+                                    #print("           ", exampleChild, exampleChild.text)
+                                    #roleset.examples.append(exampleChild.text)
+                                    roleset.examples.append(ex)
+                                    ex.text = exampleChild.text
+                                elif exampleChild.tag == "arg":
+                                    # old format
+                                    if "n" in exampleChild.attrib:
+                                        nn = exampleChild.attrib["n"]
+                                        if nn in "0123456789":
+                                            if exampleChild.text:
+                                                ex.args["ARG" + nn] = exampleChild.text.replace('[', ' ').replace(']', ' ')
+                                            else:
+                                                ex.args["ARG" + nn] = ""
+
+                                elif exampleChild.tag == "rel":
+                                    # oldformat
+                                    ex.rel = exampleChild.text
+                                elif exampleChild.tag == "propbank":
+                                    # newer format
+                                    for pb in exampleChild:
+                                        if pb.tag == "arg":
+                                            if "type" in pb.attrib:
+                                                nn = pb.attrib["type"]
+                                                #print("NNNN", pb.text)
+                                                if pb.text:
+                                                    if nn.startswith("ARG"):
+                                                        ex.args[nn] = pb.text.replace('[', ' ').replace(']', ' ')
+                                                    else:
+                                                        ex.args[nn] = ""
+                                        elif pb.tag == "rel":
+                                            ex.rel = pb.text
+                    rs = predicateChild.attrib["id"].replace(".", "-").replace("_", "-")
+                    if inuse or onlyinuse is False:
+                        rs = predicateChild.attrib["id"].replace(".", "-").replace("_", "-")
+                        #self.rolesets.add(rs)
+                        lemma.rolesets.append(roleset)
+                        rolesets.append((rs, roleset, roleset_args))
+                    #else:
+                    #    print("NOT IN USE", rs, inuse, onlyinuse)
+
+            #print("%s" % lemma)
+    return entries
+
+
+def parseframefiles(fns, onlyinuse=False):
+    # used by worker processes in PropBankFrames.parsefiles()
+    return [parseframefile(fn, onlyinuse) for fn in fns]
+
+
 if __name__ == "__main__":
     curdir = os.path.dirname(os.path.abspath(__file__))
     pf = PropBankFrames(curdir + "/propbank-frames/frames/")
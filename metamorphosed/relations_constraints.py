@@ -38,6 +38,8 @@ import re
 
 import yaml
 
+import metamorphosed.validation as validation
+
 # Format
 # subjects:
 #   subject-class:
@@ -152,72 +154,74 @@ class Constraints:
             self.P = {} # p: Predicate
 
     def validate(self, triples, debug=False):
+        if not debug:
+            return validation.validatetriples(self, triples)
+
         errors = []
-        classes = {} # inst: class
+        classes = validation.getconcepts(triples) # inst: class
+        print("instances:")
+        for i, c in classes.items():
+            print("  ", i, c)
         for s, p, o in triples:
-            # we must know of which class an instance instantiates
-            if p == ":instance":
-                classes[s] = o
-
-        if debug:
-            print("instances:")
-            for i, c in classes.items():
-                print("  ", i, c)
+            errors += self.validatetriple(s, p, o, classes, debug)
+        return errors
 
+    def validatetriple(self, s, p, o, classes, debug=False):
+        # classes: {inst: class}, we must know of which class an instance instantiates (at least for s and o)
+        errors = []
         #for k in self.S:
         #    print ("QQQ", k, self.S[k])
-        for s, p, o in triples:
-            if p != ":instance":
+        if p != ":instance":
+            if debug:
+                print("\ntriple", s, p, o)
+            if p.endswith("-of"):
+                oclass = classes.get(s)
+                sclass = classes.get(o)
+            else:
+                sclass = classes.get(s)
+                oclass = classes.get(o)
+
+            if sclass in self.S:
                 if debug:
-                    print("\ntriple", s, p, o)
-                if p.endswith("-of"):
-                    oclass = classes.get(s)
-                    sclass = classes.get(o)
-                else:
-                    sclass = classes.get(s)
-                    oclass = classes.get(o)
-
-                if sclass in self.S:
-                    if debug:
-                        print("TEST SUBJECT %s/%s %s" % (s, sclass, p))
-                    S = self.S[sclass]
-
-                    if p not in S.predicates:
-                        ok = False
-                        for reobj, P in S.predicates_regex:
-                            #print("AAA", reobj, P)
-                            if reobj.match(p) and P.valid(o, oclass):
-                                ok = True
-                                break
-                        if not ok:
-                            errors.append("instance «%s» of «%s» has an invalid relation «%s»" % (s, sclass, p))
-                        continue
-                    if S.predicates[p] is not None:
-                        P = S.predicates[p]
-                        ok = P.valid(o, oclass)
-
-                        if not ok:
-                            errors.append("instance «%s» of «%s» with relation «%s» has invalid object «%s» of «%s»" % (s, sclass, p, o, oclass))
-                            continue
-
-                if EMPTY_SUBJECT in self.S:
-                    empty = self.S[EMPTY_SUBJECT]
-                    if p in empty.predicates:
-                        P = empty.predicates[p]
-                        ok = P.valid(o, oclass)
-                        if not ok:
-                            errors.append("relation «%s» has invalid object «%s» of «%s»" % (p, o, oclass))
-                            continue
-
-                    if empty.predicates_regex:
-                        ok = True
-                        for reobj, P in empty.predicates_regex:
-                            #print("AAA", reobj, P)
-                            if reobj.match(p) and not P.valid(o, oclass):
-                                ok = False
-
-                        if not ok:
-                            errors.append("relation «%s» has invalid object «%s» of «%s»" % (p, o, oclass))
+                    print("TEST SUBJECT %s/%s %s" % (s, sclass, p))
+                S = self.S[sclass]
+
+                if p not in S.predicates:
+                    ok = False
+                    for reobj, P in S.predicates_regex:
+                        #print("AAA", reobj, P)
+                        if reobj.match(p) and P.valid(o, oclass):
+                            ok = True
+                            break
+                    if not ok:
+                        errors.append("instance «%s» of «%s» has an invalid relation «%s»" % (s, sclass, p))
+                    return errors
+                if S.predicates[p] is not None:
+                    P = S.predicates[p]
+                    ok = P.valid(o, oclass)
+
+                    if not ok:
+                        errors.append("instance «%s» of «%s» with relation «%s» has invalid object «%s» of «%s»" % (s, sclass, p, o, oclass))
+                        return errors
+
+            if EMPTY_SUBJECT in self.S:
+                empty = self.S[EMPTY_SUBJECT]
+                if p in empty.predicates:
+                    P = empty.predicates[p]
+                    ok = P.valid(o, oclass)
+                    if not ok:
+                        errors.append("relation «%s» has invalid object «%s» of «%s»" % (p, o, oclass))
+                        return errors
+
+                if empty.predicates_regex:
+                    ok = True
+                    for reobj, P in empty.predicates_regex:
+                        #print("AAA", reobj, P)
+                        if reobj.match(p) and not P.valid(o, oclass):
+                            ok = False
+
+                    if not ok:
+                        errors.append("relation «%s» has invalid object «%s» of «%s»" % (p, o, oclass))
 
         return errors
 
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+
+# This library is under the 3-Clause BSD License
+#
+# Copyright (c) 2026,  Orange
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Orange nor the
+#      names of its contributors may be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL ORANGE BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+# Software Name: MetAMoRphosED AMR-Editor
+# Author: Johannes Heinecke
+
+# LRU cache for graphs rendered by graphviz (AMRProcessor.dot()). The key contains
+# everything which changes the output (triples, top, highlighted elements, format, ...)
+# so an unchanged graph is never rendered twice by dot
+# DiskRenderCache keeps the final SVGs (AMRProcessor.show()) in a directory, so they
+# are still available after a restart
+
+import collections
+import hashlib
+import json
+import os
+import sys
+import threading
+
+
+def freeze(obj):
+    # transform lists, sets and dicts (also nested) into something hashable
+    if isinstance(obj, dict):
+        return tuple(sorted((k, freeze(v)) for k, v in obj.items()))
+    if isinstance(obj, (set, frozenset)):
+        return frozenset(freeze(x) for x in obj)
+    if isinstance(obj, (list, tuple)):
+        return tuple(freeze(x) for x in obj)
+    return obj
+
+
+def canonical(obj):
+    # transform lists, sets and dicts (also nested) into lists which are always serialised
+    # in the same way (the order of elements in sets differs from one python process to another)
+    if isinstance(obj, dict):
+        return sorted([[canonical(k), canonical(v)] for k, v in obj.items()], key=json.dumps)
+    if isinstance(obj, (set, frozenset)):
+        return sorted([canonical(x) for x in obj], key=json.dumps)
+    if isinstance(obj, (list, tuple)):
+        return [canonical(x) for x in obj]
+    return obj
+
+
+class RenderCache:
+    def __init__(self, maxsize=1000, maxbytes=64 * 1024 * 1024):
+        self.maxsize = maxsize # max number of rendered graphs
+        self.maxbytes = maxbytes # max size of all rendered graphs (0: no limit)
+        self.cache = collections.OrderedDict() # key: rendered graph, least recently used first
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.cache)
+
+    def get(self, key):
+        with self.lock:
+            if key in self.cache:
+                self.hits += 1
+                self.cache.move_to_end(key)
+                return self.cache[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, data):
+        if self.maxsize <= 0 or (self.maxbytes and len(data) > self.maxbytes):
+            return
+        with self.lock:
+            if key in self.cache:
+                self.bytes -= len(self.cache.pop(key))
+            self.cache[key] = data
+            self.bytes += len(data)
+            while len(self.cache) > self.maxsize or (self.maxbytes and self.bytes > self.maxbytes):
+                _, old = self.cache.popitem(last=False)
+                self.bytes -= len(old)
+
+    def clear(self):
+        with self.lock:
+            self.cache.clear()
+            self.bytes = 0
+
+    def stats(self):
+        return {"entries": len(self.cache),
+                "bytes": self.bytes,
+                "maxsize": self.maxsize,
+                "maxbytes": self.maxbytes,
+                "hits": self.hits,
+                "misses": self.misses}
+
+
+class DiskRenderCache:
+    def __init__(self, cachedir, salt=""):
+        self.cachedir = cachedir
+        self.salt = salt # must change if the same graph is rendered differently (other version, other PropBank frames)
+        self.hits = 0
+        self.misses = 0
+        self.written = 0
+        self.lock = threading.Lock()
+        os.makedirs(cachedir, exist_ok=True)
+
+    def key(self, *args):
+        return hashlib.sha256(json.dumps([self.salt, canonical(args)]).encode("utf8")).hexdigest()
+
+    def filename(self, key):
+        return os.path.join(self.cachedir, key[:2], key + ".json")
+
+    def exists(self, key):
+        return os.path.isfile(self.filename(key))
+
+    def get(self, key):
+        fn = self.filename(key)
+        try:
+            with open(fn) as ifp:
+                data = json.load(ifp)
+            with self.lock:
+                self.hits += 1
+            return data
+        except Exception:
+            with self.lock:
+                self.misses += 1
+            return None
+
+    def put(self, key, data):
+        fn = self.filename(key)
+        try:
+            os.makedirs(os.path.dirname(fn), exist_ok=True)
+            tmpfile = "%s.%d.%d" % (fn, os.getpid(), threading.get_ident())
+            with open(tmpfile, "w") as ofp:
+                json.dump(data, ofp)
+            os.replace(tmpfile, fn)
+            with self.lock:
+                self.written += 1
+        except Exception as e:
+            print("cannot write render cache %s: %s" % (fn, e), file=sys.stderr)
+
+    def stats(self):
+        return {"directory": self.cachedir,
+                "hits": self.hits,
+                "misses": self.misses,
+                "written": self.written}
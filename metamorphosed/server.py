@@ -53,6 +53,8 @@ def main():
     parser.add_argument("--relationsdoc", default=None, help="examples for valid AMR-relations (json file), '-' deactivates this option")
     parser.add_argument("--concepts", "-C", default=None, help="list of valid AMR-concepts (simple text file with list of all valid concepts)")
     parser.add_argument("--pbframes", "-P", default=None, help="Propbank frameset documentation (directory with xml files)")
+    parser.add_argument("--pbworkers", default=0, type=int, help="number of processes used to parse Propbank frames which are not in the cache (default 0: no parallel parsing)")
+    parser.add_argument("--pbcache", default=None, help="directory where parsed Propbank frames are cached (default ~/.cache/metamorphosed), '-' deactivates this option")
     parser.add_argument("--constraints", "-c", default=None, help="constraints for subjects and predicates (yaml file)")
     parser.add_argument("--readonly", "--ro", default=False, action="store_true", help='browse corpus only')
     parser.add_argument("--reifications", "-X", default=None, help="table for (de)reification")
@@ -62,6 +64,20 @@ def main():
     parser.add_argument("--smatchpp", "-S", action='store_true', help='use smatchpp (https://github.com/flipz357/smatchpp) instead of smatch')
     parser.add_argument("--preferred", default=None, help="json file with preferred graphs (used together which --compare)")
     parser.add_argument("--umr", action='store_true', help='inpput file is in UMR format')
+    parser.add_argument("--max_processors", default=0, type=int, help="max number of unmodified sentence graphs kept in memory (default 0: no limit)")
+    parser.add_argument("--render_cache", default=1000, type=int, help="max number of rendered graphs kept in memory (default 1000, 0: no cache)")
+    parser.add_argument("--render_cache_mb", default=64, type=int, help="max size in MB of all rendered graphs kept in memory (default 64, 0: no limit)")
+    parser.add_argument("--render_diskcache", default=None, help="directory where rendered graphs are kept between restarts (only with --readonly)")
+    parser.add_argument("--prewarm", default=False, action="store_true", help="render all graphs in the background to fill the directory given with --render_diskcache")
+    parser.add_argument("--export_batch", default=50, type=int, help="number of graphs (SVG) rendered by a single graphviz process when exporting graphs (default 50)")
+    parser.add_argument("--export_workers", default=4, type=int, help="number of threads rendering graphs when exporting graphs (default 4)")
+    parser.add_argument("--prefetch", default=0, type=int, help="render the <n> sentences before and after the displayed sentence in the background (default 0)")
+    parser.add_argument("--lean_svg", default=False, action="store_true", help="send smaller SVG graphs to the editor (edge colours from CSS, tooltips loaded when needed)")
+    parser.add_argument("--render_timeout", default=0, type=float, help="max seconds to render a graph, a simplified graph is rendered if it takes longer (default 0: no limit)")
+    parser.add_argument("--collapse", default=0, type=int, help="display only <n> instances of bigger graphs, the others can be expanded in the editor (default 0: display all)")
+    parser.add_argument("--history_depth", default=100, type=int, help="max number of undo steps per sentence (default 100, 0: no limit)")
+    parser.add_argument("--history_mb", default=64, type=int, help="max size (in MB) of the undo/redo history of all sentences (default 64, 0: no limit)")
+    parser.add_argument("--timings", default=None, help="file to which the time and memory used by the different initialisation phases is appended")
     parser.add_argument("--dockerargs", nargs="+", default=None, help=argparse.SUPPRESS) # only used in the docker image entrypoint
     # format: datadir file [compare1 compare2 ...]
 
@@ -80,6 +96,10 @@ def main():
                 args.relationsdoc = mydir + "/data/umr-relations-doc.json"
             else:
                 args.relationsdoc = mydir + "/data/relations-doc.json"
+        if args.pbcache is None:
+            args.pbcache = os.path.join(os.path.expanduser("~"), ".cache", "metamorphosed")
+        elif args.pbcache == "-":
+            args.pbcache = None
         if args.reifications is None:
             if args.umr:
                 args.reifications = mydir + "/data/umr-reification-table.txt"
@@ -109,7 +129,23 @@ def main():
                                   smatchpp=args.smatchpp,
                                   preferred=args.preferred,
                                   override=args.override,
-                                  umr=args.umr)
+                                  umr=args.umr,
+                                  maxprocessors=args.max_processors,
+                                  pbcache=args.pbcache,
+                                  pbworkers=args.pbworkers,
+                                  timings=args.timings,
+                                  rendercache=args.render_cache,
+                                  rendercachemb=args.render_cache_mb,
+                                  diskcache=args.render_diskcache,
+                                  prewarm=args.prewarm,
+                                  exportbatch=args.export_batch,
+                                  exportworkers=args.export_workers,
+                                  prefetch=args.prefetch,
+                                  leansvg=args.lean_svg,
+                                  rendertimeout=args.render_timeout,
+                                  collapse=args.collapse,
+                                  historydepth=args.history_depth,
+                                  historymb=args.history_mb)
             aes.start()
         except Exception as e:
             print(e, file=sys.stderr)
@@ -103,17 +103,11 @@ class Smatch:
         :return: generator of cur_amr1, cur_amr2 pairs: one-line AMR strings
         """
         #print("OPEN")
-        doc1 = amrdoc.AMRdoc(f1)
-        doc2 = amrdoc.AMRdoc(f2)
-        #sentences1 = iter(doc1.sentences)
-        sentences2 = iter(doc2.sentences)
-        for sent1 in doc1.sentences:
-            #print("lllll")
-            #sent1 = next(sentences1)
-            try:
-                sent2 = next(sentences2)
-            except StopIteration:
-                pass
+        sentences1 = amrdoc.iter_sentences(f1)
+        sentences2 = amrdoc.iter_sentences(f2)
+        while True:
+            sent1 = next(sentences1, None)
+            sent2 = next(sentences2, None)
             if not sent1 and not sent2:
                 pass
             elif not sent1:
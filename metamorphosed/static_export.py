@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+
+# This library is under the 3-Clause BSD License
+#
+# Copyright (c) 2026,  Orange
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Orange nor the
+#      names of its contributors may be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL ORANGE BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+# Software Name: MetAMoRphosED AMR-Editor
+# Author: Johannes Heinecke
+
+# export an AMR file as a static site (HTML, JSON and SVG files) which can be browsed without a metamorphosed server
+# (any web server or a directory on a local web server will do).
+# Sentences whose content did not change since the last export into the same directory are not rendered again
+
+import concurrent.futures
+import glob
+import hashlib
+import json
+import os
+import shutil
+import sys
+
+import metamorphosed.AMR_relations as AMR_relations
+import metamorphosed.amrdoc as amrdoc
+import metamorphosed.amreditor as amreditor
+import metamorphosed.propbank_frames as propbank_frames
+import metamorphosed.relations_constraints as relations_constraints
+import metamorphosed.version
+
+
+mydir = os.path.abspath(os.path.dirname(__file__))
+
+# set in every worker process by initworker(): (PropBankFrames, [validators])
+validators = None
+
+
+def initworker(pbframes, pbcache, rels, constraints):
+    global validators
+    amr_rels = AMR_relations.Relations(rels)
+    pb = propbank_frames.PropBankFrames(pbframes, cachedir=pbcache)
+    amreditor.AMRProcessor.pbframes = pb # to add some documentation from propbank to SVG
+    amreditor.AMRProcessor.rendercache = None
+    amreditor.AMRProcessor.diskcache = None
+    cons = relations_constraints.Constraints(constraints)
+    validators = (pb, [amr_rels, pb, cons])
+
+
+def parsererror(ap):
+    # same message as the editor displays for an AMR graph which cannot be parsed
+    return "format error: %s in line %s:%s « %s », please correct file in a text editor first" % (
+        ap.parsererror["message"], ap.parsererror["lineno"], ap.parsererror["offset"], ap.parsererror["text"])
+
+
+def rendersentences(outdir, sentences, batchsize=50):
+    # render a list of sentences [(num, contenthash, {"id":, "text":, "comments":, "amr":}), ...]
+    # and write outdir/sentences/<num>.json for each of them
+    pbframes, tripleval = validators
+    aps = []
+    jobs = []
+    for num, chash, sent in sentences:
+        ap = amreditor.AMRProcessor()
+        ap.readpenman(sent["amr"])
+        aps.append(ap)
+        if ap.valid:
+            jobs.append((ap, {}))
+
+    results = iter(amreditor.showmany(jobs, batchsize))
+    for (num, chash, sent), ap in zip(sentences, aps):
+        if ap.valid:
+            pm, svg = next(results)
+            warnings = ap.validate(validators=tripleval)
+            framedocs = pbframes.getdoc(ap.triples)
+        else:
+            pm = ap.lastpm
+            svg = ""
+            warnings = [parsererror(ap)]
+            framedocs = []
+
+        dico = {"num": num,
+                "id": sent["id"],
+                "text": sent["text"],
+                "comments": "\n".join(sent["comments"]),
+                "penman": pm,
+                "svg": svg,
+                "warning": warnings if warnings else None,
+                "framedoc": "\n".join(framedocs) if framedocs else None,
+                "hash": chash}
+        writejson(os.path.join(outdir, "sentences", "%d.json" % num), dico)
+    return len(sentences)
+
+
+def fingerprint(path):
+    # the path and (modification time, size) of a file or of the xml files of a directory (as for the PropBank cache)
+    if not path:
+        return None
+    if os.path.isdir(path):
+        files = sorted(glob.glob("%s/*.xml" % path))
+    else:
+        files = [path]
+    stats = []
+    for fn in files:
+        try:
+            st = os.stat(fn)
+            stats.append((fn, st.st_mtime_ns, st.st_size))
+        except OSError:
+            stats.append((fn, None, None))
+    return stats
+
+
+def writejson(fn, data):
+    # write to a temporary file first, so that a browser never gets a partially written file
+    with open(fn + ".tmp", "w") as ofp:
+        json.dump(data, ofp)
+    os.replace(fn + ".tmp", fn)
+
+
+class StaticExport:
+    def __init__(self, fn, outdir, pbframes=None, pbcache=None, rels=None, constraints=None,
+                 workers=0, shardsize=500, batchsize=50):
+        self.fn = fn
+        self.outdir = outdir
+        self.pbframes = pbframes
+        self.pbcache = pbcache
+        self.rels = rels
+        self.constraints = constraints
+        self.workers = workers if workers > 0 else os.cpu_count()
+        self.shardsize = shardsize
+        self.batchsize = batchsize
+        # rendered sentences depend on the version and on the data (and its content) used for validation and tooltips
+        self.salt = "%s %s %s %s" % (metamorphosed.version.VERSION, fingerprint(pbframes), fingerprint(rels), fingerprint(constraints))
+
+    def contenthash(self, sent):
+        return hashlib.sha1(json.dumps([self.salt, sent]).encode("utf8")).hexdigest()
+
+    def oldhashes(self):
+        # read sentence hashes of a previous export into outdir: {num: hash}
+        hashes = {}
+        try:
+            with open(os.path.join(self.outdir, "index.json")) as ifp:
+                index = json.load(ifp)
+            for shard in index["shards"]:
+                with open(os.path.join(self.outdir, shard)) as ifp:
+                    for entry in json.load(ifp):
+                        hashes[entry["num"]] = entry["hash"]
+        except (OSError, ValueError, KeyError) as e:
+            if os.path.exists(os.path.join(self.outdir, "index.json")):
+                print("*** cannot read previous export, rendering all sentences: %s" % e, file=sys.stderr)
+        return hashes
+
+    def export(self, force=False):
+        # returns (number of rendered sentences, number of unchanged sentences)
+        os.makedirs(os.path.join(self.outdir, "sentences"), exist_ok=True)
+        os.makedirs(os.path.join(self.outdir, "index"), exist_ok=True)
+        old = {} if force else self.oldhashes()
+
+        sentences = [] # (num, contenthash, sentence)
+        for num, sentence in enumerate(amrdoc.iter_sentences(self.fn), start=1):
+            sent = {"id": sentence.id,
+                    "text": sentence.text,
+                    "comments": sentence.comments,
+                    "amr": sentence.amr}
+            sentences.append((num, self.contenthash(sent), sent))
+
+        todo = [(num, chash, sent) for num, chash, sent in sentences
+                if old.get(num) != chash or not os.path.exists(os.path.join(self.outdir, "sentences", "%d.json" % num))]
+        print("%d sentences, %d to render" % (len(sentences), len(todo)), file=sys.stderr)
+
+        if todo:
+            # the graphs of a chunk of sentences are rendered by a single dot process
+            chunks = [todo[i:i + self.batchsize] for i in range(0, len(todo), self.batchsize)]
+            rendered = 0
+            with concurrent.futures.ProcessPoolExecutor(max_workers=min(self.workers, len(chunks)),
+                                                        initializer=initworker,
+                                                        initargs=(self.pbframes, self.pbcache, self.rels, self.constraints)) as executor:
+                futures = [executor.submit(rendersentences, self.outdir, chunk, self.batchsize) for chunk in chunks]
+                for future in concurrent.futures.as_completed(futures):
+                    rendered += future.result()
+                    print("%d/%d rendered" % (rendered, len(todo)), end="\r", file=sys.stderr)
+            print(file=sys.stderr)
+
+        # delete sentences of a previous export of a longer file
+        num = len(sentences) + 1
+        while os.path.exists(os.path.join(self.outdir, "sentences", "%d.json" % num)):
+            os.remove(os.path.join(self.outdir, "sentences", "%d.json" % num))
+            num += 1
+
+        self.writeindex(sentences)
+        self.copyassets()
+        return len(todo), len(sentences) - len(todo)
+
+    def writeindex(self, sentences):
+        # the sentence list is split into shards, so that the browser only loads the part it needs
+        shards = []
+        for start in range(0, len(sentences), self.shardsize):
+            shard = "index/%d.json" % (len(shards) + 1)
+            writejson(os.path.join(self.outdir, shard),
+                      [{"num": num, "id": sent["id"], "text": sent["text"], "hash": chash}
+                       for num, chash, sent in sentences[start:start + self.shardsize]])
+            shards.append(shard)
+
+        # delete shards of a previous export of a longer file
+        num = len(shards) + 1
+        while os.path.exists(os.path.join(self.outdir, "index", "%d.json" % num)):
+            os.remove(os.path.join(self.outdir, "index", "%d.json" % num))
+            num += 1
+
+        writejson(os.path.join(self.outdir, "index.json"),
+                  {"filename": os.path.basename(self.fn),
+                   "numsent": len(sentences),
+                   "shardsize": self.shardsize,
+                   "shards": shards,
+                   "version": metamorphosed.version.VERSION})
+
+    def copyassets(self):
+        guidir = os.path.join(mydir, "gui")
+        shutil.copy(os.path.join(guidir, "static.html"), os.path.join(self.outdir, "index.html"))
+        for fn in ["static.js", "index.css"]:
+            shutil.copy(os.path.join(guidir, fn), self.outdir)
+        os.makedirs(os.path.join(self.outdir, "img"), exist_ok=True)
+        for fn in ["orange.ico", "metamorphosed+.png"]:
+            shutil.copy(os.path.join(guidir, "img", fn), os.path.join(self.outdir, "img"))
+        # relation colours are the same as in the workers, since Relations() always uses the same random seed
+        AMR_relations.Relations(self.rels)
+        os.makedirs(os.path.join(self.outdir, "css"), exist_ok=True)
+        with open(os.path.join(self.outdir, "css", "relations.css"), "w") as ofp:
+            ofp.write(AMR_relations.css())
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="export an AMR file as static HTML/JSON files")
+    parser.add_argument("--file", "-f", required=True, help='AMR file to export')
+    parser.add_argument("--outdir", "-o", required=True, help='output directory (sentences which did not change since a previous export into this directory are not rendered again)')
+    parser.add_argument("--pbframes", "-p", default=None, help='Propbank frameset documentation (directory with xml files)')
+    parser.add_argument("--pbcache", default=None, help='directory to cache parsed Propbank frames (default ~/.cache/metamorphosed, "-" deactivates the cache)')
+    parser.add_argument("--relations", "-r", default=None, help='list of valid AMR-relations (simple text file)')
+    parser.add_argument("--constraints", "-C", default=None, help='constraints for subjects and predicates (yaml file)')
+    parser.add_argument("--workers", "-w", default=0, type=int, help='number of processes rendering graphs (default: number of CPUs)')
+    parser.add_argument("--shardsize", default=500, type=int, help='number of sentences per index file')
+    parser.add_argument("--batchsize", default=50, type=int, help='number of graphs rendered by a single dot process')
+    parser.add_argument("--force", action='store_true', help='render all sentences, even if they did not change')
+
+    if len(sys.argv) < 2:
+        parser.print_help()
+    else:
+        args = parser.parse_args()
+        if args.relations is None:
+            args.relations = mydir + "/data/relations.txt"
+        if args.pbcache is None:
+            args.pbcache = os.path.join(os.path.expanduser("~"), ".cache", "metamorphosed")
+        elif args.pbcache == "-":
+            args.pbcache = None
+        se = StaticExport(args.file, args.outdir, pbframes=args.pbframes, pbcache=args.pbcache,
+                          rels=args.relations, constraints=args.constraints,
+                          workers=args.workers, shardsize=args.shardsize, batchsize=args.batchsize)
+        rendered, unchanged = se.export(force=args.force)
+        print("%d sentences rendered, %d unchanged, exported to %s" % (rendered, unchanged, args.outdir), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+
+# This library is under the 3-Clause BSD License
+#
+# Copyright (c) 2026,  Orange
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Orange nor the
+#      names of its contributors may be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL ORANGE BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+# Software Name: MetAMoRphosED AMR-Editor
+# Author: Johannes Heinecke
+
+# measure time and memory used by the different phases of the initialisation of a server
+#     timings = Timings()
+#     ... load files
+#     timings.done("documents")
+#     ... load PropBank
+#     timings.done("propbank")
+
+import os
+import sys
+import time
+
+
+def memory():
+    # resident memory of the current process in kB (None if not available)
+    try:
+        with open("/proc/self/statm") as ifp:
+            return int(ifp.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except Exception:
+        pass
+    try:
+        import resource
+        # not the current but the maximal memory
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == "darwin":
+            # in bytes on MacOS
+            maxrss //= 1024
+        return maxrss
+    except Exception:
+        return None
+
+
+class Timings:
+    def __init__(self):
+        self.phases = [] # (phase, seconds, memory delta kB)
+        self.start = time.time()
+        self.lasttime = self.start
+        self.startmemory = memory()
+        self.lastmemory = self.startmemory
+
+    def done(self, phase):
+        # a phase ends, it started at the end of the preceding phase
+        now = time.time()
+        mem = memory()
+        delta = None
+        if mem is not None and self.lastmemory is not None:
+            delta = mem - self.lastmemory
+        self.phases.append((phase, now - self.lasttime, delta))
+        self.lasttime = now
+        self.lastmemory = mem
+
+    def report(self):
+        dico = {"total_seconds": round(self.lasttime - self.start, 4),
+                "memory_kb": self.lastmemory,
+                "phases": []}
+        for phase, seconds, delta in self.phases:
+            dico["phases"].append({"phase": phase,
+                                   "seconds": round(seconds, 4),
+                                   "memory_kb": delta})
+        return dico
+
+    def write(self, fn, name=""):
+        # append report to a log file
+        with open(fn, "a") as ofp:
+            print("# %s %s %s" % (time.strftime("%Y-%m-%d %H:%M:%S"), name, " ".join(sys.argv)), file=ofp)
+            for phase, seconds, delta in self.phases:
+                print("%s\t%.4f\t%s" % (phase, seconds, "" if delta is None else delta), file=ofp)
+            print("total\t%.4f\t%s" % (self.lasttime - self.start, "" if self.lastmemory is None else self.lastmemory), file=ofp)
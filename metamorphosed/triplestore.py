@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+
+# This library is under the 3-Clause BSD License
+#
+# Copyright (c) 2026,  Orange
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Orange nor the
+#      names of its contributors may be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL ORANGE BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+# Software Name: MetAMoRphosED AMR-Editor
+# Author: Johannes Heinecke
+
+from metamorphosed.graph import Components
+
+# list of (subject, predicate, object) triples of an AMR graph. The order of the triples
+# is kept (it is used by penman.encode() to lay out the graph), but triples of a given subject,
+# object or (subject, predicate) are found with indexes, so that they can be replaced or deleted without
+# scanning (or copying) all triples. For all other purposes it can be used like a list of triples
+# The connected components of the graph are kept up to date in self.components and the nodes of the triples
+# which were added or removed are logged in self.changes (used by validation.TripleValidation)
+
+
+class TripleStore:
+    def __init__(self, triples=None):
+        self.triples = {} # key: triple, the keys give the order of the triples
+        self.firstkey = 0
+        self.nextkey = 0
+        self.sorted = True # False: some triples were put in front of the others, self.triples is not in the order of its keys
+        self.bysubject = {} # subject: {key: None}
+        self.byobject = {} # object: {key: None}
+        self.bysp = {} # (subject, predicate): {key: None}
+        self.aslist = None # list of all triples, created when needed
+        self.components = Components() # connected components of the graph
+        self.changes = [] # nodes of the triples added or removed since the store was created
+        self.origin = object() # same for all stores which follow() this one
+        if triples:
+            for tr in triples:
+                self.append(tr)
+            self.changes = []
+
+    def addindex(self, key, tr):
+        self.bysubject.setdefault(tr[0], {})[key] = None
+        self.byobject.setdefault(tr[2], {})[key] = None
+        self.bysp.setdefault((tr[0], tr[1]), {})[key] = None
+        self.aslist = None
+
+    def delindex(self, key, tr):
+        for idx, k in (self.bysubject, tr[0]), (self.byobject, tr[2]), (self.bysp, (tr[0], tr[1])):
+            del idx[k][key]
+            if not idx[k]:
+                del idx[k]
+        self.aslist = None
+
+    def changed(self, tr):
+        # the triples of the subject of tr (and of its object, if tr is a relation) must be validated again
+        self.changes.append(tr[0])
+        if tr[1] != ":instance":
+            self.changes.append(tr[2])
+
+    def follow(self, previous):
+        # self contains the triples of previous in another order (see AMRProcessor.canonicalize()):
+        # continue the log of changes of previous, triples which are not in both stores are logged as changed
+        for tr in set(self.triples.values()).symmetric_difference(previous.triples.values()):
+            previous.changed(tr)
+        self.changes = previous.changes
+        self.origin = previous.origin
+
+    def key(self, tr):
+        for key in self.bysubject.get(tr[0], ()):
+            if self.triples[key] == tr:
+                return key
+        raise ValueError("%s not in triples" % (tr,))
+
+    def append(self, tr):
+        tr = tuple(tr)
+        self.triples[self.nextkey] = tr
+        self.addindex(self.nextkey, tr)
+        self.components.add(tr)
+        self.changed(tr)
+        self.nextkey += 1
+
+    def prepend(self, tr):
+        # put tr in front of all other triples
+        tr = tuple(tr)
+        self.firstkey -= 1
+        self.triples[self.firstkey] = tr
+        self.addindex(self.firstkey, tr)
+        self.components.add(tr)
+        self.changed(tr)
+        self.sorted = False
+
+    def insert(self, pos, tr):
+        # only for compatibility with lists, needs to rebuild the store (except for pos 0)
+        if pos == 0:
+            self.prepend(tr)
+        else:
+            triples = self.list()
+            triples.insert(pos, tr)
+            changes, origin = self.changes, self.origin
+            self.__init__(triples)
+            self.changes, self.origin = changes, origin
+            self.changed(tr)
+
+    def remove(self, tr):
+        # remove the first occurrence of tr
+        key = self.key(tr)
+        del self.triples[key]
+        self.delindex(key, tr)
+        self.components.remove(tr)
+        self.changed(tr)
+
+    def replace(self, old, new):
+        # replace the first occurrence of old by new (at the same position)
+        key = self.key(old)
+        new = tuple(new)
+        self.delindex(key, old)
+        self.triples[key] = new
+        self.addindex(key, new)
+        # add before removing, a relation which only changes its label does not split a component
+        self.components.add(new)
+        self.components.remove(old)
+        self.changed(old)
+        self.changed(new)
+
+    def find(self, keys):
+        return [self.triples[k] for k in sorted(keys)]
+
+    def withsubject(self, s):
+        return self.find(self.bysubject.get(s, ()))
+
+    def withobject(self, o):
+        return self.find(self.byobject.get(o, ()))
+
+    def withsp(self, s, p):
+        return self.find(self.bysp.get((s, p), ()))
+
+    def between(self, a, b):
+        # all triples from a to b or from b to a
+        keys = set(k for k in self.bysubject.get(a, ()) if self.triples[k][2] == b)
+        keys.update(k for k in self.bysubject.get(b, ()) if self.triples[k][2] == a)
+        return self.find(keys)
+
+    def list(self):
+        if self.aslist is None:
+            if self.sorted:
+                self.aslist = list(self.triples.values())
+            else:
+                self.aslist = self.find(self.triples)
+        return list(self.aslist)
+
+    def __iter__(self):
+        if self.aslist is None:
+            self.list()
+        return iter(self.aslist)
+
+    def __len__(self):
+        return len(self.triples)
+
+    def __getitem__(self, ix):
+        if self.aslist is None:
+            self.list()
+        return self.aslist[ix]
+
+    def __contains__(self, tr):
+        return tuple(tr) in self.withsubject(tr[0])
+
+    def __eq__(self, other):
+        if isinstance(other, (TripleStore, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return repr(self.list())
@@ -397,6 +397,186 @@ for k, v in TOKENLINES.items():
     TOKLINESNUM[v] = k
 
 
+def makesentence(sentenceblock, alignments, ralignments, lalignments, documentblock, sentid, meta, index, words, comments, other):
+    return UMRsentence("\n".join(sentenceblock), alignments,
+                       ralignments, lalignments,
+                       "\n".join(documentblock), sentid, meta, index, words, comments, other)
+
+
+def iter_sentences(fn, docgraphrel=mydir + "/data/docgraph.json"):
+    # read an UMR file and yield one UMRsentence after the other
+    # fn is a filename or an opened file (or sys.stdin etc)
+    if docgraphrel:
+        with open(docgraphrel) as ifp:
+            UMRDocGraph.valid_dg_rels = json.load(ifp)
+
+    if isinstance(fn, str):
+        with open(fn) as ifp:
+            yield from iter_sentences(ifp, docgraphrel=None)
+        return
+
+    sentid = None
+    meta = {}
+    comments = []
+    index = None
+    words = None
+    other = {}
+    sentenceblock = []
+    documentblock = []
+    alignments = {} # var: [(from, to), ...]
+    ralignments = {} # startvar-endvar: [(from, to), ...]
+    lalignments = {} # var#rel#literal: [(from, to), ...]
+    state = 0 # 1: after "# sentence level graph", 2: after "# alignment", 3: after "# document level"
+    for linect, line in enumerate(fn, 1):
+        line = line.rstrip()
+        if not line:
+            continue
+        elif line.startswith("# meta-info") or line.startswith("# sent_id"):
+            if sentid:
+                # save preceding sentence
+                yield makesentence(sentenceblock, alignments, ralignments, lalignments, documentblock, sentid, meta, index, words, comments, other)
+            else:
+                if sentenceblock or documentblock or alignments or index or words or other:
+                    print("* Missing '# ::sntN' line. Sentence ignored", sentid, linect, file=sys.stderr)
+            # start next sentence
+            meta = {}
+            if ("::") in line:
+                for keyval in line.split("::")[1:]:
+                    fields = keyval.split("=")
+                    meta[fields[0].strip()] = fields[1].strip()
+
+            state = 0
+            sentid = None
+            sentenceblock = []
+            alignments = {}
+            ralignments = {}
+            lalignments = {}
+            documentblock = []
+            comments = []
+            index = None
+            words = None
+            other = {} # Morphme;s POS, Translations etc
+        else:
+            if line.startswith("# :: "):
+                sentid = line[5:]
+            elif line.startswith("Index: "):
+                if index:
+                    print("* duplicate 'Index' line", sentid, linect, file=sys.stderr)
+                #index = line.split(":", 1)[1].split()
+                index = line.split(":", 1)[1]
+            elif line.startswith("Words: "):
+                if words:
+                    print("* duplicate 'Words' line", sentid, linect, file=sys.stderr)
+                #words = line.split(":", 1)[1].split()
+                words = line.split(":", 1)[1]
+            elif line.startswith("Morphemes:") \
+                    or line.startswith("Morphemes(English):") \
+                    or line.startswith("Morphemes (en):") \
+                    or line.startswith("Part of Speech:") \
+                    or line.startswith("Words(English):") \
+                    or line.startswith("Words (en):") \
+                    or line.startswith("Word Gloss (en):") \
+                    or line.startswith("Morpheme Gloss(English):") \
+                    or line.startswith("Morpheme Gloss (en):") \
+                    or line.startswith("Morpheme Gloss(Spanish):") \
+                    or line.startswith("Morpheme Gloss (es):") \
+                    or line.startswith("Morpheme Category:") \
+                    or line.startswith("Sentence:") \
+                    or line.startswith("Translation(English):") \
+                    or line.startswith("Translation (en):") \
+                    or line.startswith("Translation(Spanish):") \
+                    or line.startswith("Sentence Gloss (en):"):
+                elems = line.split(":", 1)
+                #other[elems[0]] = elems[1].split()
+                other[TOKENLINES[elems[0]]] = (elems[0], elems[1].split())
+
+            elif line.startswith("# sentence level graph:"):
+                state = 1
+            elif line.startswith("# alignment:"):
+                state = 2
+            elif line.startswith("# document level annotation:"):
+                state = 3
+            elif line.startswith("#######"):
+                state = None
+            elif line.startswith("#") and not line.startswith("#RA") and not line.startswith("#LA"):
+                comments.append(line[1:])
+            elif state == 0:
+                print("* unexpected line", sentid, linect, line, file=sys.stderr)
+            elif state == 1:
+                sentenceblock.append(line)
+            elif state == 2:
+                if line.startswith("#RA "):
+                    elems = line[4:].strip().split(":")
+                    if len(elems) != 2:
+                        print("* bad relation alignment", sentid, linect, line, file=sys.stderr)
+                    else:
+                        key = elems[0] + "#RA"
+                        ralignments[key] = []
+                        for e in elems[1].strip().split(","):
+                            mo = ALIGNMENT.match(e.strip())
+                            #print(line, mo)
+                            ralignments[key].append((int(mo.group(1)), int(mo.group(2))))
+                elif line.startswith("#LA "):
+                    elems = line[4:].strip().split(":")
+                    if len(elems) != 2:
+                        print("* bad literal alignment", sentid, linect, line, file=sys.stderr)
+                    else:
+                        key = elems[0] + "#LA"
+                        lalignments[key] = []
+                        for e in elems[1].strip().split(","):
+                            mo = ALIGNMENT.match(e.strip())
+                            #print(line, mo)
+                            lalignments[key].append((int(mo.group(1)), int(mo.group(2))))
+
+                else:
+                    elems = line.strip().split(":")
+                    if len(elems) != 2:
+                        print("* bad alignment", sentid, linect, line, file=sys.stderr)
+                    else:
+                        alignments[elems[0]] = []
+                        for e in elems[1].strip().split(","):
+                            mo = ALIGNMENT.match(e.strip())
+                            #print(line, mo)
+                            alignments[elems[0]].append((int(mo.group(1)), int(mo.group(2))))
+            elif state == 3:
+                documentblock.append(line)
+    if sentid:
+        yield makesentence(sentenceblock, alignments, ralignments, lalignments, documentblock, sentid, meta, index, words, comments, other)
+    else:
+        if sentenceblock or documentblock or alignments or index or words or other:
+            print("* Missing '# ::sntN' line. Sentence ignored", sentid, linect, file=sys.stderr)
+
+
+def validatesentence(sent, validators, addids=False):
+    msgs = []
+    triples = sent.tsv()
+    ee = sent.validate(triples) # validate from UMRSentence
+    if ee:
+        if addids:
+            for m in ee:
+                msgs.append((sent.id, m))
+        else:
+            msgs += ee
+    for v in validators:
+        ee = v.validate(triples)
+        if ee:
+            if addids:
+                for m in ee:
+                    msgs.append((sent.id, m))
+            else:
+                msgs += ee
+        #for e in ee:
+        #    print("ZZZ", e)
+    try:
+        ddd = penman.parse(sent.amr.replace("\n", "")) # penman needs \n replaced to detect quote errors
+    except Exception as e:
+        if addids:
+            msgs.append((sent.id, str(e)))
+        else:
+            msgs.append(str(e))
+    return msgs
+
+
 class UMRdoc:
     def __init__(self, fn, verbose=True, rename_duplicate_ids=False, docgraphrel=mydir + "/data/docgraph.json"):
         self.rename_duplicate_ids = rename_duplicate_ids
@@ -405,154 +585,12 @@ class UMRdoc:
         self.ids = {} # id: sentence
         self.fn = fn
 
-        if docgraphrel:
-            with open(docgraphrel) as ifp:
-                UMRDocGraph.valid_dg_rels = json.load(ifp)
-
-        if isinstance(fn, str):
-            ifp = open(fn)
-        else:
-            # here fn is a opened file or sys.stdin etc
-            ifp = fn
-
-        sentid = None
-        meta = {}
-        comments = []
         self.duplicated = {} # id: number
-        index = None
-        words = None
-        other = {}
-        sentenceblock = []
-        documentblock = []
-        alignments = {} # var: [(from, to), ...]
-        ralignments = {} # startvar-endvar: [(from, to), ...]
-        lalignments = {} # var#rel#literal: [(from, to), ...]
-        state = 0 # 1: after "# sentence level graph", 2: after "# alignment", 3: after "# document level"
-        for linect, line in enumerate(ifp, 1):
-            line = line.rstrip()
-            if not line:
-                continue
-            elif line.startswith("# meta-info") or line.startswith("# sent_id"):
-                if sentid:
-                    # save preceding sentence
-                    self.add(sentenceblock, alignments, ralignments, lalignments, documentblock, sentid, meta, index, words, comments, other)
-                else:
-                    if sentenceblock or documentblock or alignments or index or words or other:
-                        print("* Missing '# ::sntN' line. Sentence ignored", sentid, linect, file=sys.stderr)
-                # start next sentence
-                meta = {}
-                if ("::") in line:
-                    for keyval in line.split("::")[1:]:
-                        fields = keyval.split("=")
-                        meta[fields[0].strip()] = fields[1].strip()
-
-                state = 0
-                sentid = None
-                sentenceblock = []
-                alignments = {}
-                ralignments = {}
-                lalignments = {}
-                documentblock = []
-                comments = []
-                index = None
-                words = None
-                other = {} # Morphme;s POS, Translations etc
-            else:
-                if line.startswith("# :: "):
-                    sentid = line[5:]
-                elif line.startswith("Index: "):
-                    if index:
-                        print("* duplicate 'Index' line", sentid, linect, file=sys.stderr)
-                    #index = line.split(":", 1)[1].split()
-                    index = line.split(":", 1)[1]
-                elif line.startswith("Words: "):
-                    if words:
-                        print("* duplicate 'Words' line", sentid, linect, file=sys.stderr)
-                    #words = line.split(":", 1)[1].split()
-                    words = line.split(":", 1)[1]
-                elif line.startswith("Morphemes:") \
-                        or line.startswith("Morphemes(English):") \
-                        or line.startswith("Morphemes (en):") \
-                        or line.startswith("Part of Speech:") \
-                        or line.startswith("Words(English):") \
-                        or line.startswith("Words (en):") \
-                        or line.startswith("Word Gloss (en):") \
-                        or line.startswith("Morpheme Gloss(English):") \
-                        or line.startswith("Morpheme Gloss (en):") \
-                        or line.startswith("Morpheme Gloss(Spanish):") \
-                        or line.startswith("Morpheme Gloss (es):") \
-                        or line.startswith("Morpheme Category:") \
-                        or line.startswith("Sentence:") \
-                        or line.startswith("Translation(English):") \
-                        or line.startswith("Translation (en):") \
-                        or line.startswith("Translation(Spanish):") \
-                        or line.startswith("Sentence Gloss (en):"):
-                    elems = line.split(":", 1)
-                    #other[elems[0]] = elems[1].split()
-                    other[TOKENLINES[elems[0]]] = (elems[0], elems[1].split())
-
-                elif line.startswith("# sentence level graph:"):
-                    state = 1
-                elif line.startswith("# alignment:"):
-                    state = 2
-                elif line.startswith("# document level annotation:"):
-                    state = 3
-                elif line.startswith("#######"):
-                    state = None
-                elif line.startswith("#") and not line.startswith("#RA") and not line.startswith("#LA"):
-                    comments.append(line[1:])
-                elif state == 0:
-                    print("* unexpected line", sentid, linect, line, file=sys.stderr)
-                elif state == 1:
-                    sentenceblock.append(line)
-                elif state == 2:
-                    if line.startswith("#RA "):
-                        elems = line[4:].strip().split(":")
-                        if len(elems) != 2:
-                            print("* bad relation alignment", sentid, linect, line, file=sys.stderr)
-                        else:
-                            key = elems[0] + "#RA"
-                            ralignments[key] = []
-                            for e in elems[1].strip().split(","):
-                                mo = ALIGNMENT.match(e.strip())
-                                #print(line, mo)
-                                ralignments[key].append((int(mo.group(1)), int(mo.group(2))))
-                    elif line.startswith("#LA "):
-                        elems = line[4:].strip().split(":")
-                        if len(elems) != 2:
-                            print("* bad literal alignment", sentid, linect, line, file=sys.stderr)
-                        else:
-                            key = elems[0] + "#LA"
-                            lalignments[key] = []
-                            for e in elems[1].strip().split(","):
-                                mo = ALIGNMENT.match(e.strip())
-                                #print(line, mo)
-                                lalignments[key].append((int(mo.group(1)), int(mo.group(2))))
 
-                    else:
-                        elems = line.strip().split(":")
-                        if len(elems) != 2:
-                            print("* bad alignment", sentid, linect, line, file=sys.stderr)
-                        else:
-                            alignments[elems[0]] = []
-                            for e in elems[1].strip().split(","):
-                                mo = ALIGNMENT.match(e.strip())
-                                #print(line, mo)
-                                alignments[elems[0]].append((int(mo.group(1)), int(mo.group(2))))
-                elif state == 3:
-                    documentblock.append(line)
-        if sentid:
-            self.add(sentenceblock, alignments, ralignments, lalignments, documentblock, sentid, meta, index, words, comments, other)
-        else:
-            if sentenceblock or documentblock or alignments or index or words or other:
-                print("* Missing '# ::sntN' line. Sentence ignored", sentid, linect, file=sys.stderr)
-
-    def add(self, sentenceblock, alignments, ralignments, lalignments, documentblock, sentid, meta, index, words, comments, other):
-        wiok = True # if index and words do not go together, we keep that what we find
-        usent = UMRsentence("\n".join(sentenceblock), alignments,
-                            ralignments, lalignments,
-                            "\n".join(documentblock), sentid, meta, index, words, comments, other)
+        for usent in iter_sentences(fn, docgraphrel=docgraphrel):
+            self.add(usent)
 
+    def add(self, usent):
         self.sentences.append(usent)
         newid = usent.id # we do not want to overwrite an ID, event if it's a duplicate
         if usent.id is not None and usent.id in self.ids:
@@ -571,31 +609,7 @@ class UMRdoc:
     def validate(self, validators, addids=False):
         msgs = []
         for sent in self.sentences:
-            triples = sent.tsv()
-            ee = sent.validate(triples) # validate from UMRSentence
-            if ee:
-                if addids:
-                    for m in ee:
-                        msgs.append((sent.id, m))
-                else:
-                    msgs += ee
-            for v in validators:
-                ee = v.validate(triples)
-                if ee:
-                    if addids:
-                        for m in ee:
-                            msgs.append((sent.id, m))
-                    else:
-                        msgs += ee
-                #for e in ee:
-                #    print("ZZZ", e)
-            try:
-                ddd = penman.parse(sent.amr.replace("\n", "")) # penman needs \n replaced to detect quote errors
-            except Exception as e:
-                if addids:
-                    msgs.append(sent.id, str(e))
-                else:
-                    msgs.append(str(e))
+            msgs += validatesentence(sent, validators, addids)
         return msgs
 
     def getsentencelist(self):
@@ -639,18 +653,12 @@ def main():
                 validators.append(relations_constraints.Constraints(args.constraints))
 
             #print(validators)
-        ads = []
-
         for fn in args.file:
-            ad = UMRdoc(fn)
-            #for sent in ad.sentences:
-            #    sent.write()
-            if args.validate:
-                msg = ad.validate(validators)
-                for m in msg:
-                    print("Problem:", m)
-
-            ads.append(ad)
+            for sent in iter_sentences(fn):
+                #sent.write()
+                if args.validate:
+                    for m in validatesentence(sent, validators):
+                        print("Problem:", m)
             #ad.tsv()
             #ad.oneline()
         #if args.stats:
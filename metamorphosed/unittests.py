@@ -386,6 +386,36 @@ def test_info(client):
         ":value ↔ have-value-91",
     ]
 
+    phases = [p["phase"] for p in res["timings"]["phases"]]
+    assert phases == ["document", "reifications", "git check", "relations documentation", "javascript libraries",
+                      "relations and concepts", "propbank", "constraints", "edge predictor", "flask"]
+    assert res["timings"]["total_seconds"] >= sum([p["seconds"] for p in res["timings"]["phases"]]) - 0.01
+
+
+def test_timings():
+    from metamorphosed.timings import Timings
+
+    timings = Timings()
+    time.sleep(0.1)
+    timings.done("sleep")
+    data = [0] * 10000000
+    timings.done("list")
+    rep = timings.report()
+    assert [p["phase"] for p in rep["phases"]] == ["sleep", "list"]
+    assert rep["phases"][0]["seconds"] >= 0.1
+    if rep["memory_kb"] is not None:
+        assert rep["phases"][1]["memory_kb"] > 50000
+    del data
+
+    datadir = tempfile.TemporaryDirectory()
+    timings.write(datadir.name + "/timings.log", "test")
+    timings.write(datadir.name + "/timings.log", "test")
+    with open(datadir.name + "/timings.log") as ifp:
+        lines = ifp.readlines()
+    assert len(lines) == 8
+    assert lines[1].startswith("sleep\t0.1")
+    assert lines[3].startswith("total\t")
+
 
 @pytest.mark.skipif(PROPBANK_PRESENT is False, reason="cannot find propbank-frames/frames")
 def test_exportgraphs(client):
@@ -401,6 +431,9 @@ def test_exportgraphs(client):
     #    #break
 
     assert len(zfp.infolist()) == 26 # includes metadata file
+    assert response.is_streamed
+    assert zfp.infolist()[-1].filename == "metadata.json"
+    assert zfp.testzip() is None
     fobj = zfp.infolist()[0]
     assert fobj.filename == "1.svg"
     assert fobj.file_size <= 11086 and fobj.file_size >= 10080
@@ -794,6 +827,38 @@ def test_read_date(client):
     assert res["lastchanged"] is None
 
 
+def test_js(monkeypatch):
+    import metamorphosed.amreditor as amreditor
+
+    datadir = tempfile.TemporaryDirectory()
+    shutil.copyfile(mydir + "/data/testamr.txt", datadir.name + "/testamr.txt")
+    aes = AMR_Edit_Server(4568, datadir.name + "/testamr.txt", None, None, None, None, False)
+    client = aes.app.test_client()
+
+    def nodot(*args, **kwargs):
+        raise Exception("/js must not render the graph")
+
+    monkeypatch.setattr(amreditor.AMRProcessor, "dot", nodot)
+    response = client.get("/js", query_string={"num": 3})
+    res = json.loads(response.data)
+    assert res["num"] == 3
+    assert res["penman"].startswith("(k / kill-01\n   :ARG0 (c / cat)")
+    assert res["graph"]["nodes"][:2] == [{"id": "k", "name": "k / kill-01", "typ": "inst"}, {"id": "top", "name": "TOP", "typ": "topnode"}]
+    assert {"source": "k", "target": "c", "label": "ARG0"} in res["graph"]["links"]
+
+    response = client.get("/js", query_string={"num": 3})
+    assert json.loads(response.data) == res
+    assert aes.aps.peek(3).d3graph[2] == res["penman"]
+
+    # the graph is rebuilt after a modification
+    monkeypatch.undo()
+    response = client.get("/edit", query_string={"num": 3, "modconcept": "c", "newconcept": "dog"})
+    response = client.get("/js", query_string={"num": 3})
+    res = json.loads(response.data)
+    assert {"id": "c", "name": "c / dog", "typ": "inst"} in res["graph"]["nodes"]
+    assert "(c / dog)" in res["penman"]
+
+
 def test_read_missing_num(client):
     response = client.get("/read")
     res = json.loads(response.data)
@@ -1535,8 +1600,12 @@ def test_reify_dereify_missing_ARG(client):
 
 def test_compare_read(client_once2):
     client2, datadir, server = client_once2
+    doc, aps = server.otheramrdocs[0]
+    assert doc.fn == mydir + "/data/comptest_sys.txt"
+    assert aps.loaded() == []
     response = client2.get("/read", query_string={"num": 1, "compare": "1,2"})
     res = json.loads(response.data)
+    assert aps.loaded() == [1]
     #print("res", json.dumps(res, indent=2))
     assert res["smatch"] == "80.00"
     assert res["bestmatch"] == 12
@@ -1550,6 +1619,9 @@ def test_compare_read(client_once2):
     #print("res", json.dumps(res["penman2"], indent=2))
     assert res["smatch"] == "100.00"
     assert res["penman"] == res["others"][0]["penman"]
+    # rendered in parallel, each graph with its own highlighting
+    assert res["svg"].startswith("<?xml")
+    assert res["others"][0]["svg"].startswith("<?xml")
 
     response = client2.get("/next", query_string={"num": 2, "direction": "last", "compare": "1,2"})
     response = client2.get("/read", query_string={"num": 4, "compare": "1,2"})
@@ -1710,6 +1782,75 @@ def test_umrdoc():
     ]
 
 
+def test_iter_sentences():
+    import metamorphosed.amrdoc as amrdoc
+    import metamorphosed.umrdoc as umrdoc
+
+    ad = amrdoc.AMRdoc(mydir + "/data/coverageamr.txt")
+    sents = list(amrdoc.iter_sentences(mydir + "/data/coverageamr.txt"))
+    assert len(sents) == len(ad.sentences)
+    for s1, s2 in zip(sents, ad.sentences):
+        assert (s1.id, s1.text, s1.amr, s1.date, s1.comments) == (s2.id, s2.text, s2.amr, s2.date, s2.comments)
+
+    # last sentence without final empty line
+    sents = list(amrdoc.iter_sentences(io.StringIO("# ::id s1\n# ::snt a\n(a / a)\n\n# ::id s2\n# ::snt b\n(b / b)")))
+    assert [(s.id, s.text, s.amr) for s in sents] == [("s1", "a", "(a / a)"), ("s2", "b", "(b / b)")]
+
+    ud = umrdoc.UMRdoc(mydir + "/data/testumr.umr")
+    sents = list(umrdoc.iter_sentences(mydir + "/data/testumr.umr"))
+    assert len(sents) == len(ud.sentences)
+    for s1, s2 in zip(sents, ud.sentences):
+        assert (s1.id, s1.amr, s1.words, s1.index, s1.alignments) == (s2.id, s2.amr, s2.words, s2.index, s2.alignments)
+
+    msgs = []
+    for sent in sents:
+        msgs += umrdoc.validatesentence(sent, [], addids=True)
+    assert msgs == ud.validate([], addids=True)
+
+
+def test_amrindex():
+    import metamorphosed.amrdoc as amrdoc
+    import metamorphosed.amrindex as amrindex
+
+    datadir = tempfile.TemporaryDirectory()
+    fn = os.path.join(datadir.name, "coverageamr.txt")
+    shutil.copyfile(mydir + "/data/coverageamr.txt", fn)
+
+    ad = amrdoc.AMRdoc(fn)
+    idoc = amrindex.IndexedAMRdoc(fn, cachesize=3)
+    assert os.path.isfile(fn + ".idx")
+    assert len(idoc.sentences) == len(ad.sentences)
+    assert idoc.getsentencelist() == ad.getsentencelist()
+    for s1, s2 in zip(idoc.sentences, ad.sentences):
+        assert (s1.id, s1.text, s1.amr, s1.date, s1.comments) == (s2.id, s2.text, s2.amr, s2.date, s2.comments)
+    assert len(idoc.sentences.cache) == 3
+    assert idoc.sentences[-1].id == "sentence last (must be last)"
+
+    assert idoc.findid(11, "13 bad") is True
+    assert idoc.findid(10, "13 bad") is False
+    assert len(list(idoc.findtext(0, "London"))) == 2
+
+    # index is reused
+    with open(fn + ".idx") as ifp:
+        idx = json.load(ifp)
+    assert idx["size"] == os.path.getsize(fn)
+    idx["sentences"][0][amrindex.ID] = "from index"
+    with open(fn + ".idx", "w") as ofp:
+        json.dump(idx, ofp)
+    idoc = amrindex.IndexedAMRdoc(fn)
+    assert idoc.getsentencelist()[0][0] == "from index"
+    idoc.close()
+
+    # and rebuilt if the file changes
+    with open(fn, "a") as ofp:
+        print("# ::id new sentence\n# ::snt new\n(n / new)", file=ofp)
+    idoc = amrindex.IndexedAMRdoc(fn)
+    assert idoc.getsentencelist()[0][0] == "sentence 1"
+    assert len(idoc.sentences) == len(ad.sentences) + 1
+    assert idoc.sentences[-1].amr == "(n / new)"
+    idoc.close()
+
+
 @pytest.mark.skipif(PROPBANK_PRESENT is False, reason="cannot find propbank-frames/frames")
 def test_amrdoc():
     #app = create_app()
@@ -1852,6 +1993,926 @@ def test_amrprocessor():
     assert res == "(s / see-01\n   :actor (m / mouse))\n\n"
 
 
+def test_render_cache():
+    import metamorphosed.amreditor as amreditor
+    from metamorphosed.render_cache import RenderCache
+
+    rc = RenderCache(maxsize=3, maxbytes=10)
+    rc.put("a", b"1234")
+    rc.put("b", b"1234")
+    assert rc.get("a") == b"1234"
+    rc.put("c", b"1234") # too many bytes, "b" is dropped
+    assert rc.get("b") is None
+    assert sorted(rc.cache.keys()) == ["a", "c"]
+    rc.put("d", b"12345678901") # too big to be cached
+    assert rc.get("d") is None
+    assert rc.stats() == {"entries": 2, "bytes": 8, "maxsize": 3, "maxbytes": 10, "hits": 1, "misses": 2}
+
+    oldcache = amreditor.AMRProcessor.rendercache
+    amreditor.AMRProcessor.rendercache = RenderCache()
+    try:
+        ap = amreditor.AMRProcessor()
+        ap.readpenman("(w / want-01 :ARG0 (b / boy) :ARG1 (g / go-02 :ARG0 b))")
+        pm, svg = ap.show()
+        assert amreditor.AMRProcessor.rendercache.stats()["misses"] == 1
+        pm2, svg2 = ap.show()
+        assert svg2 == svg
+        assert amreditor.AMRProcessor.rendercache.stats()["hits"] == 1
+
+        # same graph in another processor
+        ap2 = amreditor.AMRProcessor()
+        ap2.readpenman(pm)
+        ap2.show()
+        assert amreditor.AMRProcessor.rendercache.stats()["hits"] == 2
+
+        # other parameters need a new rendering
+        ap.show(highlightconcepts=["boy"])
+        ap.show(reverse_of=True)
+        assert amreditor.AMRProcessor.rendercache.stats()["misses"] == 3
+
+        ap.modconcept("b", "girl")
+        ap.show()
+        assert amreditor.AMRProcessor.rendercache.stats()["misses"] == 4
+        assert len(amreditor.AMRProcessor.rendercache) == 4
+    finally:
+        amreditor.AMRProcessor.rendercache = oldcache
+
+
+def test_showmany(monkeypatch):
+    import graphviz
+    import metamorphosed.amrdoc as amrdoc
+    import metamorphosed.amreditor as amreditor
+
+    monkeypatch.setattr(amreditor.AMRProcessor, "rendercache", None)
+    calls = []
+    pipe = graphviz.pipe
+
+    def countingpipe(*args, **kwargs):
+        calls.append(1)
+        return pipe(*args, **kwargs)
+    monkeypatch.setattr(amreditor.graphviz, "pipe", countingpipe)
+
+    ad = amrdoc.AMRdoc(mydir + "/data/testamr.txt")
+    aps = []
+    for sent in ad.sentences:
+        ap = amreditor.AMRProcessor()
+        ap.readpenman(sent.amr)
+        aps.append(ap)
+
+    expected = [ap.show(highlightconcepts=["name"]) for ap in aps]
+    jobs = [(ap, {"highlightconcepts": ["name"]}) for ap in aps]
+    results = amreditor.showmany(jobs, batchsize=10)
+    assert len(calls) == (len([ap for ap in aps if ap.valid]) + 9) // 10
+    assert results == expected
+
+    # same as show() with one process per graph
+    calls.clear()
+    results = amreditor.showmany(jobs, batchsize=1)
+    assert len(calls) == 0
+    assert results == expected
+
+
+def test_ordered_map():
+    from metamorphosed.graphexport import ordered_map, ZipStream
+    assert list(ordered_map(lambda x: x * x, range(20), workers=3)) == [x * x for x in range(20)]
+    assert list(ordered_map(lambda x: x + 1, range(5), workers=1)) == [1, 2, 3, 4, 5]
+
+    stream = ZipStream()
+    data = b""
+    with zipfile.ZipFile(stream, "w", zipfile.ZIP_DEFLATED, False) as zfp:
+        for i in range(3):
+            zfp.writestr("%d.txt" % i, "file %d" % i)
+            data += stream.pop()
+    data += stream.pop()
+    zfp = zipfile.ZipFile(io.BytesIO(data), "r")
+    assert [x.filename for x in zfp.infolist()] == ["0.txt", "1.txt", "2.txt"]
+    assert zfp.read("2.txt") == b"file 2"
+
+
+def test_render_diskcache():
+    import metamorphosed.amreditor as amreditor
+
+    datadir = tempfile.TemporaryDirectory()
+    shutil.copyfile(mydir + "/data/testamr.txt", datadir.name + "/testamr.txt")
+    try:
+        aes = AMR_Edit_Server(4568, datadir.name + "/testamr.txt", None, None, None, None,
+                              True, # readonly
+                              diskcache=datadir.name + "/cache", prewarm=True)
+        for i in range(600):
+            if aes.prewarmed == len(aes.amrdoc.sentences):
+                break
+            time.sleep(0.1)
+        assert aes.prewarmed == len(aes.amrdoc.sentences)
+        written = amreditor.AMRProcessor.diskcache.stats()["written"]
+        assert written > 20
+        assert len(glob.glob(datadir.name + "/cache/*/*.json")) == written
+        assert len(amreditor.AMRProcessor.rendercache) == 0
+
+        client = aes.app.test_client()
+        response = client.get("/read", query_string={"num": 3})
+        res1 = json.loads(response.data)
+
+        # restart: graphs come from the disk cache
+        aes = AMR_Edit_Server(4568, datadir.name + "/testamr.txt", None, None, None, None,
+                              True, # readonly
+                              diskcache=datadir.name + "/cache")
+        client = aes.app.test_client()
+        response = client.get("/read", query_string={"num": 3})
+        res2 = json.loads(response.data)
+        assert res1["svg"] == res2["svg"]
+        assert res1["penman"] == res2["penman"]
+        response = client.get("/info")
+        res = json.loads(response.data)
+        assert res["diskcache"]["hits"] == 1
+        assert res["rendercache"]["misses"] == 0
+    finally:
+        amreditor.AMRProcessor.diskcache = None
+
+
+def test_render_diskcache_keeps_version(monkeypatch):
+    # a graph found in the disk cache is not parsed again, the caches of the processor stay valid
+    import metamorphosed.amreditor as amreditor
+    from metamorphosed.render_cache import DiskRenderCache
+
+    datadir = tempfile.TemporaryDirectory()
+    monkeypatch.setattr(amreditor.AMRProcessor, "rendercache", None)
+    monkeypatch.setattr(amreditor.AMRProcessor, "diskcache", DiskRenderCache(datadir.name + "/cache"))
+    aps = []
+    for i in range(2):
+        ap = amreditor.AMRProcessor()
+        ap.readpenman("(w / want-01 :ARG0 (b / boy) :ARG1 (g / go-02))")
+        ap.addedge("b", "g", ":ARG0-of")
+        aps.append(ap)
+    pm1, svg1 = aps[0].show()
+
+    ap = aps[1]
+    ap.validate()
+    version = ap.version
+    lastvalidation = ap.lastvalidation
+    assert ap.triples.list() != aps[0].triples.list()
+    pm2, svg2 = ap.show()
+    assert amreditor.AMRProcessor.diskcache.stats()["hits"] == 1
+    assert (pm2, svg2) == (pm1, svg1)
+    assert ap.version == version
+    assert ap.triples.list() == aps[0].triples.list()
+    ap.validate()
+    assert ap.lastvalidation is lastvalidation
+
+
+def test_prefetch():
+    import metamorphosed.amreditor as amreditor
+
+    datadir = tempfile.TemporaryDirectory()
+    shutil.copyfile(mydir + "/data/testamr.txt", datadir.name + "/testamr.txt")
+    aes = AMR_Edit_Server(4568, datadir.name + "/testamr.txt", None, None, None, None,
+                          True, # readonly
+                          prefetch=1)
+    client = aes.app.test_client()
+    response = client.get("/read", query_string={"num": 3})
+    for i in range(600):
+        if aes.prefetched == 2:
+            break
+        time.sleep(0.1)
+    assert aes.prefetched == 2
+    # sentences 2 and 4 have been rendered but no processor has been created
+    assert aes.aps.loaded() == [3]
+
+    aes.prefetch = 0 # no more prefetching while counting cache hits
+    hits = amreditor.AMRProcessor.rendercache.stats()["hits"]
+    response = client.get("/next", query_string={"num": 3, "direction": "next"})
+    res = json.loads(response.data)
+    assert res["num"] == 4
+    assert amreditor.AMRProcessor.rendercache.stats()["hits"] == hits + 1
+
+
+def test_leansvg():
+    import metamorphosed.amreditor as amreditor
+    ap = amreditor.AMRProcessor()
+    ap.readpenman("(w / want-01 :ARG0 (b / boy) :ARG1 (g / go-02 :ARG0 b))")
+    full = ap.digraph().source
+    lean = ap.digraph(lean=True).source
+    assert "tooltip" not in lean
+    assert "class=ARG0" in lean
+    assert len(lean) < len(full)
+    assert amreditor.minifysvg('<?xml version="1.0"?>\n<!-- comment -->\n<svg>\n <g>\n<text>a b</text>\n</g>\n</svg>\n') == "<svg><g><text>a b</text></g></svg>"
+
+    datadir = tempfile.TemporaryDirectory()
+    shutil.copyfile(mydir + "/data/testamr.txt", datadir.name + "/testamr.txt")
+    aes = AMR_Edit_Server(4568, datadir.name + "/testamr.txt", None, None, None, None,
+                          True, # readonly
+                          leansvg=True)
+    client = aes.app.test_client()
+    response = client.get("/read", query_string={"num": 3})
+    res = json.loads(response.data)
+    assert res["leansvg"] is True
+    assert "<?xml" not in res["svg"]
+    assert "\n" not in res["svg"]
+
+    response = client.get("/conceptdoc", query_string={"concept": "want-01"})
+    assert response.status_code == 200
+    res = json.loads(response.data)
+    assert res["concept"] == "want-01"
+    assert "doc" in res
+
+    response = client.get("/css/relations.css")
+    assert b"g.edge.ARG0 path" in response.data
+
+
+def test_rendertimeout(monkeypatch):
+    import subprocess
+    import metamorphosed.amreditor as amreditor
+    from metamorphosed.render_cache import RenderCache
+
+    rundot = amreditor.rundot
+
+    def slowdot(graph, timeout=None):
+        # the graph with the words of the sentence is too slow
+        assert timeout == 1
+        if "tokens" in graph.source:
+            raise subprocess.TimeoutExpired("dot", timeout)
+        return rundot(graph)
+
+    monkeypatch.setattr(amreditor, "rundot", slowdot)
+    monkeypatch.setattr(amreditor.AMRProcessor, "rendertimeout", 1)
+    monkeypatch.setattr(amreditor.AMRProcessor, "rendercache", RenderCache())
+    timeouts = amreditor.AMRProcessor.timeouts
+    ap = amreditor.AMRProcessor()
+    ap.readpenman("(w / want-01 :ARG0 (b / boy))")
+    tokenalignments = (["the", "boy", "wants"], {2: ["b"], 3: ["w"]}, False)
+    pm, svg = ap.show(tokenalignments=tokenalignments)
+    assert ap.degraded
+    assert amreditor.AMRProcessor.timeouts == timeouts + 1
+
+    # the simplified graph is taken from the cache
+    pm, svg2 = ap.show(tokenalignments=tokenalignments)
+    assert ap.degraded
+    assert svg2 == svg
+    assert amreditor.AMRProcessor.timeouts == timeouts + 1
+
+    pm, svg = ap.show()
+    assert not ap.degraded
+
+    # too slow even without the words
+    def tooslow(graph, timeout=None):
+        raise subprocess.TimeoutExpired("dot", timeout)
+
+    monkeypatch.setattr(amreditor, "rundot", tooslow)
+    ap.readpenman("(w / want-01 :ARG0 (g / girl))")
+    pm, svg = ap.show()
+    assert ap.degraded
+    assert "graph not rendered within 1 seconds" in svg
+    assert amreditor.AMRProcessor.timeouts == timeouts + 3
+
+
+def test_render_timeout_diskcache(monkeypatch):
+    import subprocess
+    import metamorphosed.amreditor as amreditor
+    from metamorphosed.render_cache import DiskRenderCache
+
+    def tooslow(graph, timeout=None):
+        if timeout:
+            raise subprocess.TimeoutExpired("dot", timeout)
+        return rundot(graph)
+
+    datadir = tempfile.TemporaryDirectory()
+    rundot = amreditor.rundot
+    monkeypatch.setattr(amreditor, "rundot", tooslow)
+    monkeypatch.setattr(amreditor.AMRProcessor, "rendertimeout", 1)
+    monkeypatch.setattr(amreditor.AMRProcessor, "rendercache", None)
+    monkeypatch.setattr(amreditor.AMRProcessor, "diskcache", DiskRenderCache(datadir.name + "/cache"))
+    ap = amreditor.AMRProcessor()
+    ap.readpenman("(w / want-01 :ARG0 (b / boy))")
+    pm, svg = ap.show()
+    assert ap.degraded
+    assert "graph not rendered within 1 seconds" in svg
+    assert amreditor.AMRProcessor.diskcache.stats()["written"] == 0
+
+    # without a time limit the full graph is rendered and kept on disk
+    monkeypatch.setattr(amreditor.AMRProcessor, "rendertimeout", None)
+    ap = amreditor.AMRProcessor()
+    ap.readpenman("(w / want-01 :ARG0 (b / boy))")
+    pm, svg = ap.show()
+    assert not ap.degraded
+    assert "want-01" in svg
+    assert amreditor.AMRProcessor.diskcache.stats()["written"] == 1
+    pm, svg2 = ap.show()
+    assert svg2 == svg
+    assert amreditor.AMRProcessor.diskcache.stats()["hits"] == 1
+
+
+def test_showmany_timeout(monkeypatch):
+    import subprocess
+    import metamorphosed.amreditor as amreditor
+
+    rundot = amreditor.rundot
+
+    def slowdot(graph, timeout=None):
+        # a batch containing the mouse graph is too slow
+        assert timeout
+        if "mouse" in graph.source:
+            raise subprocess.TimeoutExpired("dot", timeout)
+        return rundot(graph)
+
+    monkeypatch.setattr(amreditor, "rundot", slowdot)
+    monkeypatch.setattr(amreditor.AMRProcessor, "rendertimeout", 1)
+    monkeypatch.setattr(amreditor.AMRProcessor, "rendercache", None)
+    timeouts = amreditor.AMRProcessor.timeouts
+    aps = []
+    for pm in "(c / cat)", "(m / mouse)", "(d / dog)":
+        ap = amreditor.AMRProcessor()
+        ap.readpenman(pm)
+        aps.append(ap)
+    results = amreditor.showmany([(ap, {}) for ap in aps], batchsize=10)
+    # every graph is rendered alone, only the slow one is simplified
+    assert [ap.degraded for ap in aps] == [False, True, False]
+    assert "graph not rendered within 1 seconds" in results[1][1]
+    assert "cat" in results[0][1]
+    assert amreditor.AMRProcessor.timeouts > timeouts
+
+
+def test_incremental_validation():
+    import metamorphosed.amreditor as amreditor
+    import metamorphosed.AMR_relations as AMR_relations
+    import metamorphosed.propbank_frames as propbank_frames
+    import metamorphosed.relations_constraints as relations_constraints
+
+    datadir = tempfile.TemporaryDirectory()
+    pf = propbank_frames.PropBankFrames(mydir + "/data/frames-test", cachedir=datadir.name)
+    validators = [AMR_relations.Relations(mydir + "/data/relations.txt"), pf,
+                  relations_constraints.Constraints(mydir + "/data/constraints.yml")]
+    valfuncs = [v.validate for v in validators]
+
+    ap = amreditor.AMRProcessor()
+    ap.readpenman('(s / see-01 :ARG0 (c / cat) :ARG3 (d / date-entity :month 13 :year 2024) :ARG1 (n / name :op1 "Tom" :op2 x) :wrong (s2 / sleep-01 :ARG1-of s))')
+    ap.show()
+    full = ap.validate(valfuncs=valfuncs)
+    assert "invalid argument «:ARG3» for concept «see-01»" in full
+    assert "invalid relation ':wrong'" in full
+    assert ap.validate(validators=validators) == full
+    checked = ap.triplevalidation.checked
+    assert checked == 3 * len(ap.triples)
+    assert ap.triplevalidation.revisited == len(ap.triples)
+
+    # same version: nothing validated again
+    assert ap.validate(validators=validators) == full
+    assert ap.triplevalidation.checked == checked
+
+    for cmd in ['c :ARG2 "x"', "car", "s :mod c1"]:
+        assert ap.process(cmd) is None
+        ap.show()
+        revisited = ap.triplevalidation.revisited
+        assert ap.validate(validators=validators) == ap.validate(valfuncs=valfuncs)
+        assert 0 < ap.triplevalidation.revisited - revisited < len(ap.triples) / 2
+    assert ap.vars["c1"] == "car"
+    assert ("s", ":mod", "c1") in ap.triples
+    ap.modconcept("s", "sleep-01")
+    ap.modedge("s", "d", ":ARG1")
+    ap.show()
+    checked = ap.triplevalidation.checked
+    revisited = ap.triplevalidation.revisited
+    assert ap.validate(validators=validators) == ap.validate(valfuncs=valfuncs)
+    # only the triples of s and d are revisited, those of d are still in the cache
+    touched = set()
+    for node in "s", "d":
+        touched.update(ap.triples.withsubject(node) + ap.triples.withobject(node))
+    assert ap.triplevalidation.revisited - revisited == len(touched)
+    assert ap.triplevalidation.checked - checked == 3 * len(ap.triples.withsubject("s") + ap.triples.withobject("s"))
+
+    # a new graph is validated completely (from the cache)
+    checked = ap.triplevalidation.checked
+    ap.readpenman(ap.lastpm)
+    revisited = ap.triplevalidation.revisited
+    assert ap.validate(validators=validators) == ap.validate(valfuncs=valfuncs)
+    assert ap.triplevalidation.revisited - revisited == len(ap.triples)
+    assert ap.triplevalidation.checked == checked
+
+
+def test_history():
+    from metamorphosed.history import History
+    history = History(maxdepth=3)
+    for i in range(5):
+        history.push(1, {"amr": "(a / a%d)" % i, "comments": ("comment",)})
+    assert history.undos(1) == 3
+    assert history.dropped == 2
+    assert history.undos(2) == 0
+
+    state = history.undo(1, {"amr": "(a / a5)", "comments": ("comment",)})
+    assert state["amr"] == "(a / a4)"
+    assert history.redos(1) == 1
+    state = history.redo(1, {"amr": "(a / a4)", "comments": ("comment",)})
+    assert state["amr"] == "(a / a5)"
+    assert history.redos(1) == 0
+    assert history.undo(2, {"amr": "(b / b)"}) is None
+
+    # unchanged parts are shared with the preceding state
+    one = {"amr": "(a / a6)", "alignments": {"a": [[1, 2]]}}
+    two = {"amr": "(a / a7)", "alignments": {"a": [[1, 2]]}}
+    history.push(3, one)
+    history.push(3, two)
+    assert two["alignments"] is one["alignments"]
+    assert two["size"] == len("(a / a7)")
+
+    # states below the top keep only the differences of their triples
+    history = History()
+    triples = tuple(("n%d" % i, ":instance", "c%d" % i) for i in range(1000))
+    states = []
+    for i in range(5):
+        states.append(triples)
+        history.push(1, {"triples": triples})
+        triples = triples[:i] + (("n%d" % i, ":instance", "new"),) + triples[i + 1:]
+    assert history.size < 8 * 1000 + 4 * 100
+    for i in range(4, -1, -1):
+        state = history.undo(1, {"triples": triples})
+        assert state["triples"] == states[i]
+        triples = state["triples"]
+    for i in range(1, 5):
+        state = history.redo(1, {"triples": triples})
+        assert state["triples"] == states[i]
+        triples = state["triples"]
+
+    # memory limit: the oldest states of all sentences are dropped first
+    history = History(maxdepth=0, maxbytes=100)
+    for i in range(10):
+        history.push(i % 2, {"amr": "%020d" % i})
+    assert history.undos(0) + history.undos(1) == 5
+    assert history.size <= 100
+    assert history.undo(0, {"amr": "current"})["amr"] == "%020d" % 8
+
+    # redo states count, they do not make the undo states of other sentences disappear
+    history = History(maxdepth=0, maxbytes=100)
+    for i in range(4):
+        history.push(1, {"amr": "%020d" % i})
+    for i in range(4):
+        history.undo(1, {"amr": "%020d" % (i + 10)})
+    assert history.redos(1) == 4
+    history.push(2, {"amr": "%020d" % 20})
+    history.push(2, {"amr": "%020d" % 21})
+    assert history.undos(2) == 2
+    assert history.redos(1) == 3
+    assert history.size == 100
+
+
+def test_edit_undo_per_sentence():
+    datadir = tempfile.TemporaryDirectory()
+    shutil.copyfile(mydir + "/data/testamr.txt", datadir.name + "/testamr.txt")
+    aes = AMR_Edit_Server(4568, datadir.name + "/testamr.txt", None, None, None, None, False)
+    client = aes.app.test_client()
+    response = client.get("/edit", query_string={"num": 2, "modconcept": "c", "newconcept": "dog"})
+    res = json.loads(response.data)
+    assert "(c / dog)" in res["penman"]
+    assert res["undos"] == 1
+    response = client.get("/edit", query_string={"num": 3, "modconcept": "m", "newconcept": "rat"})
+    res = json.loads(response.data)
+    assert res["undos"] == 1
+
+    # undo on sentence 2 does not touch sentence 3
+    response = client.get("/history", query_string={"num": 2, "prevmod": 5, "history": "undo"})
+    res = json.loads(response.data)
+    assert "(c / cat)" in res["penman"]
+    assert res["undos"] == 0
+    assert res["redos"] == 1
+    response = client.get("/read", query_string={"num": 3})
+    res = json.loads(response.data)
+    assert "(m / rat)" in res["penman"]
+    assert res["undos"] == 1
+    assert res["redos"] == 0
+
+
+def testumr_undo_shares_alignments():
+    datadir = tempfile.TemporaryDirectory()
+    shutil.copyfile(mydir + "/data/testumr.umr", datadir.name + "/testumr.umr")
+    aes = AMR_Edit_Server(4569, datadir.name + "/testumr.umr", None, None, None, None, False, umr=True)
+    client = aes.app.test_client()
+    response = client.get("/edit", query_string={"num": 5, "modconcept": "s5p", "newconcept": "man"})
+    response = client.get("/edit", query_string={"num": 5, "prevmod": 1, "modconcept": "s5p", "newconcept": "woman"})
+    res = json.loads(response.data)
+    assert res["undos"] == 2
+
+    # unchanged alignments and document graph are not copied again
+    first, second = aes.history.undostacks[5]
+    assert first["alignments"] is second["alignments"]
+    assert first["docgraph"] is second["docgraph"]
+    # the triples of the state below the top are only the difference to those of the top
+    assert ("s5p", ":instance", "man") in second["triples"]
+    assert first["triples"].changes == [(4, 5, (("s5p", ":instance", "person"),))]
+    assert ("s5p", ":instance", "person") in first["triples"].apply(second["triples"])
+
+    response = client.get("/edit", query_string={"num": 5, "prevmod": 2, "umrvar": "s5p", "indexes": ""})
+    third = aes.history.undostacks[5][-1]
+    assert third["alignments"] is second["alignments"]
+    response = client.get("/edit", query_string={"num": 5, "prevmod": 3, "umrvar": "s5p2", "indexes": ""})
+    fourth = aes.history.undostacks[5][-1]
+    assert fourth["alignments"] is not third["alignments"]
+    assert "s5p" in third["alignments"]
+    assert "s5p" not in fourth["alignments"]
+
+    response = client.get("/history", query_string={"num": 5, "prevmod": 4, "history": "undo"})
+    response = client.get("/history", query_string={"num": 5, "prevmod": 5, "history": "undo"})
+    res = json.loads(response.data)
+    assert "s5p" in res["alignments"]
+
+
+def test_batchedit():
+    datadir = tempfile.TemporaryDirectory()
+    shutil.copyfile(mydir + "/data/testamr.txt", datadir.name + "/testamr.txt")
+    aes = AMR_Edit_Server(4568, datadir.name + "/testamr.txt", None, None, None, None, False)
+    client = aes.app.test_client()
+    edits = [{"addconcept": "small"},
+             {"start": "m", "end": "s", "label": ":mod"},
+             {"literalof": "m", "relationforliteral": ":quant", "newliteral": 2},
+             {"modconcept": "c", "newconcept": "dog"}]
+    response = client.post("/batchedit", data={"num": 2, "edits": json.dumps(edits)})
+    res = json.loads(response.data)
+    assert "(m / mouse\n      :mod (s / small)\n      :quant 2)" in res["penman"]
+    assert "(c / dog)" in res["penman"]
+    assert res["undos"] == 1
+    prevmod = res["prevmod"]
+
+    # all commands or none
+    edits = [{"modconcept": "c", "newconcept": "cat"},
+             {"addgraph": "(x / bird)"}]
+    response = client.post("/batchedit", data={"num": 2, "prevmod": prevmod, "edits": json.dumps(edits)})
+    assert response.status_code == 400
+    res = json.loads(response.data)
+    assert res["error"] == "edit command 2: Missing variable mappings. use 'v1/v2 ...', no command applied"
+    response = client.post("/batchedit", data={"num": 2, "prevmod": prevmod, "edits": json.dumps([{"modconcept": "c", "newconceptt": "cat"}])})
+    assert response.status_code == 400
+    response = client.post("/batchedit", data={"num": 2, "prevmod": prevmod, "edits": json.dumps([{"moddocgraph": "coref", "dgpos": "x"}])})
+    assert response.status_code == 400
+    assert json.loads(response.data)["error"] == "dgpos must be an integer in edit command 1"
+    response = client.post("/batchedit", data={"num": 2, "prevmod": prevmod, "edits": json.dumps([{"modconcept": "c", "newconcept": "cat"}, {"modpenman": "(k / kill-01 :ARG0 (c / cat)"}])})
+    assert response.status_code == 400
+    res = json.loads(response.data)
+    assert res["error"].startswith("edit command 2: format error: ")
+    assert "<span" not in res["error"]
+    response = client.get("/read", query_string={"num": 2})
+    res = json.loads(response.data)
+    assert "(c / dog)" in res["penman"]
+    assert res["undos"] == 1
+
+    # a rolled back batch does not mark the sentence as modified
+    date = aes.amrdoc.sentences[2].date
+    edits = [{"modconcept": "c", "newconcept": "dog"}, {"modpenman": "(k / kill-01)"}, {"addgraph": "(x / bird)"}]
+    response = client.post("/batchedit", data={"num": 3, "edits": json.dumps(edits)})
+    assert response.status_code == 400
+    assert not aes.aps[3].modified
+    assert aes.amrdoc.sentences[2].date == date
+    assert "(c / cat)" in aes.aps[3].lastpm
+
+    response = client.get("/history", query_string={"num": 2, "prevmod": prevmod, "history": "undo"})
+    res = json.loads(response.data)
+    assert "(c / cat)" in res["penman"]
+    assert "small" not in res["penman"]
+
+
+def test_batchedit_reify():
+    # reify and addgraph use the PENMAN of the graph as modified by the preceding commands of the batch
+    datadir = tempfile.TemporaryDirectory()
+    shutil.copyfile(mydir + "/data/testamr.txt", datadir.name + "/testamr.txt")
+    aes = AMR_Edit_Server(4568, datadir.name + "/testamr.txt", None, None, None, None, False,
+                          reifications=mydir + "/data/reification-table.txt")
+    client = aes.app.test_client()
+    edits = [{"modconcept": "c", "newconcept": "dog"},
+             {"reify": ":location <>  be-located-at-91"}]
+    response = client.post("/batchedit", data={"num": 3, "edits": json.dumps(edits)})
+    assert response.status_code == 200
+    res = json.loads(response.data)
+    assert res["penman"] == '(k / kill-01\n   :ARG0 (c / dog)\n   :ARG1 (m / mouse)\n   :ARG1-of (zzz0 / be-located-at-91\n      :ARG2 (k2 / kitchen))\n   :time (d / date-entity\n      :dayperiod (n / night)))'
+
+    edits = [{"modconcept": "m", "newconcept": "rat"},
+             {"addgraph": "(x / run-01 :ARG0 (y / rat))", "mappings": "m/y"}]
+    response = client.post("/batchedit", data={"num": 3, "prevmod": res["prevmod"], "edits": json.dumps(edits)})
+    assert response.status_code == 200
+    res = json.loads(response.data)
+    # joingraphs renames the variables
+    assert ":ARG0 (d / dog)" in res["penman"]
+    assert ":ARG1 (r / rat\n      :ARG0-of (r2 / run-01))" in res["penman"]
+
+
+def test_batch_edit():
+    import metamorphosed.amrdoc as amrdoc
+    import metamorphosed.batch_edit as batch_edit
+
+    datadir = tempfile.TemporaryDirectory()
+    with open(datadir.name + "/script.txt", "w") as ofp:
+        print("# applied to all sentences", file=ofp)
+        print("rename m mm", file=ofp)
+        print("# ::id sentence 2", file=ofp)
+        print("concept c dog", file=ofp)
+        print("small", file=ofp)
+        print("mm :mod s", file=ofp)
+        print("mm :quant 2", file=ofp)
+        print("- k :ARG0 c", file=ofp)
+        print("k :ARG0 c", file=ofp)
+        print("# ::id sentence 3", file=ofp)
+        print("reify :location", file=ofp)
+        print("# ::id sentence 7", file=ofp)
+        print("top cc", file=ofp)
+    be = batch_edit.BatchEdit(mydir + "/data/testamr.txt", datadir.name + "/script.txt",
+                              reifications=mydir + "/data/reification-table.txt", workers=2, chunksize=4)
+    assert be.allsentences == ["rename m mm"]
+    assert be.scripts["sentence 7"] == ["top cc"]
+    modified, errors = be.edit(datadir.name + "/out.txt")
+    assert modified == 8
+    assert errors == 18
+
+    orig = list(amrdoc.iter_sentences(mydir + "/data/testamr.txt"))
+    sentences = list(amrdoc.iter_sentences(datadir.name + "/out.txt"))
+    assert len(sentences) == 26
+    assert sentences[0].amr.startswith("(mm / multi-sentence")
+    assert sentences[1].amr == "(k / kill-01\n   :ARG1 (mm / mouse\n             :mod (s / small)\n             :quant 2)\n   :ARG0 (c / dog))"
+    assert sentences[1].date
+    assert "be-located-at-91" in sentences[2].amr
+    # sentences where a command fails are not modified
+    for num in 3, 6:
+        assert sentences[num].amr == orig[num].amr
+        assert not sentences[num].date
+
+
+def test_process_errors():
+    import metamorphosed.amreditor as amreditor
+
+    ap = amreditor.AMRProcessor()
+    ap.readpenman("(k / kill-01 :ARG0 (c / cat) :ARG1 (m / mouse :quant 2))")
+    version = ap.version
+    # commands on edges or literals which do not exist are errors
+    assert ap.process("edge k x :ARG2") == "no edge between « k » and « x »"
+    assert ap.process("move k x :ARG2 c") == "no edge between « k » and « x »"
+    assert ap.process("literal m :mod 3") == "no literal « :mod » of « m »"
+    assert ap.process("- k :ARG2 m") == "no edge « :ARG2 » between « k » and « m »"
+    assert ap.version == version
+
+    assert ap.process("edge k m :ARG2") is None
+    assert ap.process("literal m :quant 3") is None
+    assert ap.process("- k :ARG0 c") is None
+    assert ap.triples == [("k", ":instance", "kill-01"), ("k", ":ARG2", "m"), ("c", ":instance", "cat"),
+                          ("m", ":instance", "mouse"), ("m", ":quant", "3")]
+
+
+def test_triplestore():
+    from metamorphosed.triplestore import TripleStore
+    ts = TripleStore([("k", ":instance", "kill-01"), ("k", ":ARG0", "c"), ("c", ":instance", "cat"), ("k", ":ARG1", "m"), ("m", ":instance", "mouse")])
+    assert len(ts) == 5
+    assert ts[1] == ("k", ":ARG0", "c")
+    assert ts.withsubject("k") == [("k", ":instance", "kill-01"), ("k", ":ARG0", "c"), ("k", ":ARG1", "m")]
+    assert ts.withobject("c") == [("k", ":ARG0", "c")]
+    assert ts.withsp("k", ":ARG1") == [("k", ":ARG1", "m")]
+    assert ts.between("m", "k") == [("k", ":ARG1", "m")]
+
+    ts.replace(("k", ":ARG0", "c"), ("c", ":ARG0-of", "k"))
+    assert ts[1] == ("c", ":ARG0-of", "k")
+    assert ts.withsubject("c") == [("c", ":ARG0-of", "k"), ("c", ":instance", "cat")]
+    assert ts.withsp("k", ":ARG0") == []
+
+    ts.remove(("k", ":instance", "kill-01"))
+    ts.prepend(("k", ":instance", "murder-01"))
+    ts.append(("m", ":mod", "s"))
+    assert ts == [("k", ":instance", "murder-01"), ("c", ":ARG0-of", "k"), ("c", ":instance", "cat"),
+                  ("k", ":ARG1", "m"), ("m", ":instance", "mouse"), ("m", ":mod", "s")]
+    assert ("m", ":mod", "s") in ts
+    assert ("m", ":mod", "k") not in ts
+    with pytest.raises(ValueError):
+        ts.remove(("m", ":mod", "k"))
+
+    # log of the nodes of changed triples
+    ts = TripleStore([("k", ":instance", "kill-01"), ("k", ":ARG0", "c"), ("c", ":instance", "cat")])
+    assert ts.changes == []
+    ts.replace(("c", ":instance", "cat"), ("c", ":instance", "dog"))
+    ts.append(("k", ":ARG1", "m"))
+    assert ts.changes == ["c", "c", "k", "m"]
+    reordered = TripleStore([ts[2], ts[0], ts[3], ts[1], ("m", ":instance", "mouse")])
+    reordered.follow(ts)
+    assert reordered.origin is ts.origin
+    assert reordered.changes == ["c", "c", "k", "m", "m"]
+
+
+def test_components():
+    from metamorphosed.triplestore import TripleStore
+    ts = TripleStore([("k", ":instance", "kill-01"), ("k", ":ARG0", "c"), ("c", ":instance", "cat"), ("k", ":ARG1", "m"), ("m", ":instance", "mouse"), ("m", ":quant", "2")])
+    assert ts.components.count() == 1
+
+    ts.remove(("k", ":ARG1", "m"))
+    assert ts.components.components() == [{"c", "k"}, {"m"}]
+    ts.append(("m", ":ARG1-of", "k"))
+    assert ts.components.count() == 1
+    # a relation which only changes its label does not split the graph
+    ts.replace(("m", ":ARG1-of", "k"), ("m", ":ARG0-of", "k"))
+    assert not ts.components.stale
+    assert ts.components.count() == 1
+
+    # a relation to an undefined variable does not link anything
+    ts.append(("d", ":mod", "b"))
+    assert ts.components.components() == [{"c", "k", "m"}, {"d"}]
+    ts.append(("b", ":instance", "big"))
+    ts.append(("b", ":poss", "c"))
+    assert ts.components.count() == 1
+    ts.remove(("b", ":instance", "big"))
+    assert ts.components.components() == [{"b", "c", "k", "m"}, {"d"}]
+
+
+def test_canonicalize():
+    import metamorphosed.amreditor as amreditor
+    ap = amreditor.AMRProcessor()
+    ap.readpenman("(k / kill-01 :ARG0 (c / cat) :ARG1 (m / mouse))")
+    pm = ap.penman()
+    assert pm.startswith("(k / kill-01\n")
+    version = ap.version
+    assert ap.canonicalversion == version
+
+    # no modification: PENMAN is not encoded and parsed again
+    ap.lastpm = "not encoded again"
+    assert ap.penman() == "not encoded again"
+    assert ap.version == version
+
+    ap.modconcept("c", "dog")
+    assert ap.version > version
+    assert "(c / dog)" in ap.penman()
+
+    ap.deledge("k", "m", ":ARG1")
+    ap.deledge("k", "m", ":ARG1")
+    assert ap.penman().startswith("(k / kill-01")
+    assert "mouse" in ap.penman() # disconnected graph
+    assert ap.isDisconnected
+    assert not ap.encodable
+
+    ap.addedge("k", "m", ":ARG1")
+    assert ap.penman() == "(k / kill-01\n   :ARG0 (c / dog)\n   :ARG1 (m / mouse))"
+    assert ap.encodable
+
+
+def test_collapse():
+    import metamorphosed.amreditor as amreditor
+    ap = amreditor.AMRProcessor()
+    ap.readpenman("(k / kill-01 :ARG0 (c / cat :mod (b / black)) :ARG1 (m / mouse :mod (s / small) :quant 3) :location (k2 / kitchen))")
+    assert ap.visiblenodes(0) is None
+    assert ap.visiblenodes(7) is None
+    assert ap.visiblenodes(4) == {"k": 0, "c": 1, "m": 1, "k2": 0}
+    assert ap.visiblenodes(4, expanded={"m"}) == {"k": 0, "c": 1, "m": 0, "k2": 0, "s": 0}
+    assert ap.visiblenodes(2) == {"k": 3}
+
+    source = ap.digraph(visible=ap.visiblenodes(4)).source
+    assert "collapsed#c" in source
+    assert "collapsed#m" in source
+    assert "b/black" not in source
+    assert "c/cat" in source
+    assert "quant" in source # literals of visible instances
+
+    datadir = tempfile.TemporaryDirectory()
+    shutil.copyfile(mydir + "/data/testamr.txt", datadir.name + "/testamr.txt")
+    aes = AMR_Edit_Server(4568, datadir.name + "/testamr.txt", None, None, None, None, False,
+                          collapse=3)
+    client = aes.app.test_client()
+    response = client.get("/read", query_string={"num": 3})
+    res = json.loads(response.data)
+    assert res["penman"].startswith("(k / kill-01")
+    assert aes.aps[3].visiblenodes(3) == {"k": 4}
+    assert "collapsed#k" in res["svg"]
+    response = client.get("/read", query_string={"num": 3, "expand": "k"})
+    assert response.status_code == 200
+    response = client.get("/edit", query_string={"num": 3, "modconcept": "c", "newconcept": "dog", "expand": "k"})
+    res = json.loads(response.data)
+    assert "(c / dog)" in res["penman"]
+
+
+def test_static_export():
+    import metamorphosed.static_export as static_export
+
+    datadir = tempfile.TemporaryDirectory()
+    outdir = datadir.name + "/site"
+    se = static_export.StaticExport(mydir + "/data/testamr.txt", outdir, rels=mydir + "/data/relations.txt",
+                                    workers=2, shardsize=10, batchsize=4)
+    assert se.export() == (26, 0)
+
+    with open(outdir + "/index.json") as ifp:
+        index = json.load(ifp)
+    assert index["numsent"] == 26
+    assert index["shards"] == ["index/1.json", "index/2.json", "index/3.json"]
+    with open(outdir + "/index/3.json") as ifp:
+        shard = json.load(ifp)
+    assert [x["num"] for x in shard] == [21, 22, 23, 24, 25, 26]
+
+    with open(outdir + "/sentences/3.json") as ifp:
+        sent = json.load(ifp)
+    assert sent["penman"].startswith("(k / kill-01")
+    assert "<svg" in sent["svg"]
+    for fn in ["index.html", "static.js", "index.css", "css/relations.css", "img/orange.ico"]:
+        assert os.path.isfile(outdir + "/" + fn)
+
+    # nothing changed: nothing to render
+    assert se.export() == (0, 26)
+
+    # only the modified sentence is rendered again
+    with open(mydir + "/data/testamr.txt") as ifp:
+        amrs = ifp.read()
+    with open(datadir.name + "/testamr.txt", "w") as ofp:
+        ofp.write(amrs.replace("(k / kill-01", "(k / murder-01", 1))
+    se = static_export.StaticExport(datadir.name + "/testamr.txt", outdir, rels=mydir + "/data/relations.txt",
+                                    workers=2, shardsize=10, batchsize=4)
+    assert se.export() == (1, 25)
+    with open(outdir + "/sentences/2.json") as ifp:
+        sent = json.load(ifp)
+    assert sent["penman"].startswith("(k / murder-01")
+
+    # modified validation data: all sentences are rendered again
+    shutil.copyfile(mydir + "/data/relations.txt", datadir.name + "/relations.txt")
+    se = static_export.StaticExport(datadir.name + "/testamr.txt", outdir, rels=datadir.name + "/relations.txt",
+                                    workers=2, shardsize=10, batchsize=4)
+    assert se.export() == (26, 0)
+    assert se.export() == (0, 26)
+    with open(datadir.name + "/relations.txt", "a") as ofp:
+        print(":newrelation", file=ofp)
+    se = static_export.StaticExport(datadir.name + "/testamr.txt", outdir, rels=datadir.name + "/relations.txt",
+                                    workers=2, shardsize=10, batchsize=4)
+    assert se.export() == (26, 0)
+
+
+def test_exportgraphs_pool():
+    # an export neither creates nor evicts processors of the pool
+    datadir = tempfile.TemporaryDirectory()
+    shutil.copyfile(mydir + "/data/testamr.txt", datadir.name + "/testamr.txt")
+    aes = AMR_Edit_Server(4568, datadir.name + "/testamr.txt", None, None, None, None, False)
+    client = aes.app.test_client()
+    client.get("/read", query_string={"num": 2})
+    loaded = aes.aps.loaded()
+    response = client.get("/graphs/exportfile.zip", query_string={"format": "svg"})
+    zfp = zipfile.ZipFile(io.BytesIO(response.data), "r")
+    assert len(zfp.infolist()) == 26
+    assert aes.aps.loaded() == loaded
+
+
+def test_processorpool():
+    import metamorphosed.amrdoc as amrdoc
+    from metamorphosed.processor_pool import ProcessorPool
+    ad = amrdoc.AMRdoc(mydir + "/data/testamr.txt")
+    pool = ProcessorPool(ad.sentences, maxsize=3)
+    assert len(pool) == 26
+    assert pool.loaded() == []
+
+    ap = pool[2]
+    ap.readpenman(ap.lastpm)
+    ap.modified = True
+    for x in range(3, 8):
+        pool[x].readpenman(pool[x].lastpm)
+    # modified processor is kept, least recently used unmodified ones are dropped
+    assert pool.loaded() == [2, 6, 7]
+    assert pool[2] is ap
+    assert pool.stats()["evicted"] == 3
+
+    ap.write()
+    pool[8]
+    assert pool.loaded() == [7, 2, 8]
+    assert 27 not in pool
+    assert pool.get(27) is None
+
+
+def test_propbank_cache():
+    import metamorphosed.propbank_frames as propbank_frames
+    datadir = tempfile.TemporaryDirectory()
+    framesdir = datadir.name + "/frames"
+    cachedir = datadir.name + "/cache"
+    shutil.copytree(mydir + "/data/frames-test", framesdir)
+
+    pf = propbank_frames.PropBankFrames(framesdir, cachedir=cachedir)
+    assert pf.parsedfiles == 2
+    assert len(os.listdir(cachedir)) == 1
+    assert sorted(pf.rolesets) == ["see-01", "sleep-01"]
+
+    # everything read from cache
+    pf2 = propbank_frames.PropBankFrames(framesdir, cachedir=cachedir)
+    assert pf2.parsedfiles == 0
+    assert pf2.getargdoc("see-01") == pf.getargdoc("see-01")
+    assert pf2.validate([("s", ":instance", "see-01"), ("s", ":ARG3", "c"), ("c", ":instance", "cat")]) == ["invalid argument «:ARG3» for concept «see-01»"]
+    assert "%s" % pf2.lemmas["sleep"] == "%s" % pf.lemmas["sleep"]
+
+    # other value of onlyinuse: different cache file
+    pf3 = propbank_frames.PropBankFrames(framesdir, onlyinuse=False, cachedir=cachedir)
+    assert pf3.parsedfiles == 2
+    assert sorted(pf3.rolesets) == ["see-01", "see-02", "sleep-01"]
+
+    # only modified file is parsed again, deleted file disappears
+    with open(framesdir + "/sleep.xml") as ifp:
+        xml = ifp.read()
+    with open(framesdir + "/sleep.xml", "w") as ofp:
+        print(xml.replace('name="sleep"', 'name="be asleep"'), file=ofp)
+    os.remove(framesdir + "/see.xml")
+    pf4 = propbank_frames.PropBankFrames(framesdir, cachedir=cachedir)
+    assert pf4.parsedfiles == 1
+    assert sorted(pf4.rolesets) == ["sleep-01"]
+    assert pf4.getargdoc("sleep-01")["descr"] == "be asleep"
+
+
+def test_propbank_parallel():
+    import metamorphosed.propbank_frames as propbank_frames
+    pf = propbank_frames.PropBankFrames(mydir + "/data/frames-test", onlyinuse=False)
+    pf2 = propbank_frames.PropBankFrames(mydir + "/data/frames-test", onlyinuse=False, workers=2)
+    assert pf2.parsedfiles == 2
+    assert list(pf2.rolesets) == list(pf.rolesets)
+    assert pf2.roleset_args == pf.roleset_args
+    assert pf2.rolesets_lemma == pf.rolesets_lemma
+    for lemma in pf.lemmas:
+        assert "%s" % pf2.lemmas[lemma] == "%s" % pf.lemmas[lemma]
+
+
 def test_iaa_std():
     import io
     import metamorphosed.inter_annotator as inter_annotator
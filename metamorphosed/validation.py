@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+
+# This library is under the 3-Clause BSD License
+#
+# Copyright (c) 2026,  Orange
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above copyright
+#      notice, this list of conditions and the following disclaimer in the
+#      documentation and/or other materials provided with the distribution.
+#
+#    * Neither the name of Orange nor the
+#      names of its contributors may be used to endorse or promote products
+#      derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL ORANGE BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+# Software Name: MetAMoRphosED AMR-Editor
+# Author: Johannes Heinecke
+
+# validation of AMR graphs triple by triple.
+# A validator (AMR_relations.Relations, propbank_frames.PropBankFrames, relations_constraints.Constraints)
+# implements validatetriple(s, p, o, concepts) which returns the error messages of a single triple. concepts
+# only contains the concepts of s and o (if they are instances), so the messages of a triple can be cached
+# as long as the triple and the concepts of its subject and object do not change
+
+
+def getconcepts(triples):
+    concepts = {} # var: concept
+    for s, p, o in triples:
+        if p == ":instance":
+            concepts[s] = o
+    return concepts
+
+
+def context(s, o, concepts):
+    ctx = {}
+    if s in concepts:
+        ctx[s] = concepts[s]
+    if o in concepts:
+        ctx[o] = concepts[o]
+    return ctx
+
+
+def validatetriples(validator, triples):
+    # validate all triples, messages on instances come first
+    concepts = getconcepts(triples)
+    errors = []
+    for instances in True, False:
+        for s, p, o in triples:
+            if (p == ":instance") == instances:
+                errors += validator.validatetriple(s, p, o, context(s, o, concepts))
+    return errors
+
+
+class TripleValidation:
+    # same as validatetriples(), but keeps the messages of every triple. When the same TripleStore is validated
+    # again, only the triples of the nodes which changed since (TripleStore.changes) are revisited
+    def __init__(self):
+        self.cache = {} # validator: {(triple, concepts of subject and object): [messages]}
+        self.messages = {} # triple: (concepts of subject and object, [messages of every validator])
+        self.validators = () # validators, TripleStore.origin and length of TripleStore.changes of the last validation
+        self.origin = None
+        self.position = 0
+        self.checked = 0 # number of triples validated (not found in cache)
+        self.revisited = 0 # number of triples whose messages were looked up again
+
+    def validate(self, triples, validators):
+        validators = tuple(validators)
+        if not validators:
+            return []
+        if triples.origin is self.origin and validators == self.validators:
+            todo = set()
+            for node in set(triples.changes[self.position:]):
+                todo.update(triples.withsubject(node))
+                todo.update(triples.withobject(node))
+        else:
+            self.messages = {}
+            todo = set(triples)
+        self.validators = validators
+        self.origin = triples.origin
+        self.position = len(triples.changes)
+
+        for tr in todo:
+            self.messages[tr] = self.validatetriple(triples, tr)
+            self.revisited += 1
+        if len(self.messages) > 2 * len(triples) + 100:
+            # forget triples which are no longer in the graph
+            self.messages = {tr: self.messages[tr] for tr in triples}
+        for i, validator in enumerate(validators):
+            if len(self.cache.get(validator, ())) > 2 * len(triples) + 100:
+                self.cache[validator] = {(tr, ctxitems): msgs[i] for tr, (ctxitems, msgs) in self.messages.items()}
+
+        errors = []
+        for i, validator in enumerate(validators):
+            for instances in True, False:
+                for tr in triples:
+                    if (tr[1] == ":instance") == instances:
+                        errors += self.messages[tr][1][i]
+        return errors
+
+    def validatetriple(self, triples, tr):
+        # the concepts of subject and object are found with the index of the TripleStore
+        ctx = {}
+        for var in tr[0], tr[2]:
+            for _, _, concept in triples.withsp(var, ":instance"):
+                ctx[var] = concept
+        ctxitems = tuple(ctx.items())
+        msgs = []
+        for validator in self.validators:
+            cache = self.cache.setdefault(validator, {})
+            vmsgs = cache.get((tr, ctxitems))
+            if vmsgs is None:
+                vmsgs = validator.validatetriple(tr[0], tr[1], tr[2], ctx)
+                cache[(tr, ctxitems)] = vmsgs
+                self.checked += 1
+            msgs.append(vmsgs)
+        return ctxitems, msgs
@@ -0,0 +1,5 @@
+#!/usr/bin/env python3
+
+from metamorphosed.static_export import main
+
+main()